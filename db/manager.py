@@ -1,10 +1,13 @@
 # -*- coding: utf-8 -*-
 
 import sqlite3
+from contextlib import contextmanager
 from logging import getLogger, Logger
-from typing import Optional
+from threading import local, Lock
+from typing import Iterator, Optional
 
 import settings.settings as s
+from db.migrations import migrate
 
 __all__ = ('DbManager',)
 
@@ -25,9 +28,36 @@ class DbManager:
 
     * 'show_is_video_download' - Если '1' - показывать сообщение
       "Вы действительно хотите загрузить...", иначе - не показывать (По умолчанию - '1').
+    * 'max_parallel_downloads' - Количество видеороликов, скачиваемых
+      одновременно (По умолчанию - '3').
+    * 'output_mode' - Режим формирования выходного файла: 'mp4', 'native'
+      или 'transcode' (см. ``settings.OUTPUT_MODES``, по умолчанию - 'mp4').
+      Столбец ``table_video.output_mode`` задает режим отдельного видеоролика
+      (NULL - режим из настроек).
+    * 'archive_mode' - Загрузка видеороликов, которые есть в архиве скачанных
+      видеороликов: 'verify', 'skip' или 'off' (см. ``settings.ARCHIVE_MODES``,
+      по умолчанию - 'verify').
+    * 'bandwidth_limit' - Общее ограничение скорости скачивания в байт/с,
+      '0' - без ограничения (см. ``downloaders.bandwidth.BandwidthLimiter``, по умолчанию - '0').
+
+    Состояния загрузки видеоролика (столбец ``table_video.state``):
+
+    * 'queued' - загрузка не начиналась;
+    * 'downloading' - идет загрузка (или приложение было закрыто во время загрузки);
+    * 'stopped' - загрузка прервана, незавершенный файл сохранен;
+    * 'error' - загрузка завершилась ошибкой;
+    * 'finished' - видеоролик скачан.
+
+    Объект можно использовать из нескольких потоков: каждый поток работает
+    через собственное соединение (база данных открывается в режиме WAL, поэтому
+    чтение не блокируется записью, а фиксация транзакции не ждет записи на диск).
+    Несколько операций объединяются в одну транзакцию с помощью ``transaction()``.
+
+    При создании объекта схема базы данных обновляется до последней версии
+    (см. ``db.migrations``).
 
     Attributes:
-        connection: Объект подключения к базе данных приложения.
+        connection: Объект подключения к базе данных приложения текущего потока.
                     Представлен классом Connection модуля sqlite3.
         cursor: Объект курсора для соединения DbManager.connection
         _logger: Объект канала логирования. Представлен классом Logger модуля logging.
@@ -36,26 +66,79 @@ class DbManager:
         db_path: Путь до файла базы данных приложения.
     """
 
-    connection: sqlite3.Connection
     _logger: Logger
 
     def __init__(self,
                  db_path: str = s.DB_PATH):
-        self.connection = sqlite3.connect(db_path)
-        self.connection.row_factory = dict_factory
-        self.cursor = self.connection.cursor()
+        self.db_path = db_path
+        self._local = local()
+        self._connections = []
+        self._connections_lock = Lock()
         self._logger = getLogger(self.__class__.__name__)
 
+        # Соединение потока, создавшего объект, переключение в режим WAL и обновление схемы
+        migrate(self.connection)
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_path, timeout=s.DB_TIMEOUT, check_same_thread=False)
+            connection.row_factory = dict_factory
+            connection.execute('PRAGMA journal_mode = WAL')
+            connection.execute('PRAGMA synchronous = NORMAL')
+            self._local.connection = connection
+            self._local.cursor = connection.cursor()
+            self._local.transaction_depth = 0
+            with self._connections_lock:
+                self._connections.append(connection)
+        return connection
+
+    @property
+    def cursor(self) -> sqlite3.Cursor:
+        self.connection
+        return self._local.cursor
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        Объединяет операции текущего потока в одну транзакцию: изменения
+        фиксируются при выходе из блока ``with`` (или отменяются при исключении).
+        Вложенные блоки выполняются в транзакции внешнего блока.
+        """
+        connection = self.connection
+        self._local.transaction_depth += 1
+        try:
+            yield
+        except BaseException:
+            self._local.transaction_depth -= 1
+            if not self._local.transaction_depth:
+                connection.rollback()
+            raise
+        else:
+            self._local.transaction_depth -= 1
+            if not self._local.transaction_depth:
+                connection.commit()
+
+    def _commit(self) -> None:
+        """Фиксирует изменения, если они не выполняются внутри ``transaction()``"""
+        if not self._local.transaction_depth:
+            self.connection.commit()
+
     def add_table_video(self,
                         url: str,
                         resource_name: str,
                         title: Optional[str] = None,
                         format_name: Optional[str] = None,
                         format_string: Optional[str] = None,
-                        thumbnail_filename: Optional[str] = None) -> int:
+                        thumbnail_filename: Optional[str] = None,
+                        video_info: Optional[str] = None,
+                        video_info_time: Optional[float] = None,
+                        output_mode: Optional[str] = None) -> Optional[int]:
         """
         Записывает в базу данных видеоролик, добавленный в таблицу видеороликов
-        для скачивания.
+        для скачивания. Если видеоролик с тем же URL адресом и форматом уже есть
+        в таблице, он не добавляется.
 
         Args:
             url: URL адрес на страницу видеоролика.
@@ -64,15 +147,20 @@ class DbManager:
             format_name: Название формата скачивания.
             format_string: Строка формата скачивания.
             thumbnail_filename: Имя файла изображения превью видеоролика.
+            video_info: JSON строка с информацией о видеоролике,
+                        возвращаемая ``Downloader.get_video_info_json()``.
+            video_info_time: Время получения информации о видеоролике (timestamp).
+            output_mode: Режим формирования выходного файла (None - режим из настроек).
 
         Returns:
-            ID видеоролика в базе данных
+            ID видеоролика в базе данных или None, если видеоролик уже добавлен.
         """
         query = """
         INSERT INTO table_video (url, resource, title, thumbnail_filename,
-                                 format_name, format_string)
+                                 format_name, format_string, video_info, video_info_time, output_mode)
         VALUES (:url, :resource, :title, :thumbnail_filename,
-                :format_name, :format_string)"""
+                :format_name, :format_string, :video_info, :video_info_time, :output_mode)
+        ON CONFLICT (url, format_name) DO NOTHING"""
 
         self.cursor.execute(query, {
             'url': url,
@@ -81,19 +169,67 @@ class DbManager:
             'thumbnail_filename': thumbnail_filename,
             'format_name': format_name,
             'format_string': format_string,
+            'video_info': video_info,
+            'video_info_time': video_info_time,
+            'output_mode': output_mode,
         })
-        self.connection.commit()
+        added = self.cursor.rowcount
+        self._commit()
+
+        if not added:
+            return None
 
         self._logger.debug('Table video added')
 
         return self.cursor.lastrowid
 
+    def add_table_videos(self, videos: list[dict]) -> list[Optional[int]]:
+        """
+        Записывает в базу данных несколько видеороликов одной транзакцией.
+        Видеоролики, которые уже есть в таблице (с тем же URL адресом и форматом), пропускаются.
+
+        Args:
+            videos: Список словарей с ключами - названиями аргументов метода
+                    ``add_table_video()`` (``url``, ``resource_name``, ``title``, ...).
+
+        Returns:
+            Список ID добавленных видеороликов (None для пропущенных видеороликов).
+        """
+        query = """
+        INSERT INTO table_video (url, resource, title, thumbnail_filename,
+                                 format_name, format_string, video_info, video_info_time, output_mode)
+        VALUES (:url, :resource, :title, :thumbnail_filename,
+                :format_name, :format_string, :video_info, :video_info_time, :output_mode)
+        ON CONFLICT (url, format_name) DO NOTHING"""
+
+        ids = []
+        with self.transaction():
+            for video in videos:
+                self.cursor.execute(query, {
+                    'url': video['url'],
+                    'resource': video['resource_name'],
+                    'title': video.get('title'),
+                    'thumbnail_filename': video.get('thumbnail_filename'),
+                    'format_name': video.get('format_name'),
+                    'format_string': video.get('format_string'),
+                    'video_info': video.get('video_info'),
+                    'video_info_time': video.get('video_info_time'),
+                    'output_mode': video.get('output_mode'),
+                })
+                ids.append(self.cursor.lastrowid if self.cursor.rowcount else None)
+
+        self._logger.debug(f'Table videos added: {len(ids) - ids.count(None)}')
+
+        return ids
+
     def get_all_table_videos(self) -> list[dict]:
         """
         Возвращает данные видеороликов, занесенных в таблицу видеороликов
         для загрузки. Возвращаемые словари имеют следующие ключи:
         ``id``, ``url``, ``resource``, ``title``, ``thumbnail_filename``,
-        ``format_name``, ``format_string``
+        ``format_name``, ``format_string``, ``video_info``, ``video_info_time``,
+        ``output_path``, ``part_path``, ``downloaded_bytes``, ``total_bytes``, ``state``,
+        ``output_mode``
 
         Returns:
             Список словарей с данными видеоролика.
@@ -103,12 +239,74 @@ class DbManager:
 
         return result
 
+    def get_table_videos_count(self) -> int:
+        """
+        Возвращает количество видеороликов в таблице видеороликов для скачивания.
+
+        Returns:
+            Количество видеороликов.
+        """
+        query = """SELECT COUNT(*) AS count FROM table_video"""
+        return self.cursor.execute(query).fetchone()['count']
+
+    def get_table_videos_ids(self,
+                             after_id: int = 0,
+                             limit: int = -1) -> list[int]:
+        """
+        Возвращает id видеороликов в порядке добавления, начиная со следующего
+        после ``after_id`` (постраничное чтение без OFFSET).
+
+        Args:
+            after_id: id, после которого начинается страница (0 - с начала таблицы).
+            limit: Максимальное количество id (-1 - без ограничения).
+
+        Returns:
+            Список id видеороликов.
+        """
+        query = """
+        SELECT id FROM table_video
+        WHERE id > ?
+        ORDER BY id
+        LIMIT ?"""
+        return [row['id'] for row in self.cursor.execute(query, (after_id, limit)).fetchall()]
+
+    def get_thumbnail_filenames(self) -> set[str]:
+        """
+        Возвращает имена файлов превью, на которые ссылаются видеоролики
+        таблицы видеороликов для скачивания.
+
+        Returns:
+            Множество имен файлов превью.
+        """
+        query = """
+        SELECT DISTINCT thumbnail_filename FROM table_video
+        WHERE thumbnail_filename IS NOT NULL"""
+        return {row['thumbnail_filename'] for row in self.cursor.execute(query).fetchall()}
+
+    def get_table_videos_rows(self, ids: list[int]) -> list[dict]:
+        """
+        Возвращает данные видеороликов, отображаемые в таблице главного окна.
+        Возвращаемые словари имеют ключи ``id``, ``resource``, ``title``, ``format_name``.
+
+        Args:
+            ids: Список id видеороликов.
+
+        Returns:
+            Список словарей с данными видеороликов (порядок не гарантируется).
+        """
+        query = f"""
+        SELECT id, resource, title, format_name FROM table_video
+        WHERE id IN ({", ".join("?" * len(ids))})"""
+        return self.cursor.execute(query, ids).fetchall()
+
     def get_table_video_by_id(self, id: int) -> dict:
         """
         Возвращает данные видеоролика, занесенного в таблицу видеороликов
         по его id. Возвращаемый словарь имеет следующие ключи:
         ``id``, ``url``, ``resource``, ``title``, ``thumbnail_filename``,
-        ``format_name``, ``format_string``
+        ``format_name``, ``format_string``, ``video_info``, ``video_info_time``,
+        ``output_path``, ``part_path``, ``downloaded_bytes``, ``total_bytes``, ``state``,
+        ``output_mode``
 
         Args:
             id: id видеоролика в базе данных.
@@ -138,18 +336,21 @@ class DbManager:
             Если видеоролик присутствует в таблице - True, иначе - False.
         """
         query = """
-        SELECT * FROM table_video
-        WHERE url = ? AND format_name = ?"""
+        SELECT 1 FROM table_video
+        WHERE url = ? AND format_name = ?
+        LIMIT 1"""
 
-        result = self.cursor.execute(query, (url, format_name)).fetchall()
-        return bool(result)
+        result = self.cursor.execute(query, (url, format_name)).fetchone()
+        return result is not None
 
     def delete_table_video_by_id(self, id: int) -> None:
         """
         Удаляет видеоролик, занесенного в таблицу видеороликов
         по его id. Возвращаемый словарь имеет следующие ключи:
         ``id``, ``url``, ``resource``, ``title``, ``thumbnail_filename``,
-        ``format_name``, ``format_string``
+        ``format_name``, ``format_string``, ``video_info``, ``video_info_time``,
+        ``output_path``, ``part_path``, ``downloaded_bytes``, ``total_bytes``, ``state``,
+        ``output_mode``
 
         Args:
             id: id видеоролика в базе данных.
@@ -161,7 +362,7 @@ class DbManager:
         DELETE FROM table_video
         WHERE id = ?"""
         self.cursor.execute(query, (id,))
-        self.connection.commit()
+        self._commit()
 
     def delete_all_table_videos(self) -> None:
         """
@@ -170,7 +371,7 @@ class DbManager:
         query = """
         DELETE FROM table_video"""
         self.cursor.execute(query)
-        self.connection.commit()
+        self._commit()
 
     def update_table_video(self,
                            id: int,
@@ -179,7 +380,9 @@ class DbManager:
                            title: Optional[str] = None,
                            format_name: Optional[str] = None,
                            format_string: Optional[str] = None,
-                           thumbnail_filename: Optional[str] = None) -> None:
+                           thumbnail_filename: Optional[str] = None,
+                           video_info: Optional[str] = None,
+                           video_info_time: Optional[float] = None) -> None:
         """
         Обновить данные о видеоролике, занесенном в таблицу
         для скачивания по его id.
@@ -192,12 +395,19 @@ class DbManager:
             format_name: Название формата скачивания.
             format_string: Строка формата скачивания.
             thumbnail_filename: Имя файла изображения превью видеоролика.
+            video_info: JSON строка с информацией о видеоролике,
+                        возвращаемая ``Downloader.get_video_info_json()``.
+            video_info_time: Время получения информации о видеоролике (timestamp).
         """
+        # Состояние загрузки сбрасывается: незавершенный файл другого формата не может быть продолжен
         query = """
         UPDATE table_video
         SET url = :url, resource = :resource, title = :title,
             thumbnail_filename = :thumbnail_filename,
-            format_name = :format_name, format_string = :format_string
+            format_name = :format_name, format_string = :format_string,
+            video_info = :video_info, video_info_time = :video_info_time,
+            output_path = NULL, part_path = NULL, downloaded_bytes = 0,
+            total_bytes = NULL, state = 'queued'
         WHERE id = :id
         """
         self.cursor.execute(query, {
@@ -208,8 +418,103 @@ class DbManager:
             'thumbnail_filename': thumbnail_filename,
             'format_name': format_name,
             'format_string': format_string,
+            'video_info': video_info,
+            'video_info_time': video_info_time,
         })
-        self.connection.commit()
+        self._commit()
+
+    def set_table_video_output_mode(self,
+                                    id: int,
+                                    output_mode: Optional[str]) -> None:
+        """
+        Устанавливает режим формирования выходного файла видеоролика.
+
+        Args:
+            id: id видеоролика в базе данных.
+            output_mode: Режим формирования выходного файла (None - режим из настроек).
+        """
+        query = """
+        UPDATE table_video SET output_mode = ?
+        WHERE id = ?"""
+        self.cursor.execute(query, (output_mode, id))
+        self._commit()
+
+    def update_table_videos_download_states(self, states: list[dict]) -> None:
+        """
+        Обновляет состояние загрузки нескольких видеороликов одной транзакцией.
+        Значения ``None`` не изменяют сохраненные ранее значения.
+
+        Args:
+            states: Список словарей с ключами ``id``, ``state``, ``output_path``,
+                    ``part_path``, ``downloaded_bytes``, ``total_bytes``.
+        """
+        query = """
+        UPDATE table_video
+        SET state = COALESCE(:state, state),
+            output_path = COALESCE(:output_path, output_path),
+            part_path = COALESCE(:part_path, part_path),
+            downloaded_bytes = COALESCE(:downloaded_bytes, downloaded_bytes),
+            total_bytes = COALESCE(:total_bytes, total_bytes)
+        WHERE id = :id
+        """
+        keys = ('id', 'state', 'output_path', 'part_path', 'downloaded_bytes', 'total_bytes')
+        with self.transaction():
+            self.cursor.executemany(query, [{key: state.get(key) for key in keys}
+                                            for state in states])
+
+    def delete_table_videos_by_ids(self, ids: list[int]) -> None:
+        """
+        Удаляет несколько видеороликов из таблицы видеороликов одной транзакцией.
+
+        Args:
+            ids: Список id видеороликов в базе данных.
+        """
+        query = """
+        DELETE FROM table_video
+        WHERE id = ?"""
+        with self.transaction():
+            self.cursor.executemany(query, [(id,) for id in ids])
+
+    def get_archive_entry(self,
+                          resource_name: str,
+                          video_id: str,
+                          format_name: str) -> Optional[dict]:
+        """
+        Возвращает запись архива скачанных видеороликов. Возвращаемый словарь
+        имеет ключи ``resource``, ``video_id``, ``format_name``, ``output_path``,
+        ``total_bytes``, ``finished_time``.
+
+        Args:
+            resource_name: Название источника видеоролика.
+            video_id: id видеоролика в интернет-сервисе (см. ``Downloader.get_archive_id()``).
+            format_name: Название формата скачивания.
+
+        Returns:
+            Словарь записи архива или None, если видеоролик не скачивался.
+        """
+        query = """
+        SELECT * FROM download_archive
+        WHERE resource = ? AND video_id = ? AND format_name = ?"""
+        return self.cursor.execute(query, (resource_name, video_id, format_name)).fetchone()
+
+    def add_archive_entries(self, entries: list[dict]) -> None:
+        """
+        Записывает скачанные видеоролики в архив одной транзакцией.
+        Существующие записи с тем же ключом заменяются.
+
+        Args:
+            entries: Список словарей с ключами ``resource``, ``video_id``, ``format_name``,
+                     ``output_path``, ``total_bytes``, ``finished_time``.
+        """
+        query = """
+        INSERT INTO download_archive (resource, video_id, format_name, output_path, total_bytes, finished_time)
+        VALUES (:resource, :video_id, :format_name, :output_path, :total_bytes, :finished_time)
+        ON CONFLICT (resource, video_id, format_name) DO UPDATE
+        SET output_path = excluded.output_path,
+            total_bytes = excluded.total_bytes,
+            finished_time = excluded.finished_time"""
+        with self.transaction():
+            self.cursor.executemany(query, entries)
 
     def set_setting(self, setting_key: str, value: str) -> None:
         """
@@ -225,7 +530,7 @@ class DbManager:
         WHERE key = ?
         """
         self.cursor.execute(query, (value, setting_key))
-        self.connection.commit()
+        self._commit()
 
     def get_setting(self, setting_key: str) -> str:
         """
@@ -245,8 +550,25 @@ class DbManager:
         result = self.cursor.execute(query, (setting_key,)).fetchone()
         return result['value']
 
+    def close_thread_connection(self) -> None:
+        """
+        Закрывает соединение с базой данных текущего потока (если оно открыто).
+        Вызывается временными потоками (например, рабочими потоками очереди загрузки),
+        чтобы их соединения не оставались открытыми до закрытия приложения.
+        """
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            return
+        with self._connections_lock:
+            self._connections.remove(connection)
+        connection.close()
+        del self._local.connection, self._local.cursor, self._local.transaction_depth
+
     def close(self) -> None:
         """
-        Закрывает соединение с базой данных.
+        Закрывает соединения с базой данных всех потоков.
         """
-        self.connection.close()
+        with self._connections_lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections.clear()
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+
+import sqlite3
+from logging import getLogger
+from typing import Callable
+
+__all__ = ('MIGRATIONS', 'get_schema_version', 'migrate')
+
+_logger = getLogger(__name__)
+
+
+def _add_column(connection: sqlite3.Connection, table: str, column: str, definition: str) -> None:
+    """
+    Добавляет столбец в таблицу, если его еще нет (базы данных, созданные
+    до появления миграций, могут уже содержать столбец).
+    """
+    cursor = connection.cursor()
+    cursor.row_factory = None
+    columns = [row[1] for row in cursor.execute(f'PRAGMA table_info({table})').fetchall()]
+    if column not in columns:
+        connection.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+
+
+def _create_tables(connection: sqlite3.Connection) -> None:
+    connection.execute("""
+    CREATE TABLE IF NOT EXISTS "table_video"
+    (
+        id integer not null
+            constraint video_to_download_pk
+                primary key autoincrement,
+        url text not null,
+        resource text not null,
+        title text,
+        thumbnail_filename text,
+        format_name text,
+        format_string text
+    )""")
+    connection.execute("""
+    CREATE UNIQUE INDEX IF NOT EXISTS video_to_download_id_uindex
+        on table_video (id)""")
+    connection.execute("""
+    CREATE TABLE IF NOT EXISTS settings
+    (
+        key text not null,
+        value text
+    )""")
+    connection.execute("""
+    CREATE UNIQUE INDEX IF NOT EXISTS settings_key_uindex
+        on settings (key)""")
+    connection.execute("""INSERT OR IGNORE INTO settings (key, value) VALUES ('show_is_video_download', '1')""")
+
+
+def _add_max_parallel_downloads_setting(connection: sqlite3.Connection) -> None:
+    connection.execute("""INSERT OR IGNORE INTO settings (key, value) VALUES ('max_parallel_downloads', '3')""")
+
+
+def _add_video_info_columns(connection: sqlite3.Connection) -> None:
+    _add_column(connection, 'table_video', 'video_info', 'text')
+    _add_column(connection, 'table_video', 'video_info_time', 'real')
+
+
+def _add_download_state_columns(connection: sqlite3.Connection) -> None:
+    _add_column(connection, 'table_video', 'output_path', 'text')
+    _add_column(connection, 'table_video', 'part_path', 'text')
+    _add_column(connection, 'table_video', 'downloaded_bytes', 'integer default 0')
+    _add_column(connection, 'table_video', 'total_bytes', 'integer')
+    _add_column(connection, 'table_video', 'state', "text default 'queued'")
+
+
+def _add_output_mode(connection: sqlite3.Connection) -> None:
+    _add_column(connection, 'table_video', 'output_mode', 'text')
+    connection.execute("""INSERT OR IGNORE INTO settings (key, value) VALUES ('output_mode', 'mp4')""")
+
+
+def _add_url_format_unique_index(connection: sqlite3.Connection) -> None:
+    # Повторяющиеся видеоролики (добавленные до появления индекса) удаляются, кроме первого
+    connection.execute("""
+    DELETE FROM table_video
+    WHERE id NOT IN (SELECT MIN(id) FROM table_video GROUP BY url, format_name)""")
+    connection.execute("""
+    CREATE UNIQUE INDEX IF NOT EXISTS table_video_url_format_name_uindex
+        on table_video (url, format_name)""")
+
+
+def _create_download_archive(connection: sqlite3.Connection) -> None:
+    connection.execute("""
+    CREATE TABLE IF NOT EXISTS download_archive
+    (
+        resource text not null,
+        video_id text not null,
+        format_name text not null,
+        output_path text,
+        total_bytes integer,
+        finished_time real
+    )""")
+    connection.execute("""
+    CREATE UNIQUE INDEX IF NOT EXISTS download_archive_uindex
+        on download_archive (resource, video_id, format_name)""")
+    connection.execute("""INSERT OR IGNORE INTO settings (key, value) VALUES ('archive_mode', 'verify')""")
+
+
+def _add_bandwidth_limit_setting(connection: sqlite3.Connection) -> None:
+    connection.execute("""INSERT OR IGNORE INTO settings (key, value) VALUES ('bandwidth_limit', '0')""")
+
+
+# Миграции схемы базы данных вида (версия, описание, функция миграции).
+# Версия схемы хранится в ``PRAGMA user_version``. Новые миграции добавляются
+# только в конец списка, изменять уже выпущенные миграции нельзя.
+MIGRATIONS: list[tuple[int, str, Callable[[sqlite3.Connection], None]]] = [
+    (1, 'create tables', _create_tables),
+    (2, 'add max_parallel_downloads setting', _add_max_parallel_downloads_setting),
+    (3, 'add video info columns', _add_video_info_columns),
+    (4, 'add download state columns', _add_download_state_columns),
+    (5, 'add output mode', _add_output_mode),
+    (6, 'add unique index on url and format_name', _add_url_format_unique_index),
+    (7, 'create download archive', _create_download_archive),
+    (8, 'add bandwidth_limit setting', _add_bandwidth_limit_setting),
+]
+
+
+def get_schema_version(connection: sqlite3.Connection) -> int:
+    """
+    Возвращает версию схемы базы данных.
+
+    Args:
+        connection: Соединение с базой данных.
+
+    Returns:
+        Номер последней примененной миграции (0 - миграции не применялись).
+    """
+    cursor = connection.cursor()
+    cursor.row_factory = None
+    return cursor.execute('PRAGMA user_version').fetchone()[0]
+
+
+def migrate(connection: sqlite3.Connection) -> None:
+    """
+    Применяет к базе данных миграции, версия которых больше версии схемы.
+    Каждая миграция выполняется в отдельной транзакции вместе с изменением версии
+    (транзакция блокирует запись, поэтому одновременно запущенные окно приложения
+    и ``queue_runner.py`` не применят миграцию дважды).
+
+    Args:
+        connection: Соединение с базой данных.
+    """
+    if get_schema_version(connection) >= MIGRATIONS[-1][0]:
+        return
+
+    for migration_version, description, migration in MIGRATIONS:
+        try:
+            connection.execute('BEGIN IMMEDIATE')
+            if get_schema_version(connection) >= migration_version:
+                connection.execute('COMMIT')
+                continue
+
+            _logger.info(f'Applying database migration {migration_version}: {description}')
+            migration(connection)
+            connection.execute(f'PRAGMA user_version = {migration_version}')
+            connection.execute('COMMIT')
+        except Exception:
+            connection.rollback()
+            raise
@@ -0,0 +1,441 @@
+"""
+Бенчмарки приложения без обращения к интернет-сервисам.
+
+Видеоролики, превью и информация о видеороликах (в формате ``extract_info()``
+youtube_dl) отдаются локальным сервером ``devs/fake_server.py``, а скачиваются
+загрузчиком ``Bench`` - наследником ``Youtube``, зарегистрированным в
+``settings.downloaders.DOWNLOADERS``, поэтому выбор форматов, скачивание сегментами,
+превью и формирование выходного файла выполняются кодом приложения.
+
+Измеряются:
+
+* ``formats`` - обработка форматов сохраненных ответов ``extract_info()``
+  из ``devs/fixtures`` (``tools.filter_video_formats()``, создание загрузчика
+  по сохраненной информации, сортировка и ранжирование форматов);
+* ``db`` - задержка операций ``DbManager`` с заполненной таблицей видеороликов;
+* ``overhead`` - время этапов одного видеоролика при последовательной загрузке:
+  получение информации, превью, скачивание и объединение потоков (только если
+  есть ffmpeg, иначе метрики объединения не выводятся);
+* ``queue`` - скорость выполнения всей очереди ``engine.DownloadEngine``.
+
+Результаты записываются в JSON отчет. Если указан предыдущий отчет (``--baseline``),
+метрики времени и скорости сравниваются с ним, и при ухудшении больше чем на
+``--threshold`` скрипт завершается с кодом 1.
+
+Запуск (из корневой папки проекта)::
+
+    python devs/benchmark.py --report benchmark.json
+    python devs/benchmark.py --baseline benchmark.json --rate 5000000 --drop-rate 0.05
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+from collections import defaultdict
+from typing import Callable, Optional
+
+PROJECT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_PATH)
+
+import requests
+
+import settings.settings as s
+from settings.downloaders import DOWNLOADERS
+from db.manager import DbManager
+from downloaders.format_policy import FormatPolicy
+from downloaders.postprocessing import postprocess
+from downloaders.session import get_session
+from downloaders.youtube import Youtube
+from engine import DownloadEngine
+from exceptions import IncorrectLinkError, InternetConnectionError
+from fake_server import FakeMediaServer
+from tools import filter_video_formats
+
+FIXTURES_PATH = os.path.join(PROJECT_PATH, 'devs', 'fixtures')
+
+# Суффиксы метрик, для которых большее значение лучше; остальные метрики времени
+# (_us, _ms, _s) - чем меньше, тем лучше. Метрики без этих суффиксов не сравниваются.
+HIGHER_IS_BETTER_SUFFIXES = ('_per_s', '_mb_s')
+LOWER_IS_BETTER_SUFFIXES = ('_us', '_ms', '_s')
+
+COMBINED_FORMAT_NAME = '360p 30fps'
+MERGED_FORMAT_NAME = '720p 30fps'
+
+
+class Bench(Youtube):
+    """
+    Загрузчик видеороликов с локального сервера ``FakeMediaServer``. URL адрес
+    видеоролика - адрес JSON файла с информацией о видеоролике. Время этапов
+    загрузки записывается в ``Bench.timings``.
+    """
+
+    # Папка превью (превью не должны попадать в кэш превью приложения)
+    thumbnails_path: Optional[str] = None
+    # Время этапов загрузки вида {этап: [секунды, ...]}
+    timings: dict[str, list[float]] = defaultdict(list)
+
+    def __init__(self, url: str, video_info: Optional[dict] = None, video_info_time: Optional[float] = None):
+        began = time.perf_counter()
+        super(Bench, self).__init__(url, video_info, video_info_time)
+        if video_info is None:
+            self.timings['extract'].append(time.perf_counter() - began)
+
+    @classmethod
+    def get_archive_id(cls, url: str) -> Optional[str]:
+        return None
+
+    def download_thumbnail(self, path: Optional[str] = None, is_high_quality: bool = False) -> Optional[str]:
+        began = time.perf_counter()
+        thumbnail_filename = super(Bench, self).download_thumbnail(path or self.thumbnails_path, is_high_quality)
+        self.timings['thumbnail'].append(time.perf_counter() - began)
+        return thumbnail_filename
+
+    def download(self, *args, **kwargs) -> str:
+        began = time.perf_counter()
+        output_path = super(Bench, self).download(*args, **kwargs)
+        self.timings['download'].append(time.perf_counter() - began)
+        return output_path
+
+    def _extract_video_info(self) -> None:
+        try:
+            with get_session().get(self.url, timeout=s.HTTP_TIMEOUT) as response:
+                if response.status_code == 404:
+                    raise IncorrectLinkError()
+                response.raise_for_status()
+                self._video_info = response.json()
+        except requests.RequestException:
+            raise InternetConnectionError()
+
+        self.video_info_time = time.time()
+
+    def _wait_for_request(self) -> float:
+        return 0.0  # запросы к локальному серверу не ограничиваются
+
+
+def generate_media(path: str, duration: int) -> Optional[dict[str, bytes]]:
+    """
+    Создает с помощью ffmpeg настоящие видео (720p) и аудио потоки для измерения
+    объединения потоков.
+
+    Returns:
+        Словарь вида ``{format_id: содержимое_файла}`` или None, если ffmpeg недоступен.
+    """
+    ffmpeg = shutil.which('ffmpeg')
+    if ffmpeg is None:
+        return None
+
+    video_path = os.path.join(path, 'video.mp4')
+    audio_path = os.path.join(path, 'audio.m4a')
+    commands = [
+        [ffmpeg, '-y', '-loglevel', 'error', '-f', 'lavfi', '-i', f'testsrc=duration={duration}:size=1280x720:rate=30',
+         '-pix_fmt', 'yuv420p', '-an', video_path],
+        [ffmpeg, '-y', '-loglevel', 'error', '-f', 'lavfi', '-i', f'sine=frequency=440:duration={duration}',
+         '-c:a', 'aac', audio_path],
+    ]
+    for command in commands:
+        if subprocess.run(command, capture_output=True).returncode != 0:
+            return None
+
+    with open(video_path, 'rb') as video_file, open(audio_path, 'rb') as audio_file:
+        return {'136': video_file.read(), '140': audio_file.read()}
+
+
+def add_video(server: FakeMediaServer, video_id: str, media: dict[str, bytes], duration: int) -> str:
+    """
+    Регистрирует на сервере видеоролик: совмещенный формат (360p), раздельные
+    видео (720p) и аудио потоки, превью и информацию о видеоролике.
+
+    Returns:
+        URL адрес информации о видеоролике (ссылка на видеоролик для загрузчика ``Bench``).
+    """
+    def add_format(format_id: str, ext: str, **properties) -> dict:
+        content = media[format_id]
+        return {'format_id': format_id, 'ext': ext, 'protocol': 'http',
+                'filesize': len(content), 'tbr': len(content) / duration / 125,
+                'url': server.add_file(f'/media/{video_id}/{format_id}.{ext}', content), **properties}
+
+    thumbnail_url = server.add_file(f'/thumbnails/{video_id}.jpg', media['thumbnail'], 'image/jpeg')
+    video_info = {
+        'id': video_id,
+        'title': f'Benchmark video {video_id}',
+        'uploader': 'PyDownloader',
+        'duration': duration,
+        'extractor': 'bench',
+        'thumbnails': [{'url': thumbnail_url}],
+        'thumbnail': thumbnail_url,
+        'formats': [
+            add_format('140', 'm4a', vcodec='none', acodec='mp4a.40.2', abr=128),
+            add_format('18', 'mp4', vcodec='avc1.42001E', acodec='mp4a.40.2', height=360, width=640, fps=30),
+            add_format('136', 'mp4', vcodec='avc1.4d401f', acodec='none', height=720, width=1280, fps=30),
+        ],
+    }
+    return server.add_file(f'/info/{video_id}.json', json.dumps(video_info).encode(), 'application/json')
+
+
+def measure(function: Callable, repeat: int = 5) -> float:
+    """Возвращает лучшее время одного вызова функции в микросекундах"""
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e6
+
+
+def latencies(function: Callable[[int], None], count: int) -> tuple[float, float]:
+    """Вызывает ``function(i)`` ``count`` раз и возвращает медиану и 95-й процентиль задержки в милисекундах"""
+    times = []
+    for i in range(count):
+        began = time.perf_counter()
+        function(i)
+        times.append((time.perf_counter() - began) * 1000)
+    times.sort()
+    return statistics.median(times), times[min(int(len(times) * 0.95), len(times) - 1)]
+
+
+def bench_formats() -> dict:
+    metrics = {}
+
+    for file_name in sorted(os.listdir(FIXTURES_PATH)):
+        if not file_name.endswith('.info.json'):
+            continue
+        with open(os.path.join(FIXTURES_PATH, file_name), encoding='utf-8') as fixture:
+            video_info = json.load(fixture)
+        name = file_name[:-len('.info.json')]
+        formats = video_info['formats']
+        policy = FormatPolicy(max_height=1080, codecs=('vp9', 'h264'))
+        dl = Youtube(video_info['webpage_url'], video_info, time.time())
+
+        def sort_formats():
+            dl._cached_sorted_formats = None
+            dl.get_sorted_formats_names()
+
+        metrics[f'formats.{name}.formats'] = len(formats)
+        metrics[f'formats.{name}.filter_video_formats_us'] = measure(lambda: filter_video_formats(formats))
+        metrics[f'formats.{name}.create_downloader_us'] = measure(lambda: Youtube(dl.url, video_info, time.time()))
+        metrics[f'formats.{name}.sort_formats_us'] = measure(sort_formats)
+        metrics[f'formats.{name}.rank_formats_us'] = measure(lambda: policy.rank(dl))
+
+    return metrics
+
+
+def bench_db(path: str, rows: int, count: int) -> dict:
+    metrics = {}
+    db = DbManager(os.path.join(path, 'db.sqlite'))
+
+    began = time.perf_counter()
+    for start in range(0, rows, 1000):
+        db.add_table_videos([{'url': f'https://example.com/{i}', 'resource_name': 'Bench', 'title': f'Video {i}',
+                              'format_name': COMBINED_FORMAT_NAME, 'format_string': '18'}
+                             for i in range(start, min(start + 1000, rows))])
+    metrics['db.populate_rows_per_s'] = rows / (time.perf_counter() - began)
+
+    ids = db.get_table_videos_ids()
+    operations = {
+        'add_table_video': lambda i: db.add_table_video(f'https://example.com/single/{i}', 'Bench', 'Video',
+                                                        COMBINED_FORMAT_NAME, '18'),
+        'add_table_videos_100': lambda i: db.add_table_videos([{'url': f'https://example.com/batch/{i}/{j}',
+                                                                'resource_name': 'Bench'} for j in range(100)]),
+        'get_table_videos_count': lambda i: db.get_table_videos_count(),
+        'get_table_videos_ids_page': lambda i: db.get_table_videos_ids(ids[i * 37 % len(ids)], s.VIDEOS_TABLE_PAGE_SIZE),
+        'get_table_videos_rows_page': lambda i: db.get_table_videos_rows(ids[:s.VIDEOS_TABLE_PAGE_SIZE]),
+        'has_table_video': lambda i: db.has_table_video(f'https://example.com/{i * 37 % rows}', COMBINED_FORMAT_NAME),
+        'update_download_states_8': lambda i: db.update_table_videos_download_states(
+            [{'id': ids[(i * 8 + j) % len(ids)], 'state': 'downloading', 'downloaded_bytes': i} for j in range(8)]),
+        'add_archive_entries': lambda i: db.add_archive_entries([{
+            'resource': 'Bench', 'video_id': str(i), 'format_name': COMBINED_FORMAT_NAME,
+            'output_path': f'/tmp/{i}.mp4', 'total_bytes': i, 'finished_time': time.time()}]),
+        'get_archive_entry': lambda i: db.get_archive_entry('Bench', str(i), COMBINED_FORMAT_NAME),
+        'get_setting': lambda i: db.get_setting('max_parallel_downloads'),
+    }
+    for name, operation in operations.items():
+        median, p95 = latencies(operation, count)
+        metrics[f'db.{name}.median_ms'] = median
+        metrics[f'db.{name}.p95_ms'] = p95
+
+    db.close()
+    return metrics
+
+
+def bench_overhead(server: FakeMediaServer, urls: list[str], path: str, merge: bool) -> dict:
+    """Последовательная загрузка видеороликов с измерением времени каждого этапа"""
+    Bench.timings.clear()
+    Bench.thumbnails_path = os.path.join(path, 'overhead-thumbnails')
+    merge_times = []
+    format_name = MERGED_FORMAT_NAME if merge else COMBINED_FORMAT_NAME
+
+    for url in urls:
+        dl = Bench(url)
+        dl.download_thumbnail()
+        dl.download(lambda *_: None, path=path, download_format=dl.get_formats_dict()[format_name],
+                    output_mode='mp4' if merge else 'native', postprocessing=False)
+
+        began = time.perf_counter()
+        output_file_path = postprocess(*dl.postprocessing_args)
+        merge_times.append(time.perf_counter() - began)
+        os.remove(output_file_path)
+
+    metrics = {f'overhead.{stage}_ms': statistics.median(times) * 1000 for stage, times in Bench.timings.items()}
+    if merge:
+        metrics['overhead.merge_ms'] = statistics.median(merge_times) * 1000
+    return metrics
+
+
+def bench_queue(server: FakeMediaServer, urls: list[str], path: str, parallel: int) -> dict:
+    Bench.timings.clear()
+    Bench.thumbnails_path = os.path.join(path, 'queue-thumbnails')
+    db = DbManager(os.path.join(path, 'queue.sqlite'))
+    db.add_table_videos([{'url': url, 'resource_name': 'Bench', 'title': url.rsplit('/', 1)[-1],
+                          'format_name': COMBINED_FORMAT_NAME, 'format_string': '18'} for url in urls])
+    save_path = os.path.join(path, 'videos')
+    os.makedirs(save_path)
+
+    progress_events = 0
+
+    def on_event(event: dict) -> None:
+        nonlocal progress_events
+        progress_events += event['event'] == 'progress'
+
+    sent_bytes = server.sent_bytes
+    requests_count = server.requests_count
+    errors_count = server.errors_count
+
+    engine = DownloadEngine(db, db.get_all_table_videos(), save_path,
+                            max_parallel=parallel, output_mode='native',
+                            on_event=on_event, download_thumbnails=True)
+    began = time.perf_counter()
+    engine.run()
+    wall = time.perf_counter() - began
+
+    downloaded_bytes = sum(os.path.getsize(os.path.join(save_path, name)) for name in os.listdir(save_path))
+    metrics = {
+        'queue.videos': len(urls),
+        'queue.finished': len(engine.finished_videos),
+        'queue.failed': len(engine.problem_videos),
+        'queue.wall_s': wall,
+        'queue.videos_per_s': len(engine.finished_videos) / wall,
+        'queue.throughput_mb_s': downloaded_bytes / wall / 1024 ** 2,
+        'queue.progress_events': progress_events,
+        'queue.server_requests': server.requests_count - requests_count,
+        'queue.server_errors': server.errors_count - errors_count,
+        'queue.server_sent_mb': (server.sent_bytes - sent_bytes) / 1024 ** 2,
+    }
+    for stage, times in Bench.timings.items():
+        metrics[f'queue.{stage}_median_ms'] = statistics.median(times) * 1000
+
+    db.close()
+    return metrics
+
+
+def compare(metrics: dict, baseline: dict, threshold: float) -> list[str]:
+    """
+    Сравнивает метрики с предыдущим отчетом.
+
+    Returns:
+        Список описаний ухудшившихся метрик.
+    """
+    regressions = []
+    for name, value in metrics.items():
+        old_value = baseline.get('metrics', {}).get(name)
+        if not isinstance(value, (int, float)) or not isinstance(old_value, (int, float)) or not old_value:
+            continue
+
+        change = (value - old_value) / old_value
+        if name.endswith(HIGHER_IS_BETTER_SUFFIXES):
+            regressed = change < -threshold
+        elif name.endswith(LOWER_IS_BETTER_SUFFIXES):
+            regressed = change > threshold
+        else:
+            continue
+
+        if regressed:
+            regressions.append(f'{name}: {old_value:.4g} -> {value:.4g} ({change:+.0%})')
+    return regressions
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Бенчмарки приложения без обращения к интернет-сервисам')
+    parser.add_argument('--suites', nargs='+', default=['formats', 'db', 'overhead', 'queue'],
+                        choices=('formats', 'db', 'overhead', 'queue'), help='выполняемые бенчмарки')
+    parser.add_argument('--videos', type=int, default=24, help='количество видеороликов в очереди')
+    parser.add_argument('--parallel', type=int, default=3, help='количество одновременных загрузок')
+    parser.add_argument('--size', type=int, default=16 * 1024 * 1024, help='размер видеоролика (в байтах)')
+    parser.add_argument('--rate', type=int, default=0, help='скорость отдачи одного ответа сервером (байт/с), '
+                                                          '0 - без ограничения')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='вероятность ответа 503 на запрос сегмента')
+    parser.add_argument('--drop-rate', type=float, default=0.0, help='вероятность обрыва ответа на запрос сегмента')
+    parser.add_argument('--seed', type=int, default=1, help='начальное значение генератора ошибок сервера')
+    parser.add_argument('--db-rows', type=int, default=20000, help='количество строк таблицы видеороликов')
+    parser.add_argument('--db-ops', type=int, default=200, help='количество повторов каждой операции с базой данных')
+    parser.add_argument('--report', default='benchmark_report.json', help='путь JSON отчета')
+    parser.add_argument('--baseline', help='путь предыдущего JSON отчета для сравнения')
+    parser.add_argument('--threshold', type=float, default=0.2, help='допустимое ухудшение метрик (доля)')
+    parser.add_argument('--verbose', action='store_true', help='выводить логи приложения в stderr')
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str]) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.WARNING if args.verbose else logging.CRITICAL,
+                        format='%(asctime)s - %(levelname)s - %(name)s - %(message)s')
+
+    DOWNLOADERS['Bench'] = Bench
+    duration = 10
+    metrics = {}
+
+    with tempfile.TemporaryDirectory(prefix='pydownloader-benchmark-') as path, \
+            FakeMediaServer(args.rate, args.error_rate, args.drop_rate, args.seed) as server:
+        real_media = generate_media(path, duration)
+        media = {
+            '18': bytes(range(256)) * (args.size // 256),
+            'thumbnail': bytes(range(256)) * 64,
+            **(real_media or {'136': bytes(1024 * 1024), '140': bytes(128 * 1024)}),
+        }
+        urls = [add_video(server, f'bench{i}', media, duration) for i in range(args.videos)]
+
+        suites = {
+            'formats': bench_formats,
+            'db': lambda: bench_db(path, args.db_rows, args.db_ops),
+            'overhead': lambda: bench_overhead(server, urls[:5], path, merge=real_media is not None),
+            'queue': lambda: bench_queue(server, urls, path, args.parallel),
+        }
+        for suite in args.suites:
+            print(f'{suite}...', file=sys.stderr, flush=True)
+            metrics.update(suites[suite]())
+
+    report = {
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'environment': {'python': platform.python_version(), 'platform': platform.platform(),
+                        'cpu_count': os.cpu_count(), 'ffmpeg': shutil.which('ffmpeg') is not None},
+        'parameters': {key: value for key, value in vars(args).items()
+                       if key not in ('report', 'baseline', 'verbose')},
+        'metrics': metrics,
+    }
+
+    for name, value in metrics.items():
+        print(f'{name:50} {value:14.3f}' if isinstance(value, float) else f'{name:50} {value:10}')
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as baseline_file:
+            regressions = compare(metrics, json.load(baseline_file), args.threshold)
+        report['regressions'] = regressions
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+        exit_code = 1 if regressions else 0
+
+    with open(args.report, 'w', encoding='utf-8') as report_file:
+        json.dump(report, report_file, ensure_ascii=False, indent=2)
+    print(f'Отчет: {os.path.abspath(args.report)}')
+
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,139 @@
+"""
+Проверки загрузки файлов без обращения к интернет-сервисам.
+
+Файлы отдаются локальным сервером ``devs/fake_server.py``, а скачиваются
+кодом приложения. Каждая проверка воспроизводит сценарий, в котором загрузка
+раньше завершалась неверным результатом (прерывания, продолжения загрузки
+и т.п.), и возвращает описание ошибки или None, если результат верный.
+
+Запуск (из корневой папки проекта)::
+
+    python devs/check_downloads.py
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from typing import Callable, Optional
+
+PROJECT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_PATH)
+
+import settings.settings as s
+from benchmark import FIXTURES_PATH, generate_media
+from downloaders.postprocessing import get_streams_codecs, postprocess
+from downloaders.segmented import SegmentedDownloader
+from downloaders.youtube import Youtube
+from exceptions import OtherError
+from fake_server import FakeMediaServer
+
+# Размер сегмента в проверках, чтобы файлы были небольшими
+SEGMENT_SIZE = 256 * 1024
+
+
+def check_resume_after_early_stop(work_path: str) -> Optional[str]:
+    """
+    Загрузка остановлена до завершения первого сегмента (незавершенный файл уже
+    выделен на полный размер), после чего продолжена новым загрузчиком.
+    Файл должен быть скачан заново, а не считаться скачанным.
+    """
+    content = os.urandom(SEGMENT_SIZE * 4)
+    path = os.path.join(work_path, 'early_stop.bin')
+
+    with FakeMediaServer(rate=64 * 1024) as server:
+        url = server.add_file('/early_stop.bin', content)
+
+        downloader = SegmentedDownloader(url, path, lambda *_: None)
+        errors = []
+
+        def download():
+            try:
+                downloader.download()
+            except OtherError as err:
+                errors.append(err)
+
+        thread = threading.Thread(target=download)
+        thread.start()
+        time.sleep(0.5)
+        downloader.stop()
+        thread.join()
+
+        if not errors:
+            return 'первая загрузка завершилась до остановки'
+        if os.path.isfile(path):
+            return 'выходной файл создан остановленной загрузкой'
+
+        server.rate = 0
+        SegmentedDownloader(url, path, lambda *_: None).download()
+
+    with open(path, 'rb') as handle:
+        if handle.read() != content:
+            return 'содержимое файла после продолжения загрузки неверно'
+    return None
+
+
+def check_unmerged_streams(work_path: str) -> Optional[str]:
+    """
+    youtube_dl скачал раздельные видео и аудио потоки, но не объединил их
+    (файлы ``{output_path}.f{format_id}.{ext}``). Файлы потоков должны быть найдены,
+    а если есть ffmpeg - объединены ``postprocess()`` при любом порядке файлов.
+    """
+    with open(os.path.join(FIXTURES_PATH, 'youtube_1080p60.info.json'), encoding='utf-8') as fixture:
+        video_info = json.load(fixture)
+    dl = Youtube(video_info['webpage_url'], video_info, time.time())
+    download_formats = dl._get_download_formats('136+140')
+    output_path = os.path.join(work_path, 'unmerged')
+
+    media = generate_media(work_path, 2) if shutil.which('ffmpeg') else None
+    for format_id, ext in (('136', 'mp4'), ('140', 'm4a')):
+        with open(f'{output_path}.f{format_id}.{ext}', 'wb') as handle:
+            handle.write(media[format_id] if media else b'\0' * 1024)
+
+    files_paths, files_codecs = dl._find_downloaded_files(output_path, download_formats)
+    if files_paths != [f'{output_path}.f136.mp4', f'{output_path}.f140.m4a']:
+        return f'найдены файлы {files_paths}'
+    if [codec_type for codec_type, _ in files_codecs[0]] != ['video'] or \
+            [codec_type for codec_type, _ in files_codecs[1]] != ['audio']:
+        return f'кодеки файлов {files_codecs}'
+
+    if media is None:
+        print('     ffmpeg недоступен, объединение потоков не проверяется')
+        return None
+
+    # Аудио поток передается первым
+    output_file_path = postprocess(files_paths[::-1], output_path, 'mp4', files_codecs[::-1])
+    codec_types = sorted(codec_type for codec_type, _ in get_streams_codecs(output_file_path) or [])
+    if codec_types != ['audio', 'video']:
+        return f'потоки выходного файла {codec_types}'
+    return None
+
+
+# Проверки вида {имя: функция(путь_рабочей_папки)}
+CHECKS: dict[str, Callable[[str], Optional[str]]] = {
+    'resume_after_early_stop': check_resume_after_early_stop,
+    'unmerged_streams': check_unmerged_streams,
+}
+
+
+def main() -> int:
+    s.SEGMENT_SIZE = SEGMENT_SIZE
+    failed = False
+
+    for name, check in CHECKS.items():
+        with tempfile.TemporaryDirectory() as work_path:
+            try:
+                error = check(work_path)
+            except Exception as err:
+                error = repr(err)
+        failed |= error is not None
+        print(f'{"OK  " if error is None else "FAIL"} {name}' + (f': {error}' if error else ''))
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""
+Проверка времени импорта модулей, с которых начинается запуск приложения.
+
+Каждый модуль импортируется в отдельном процессе интерпретатора с флагом
+``-X importtime``; учитывается лучшее время из нескольких запусков. Проверка
+не проходит, если время импорта превышает бюджет или если при импорте
+загружаются модули загрузчиков (youtube_dl, requests) - они должны
+импортироваться только при первом обращении к загрузчику.
+
+Запуск (из корневой папки проекта)::
+
+    python devs/check_import_time.py
+"""
+
+import os
+import subprocess
+import sys
+
+# Проверяемые модули вида {имя_модуля: (бюджет_в_милисекундах, запрещенные_модули)}
+IMPORT_BUDGETS = {
+    'window': (300, ('youtube_dl', 'requests')),
+    'queue_runner': (150, ('youtube_dl', 'requests', 'PyQt5')),
+}
+RUNS = 5
+
+PROJECT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure_import(module_name: str) -> tuple[float, set[str]]:
+    """
+    Импортирует модуль в отдельном процессе.
+
+    Args:
+        module_name: Имя модуля.
+
+    Returns:
+        Время импорта в милисекундах и имена всех импортированных модулей.
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module_name}'],
+                            cwd=PROJECT_PATH, capture_output=True, text=True, check=True)
+
+    import_time = 0.0
+    imported_modules = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        name = name.strip()
+        imported_modules.add(name)
+        if name == module_name:
+            import_time = int(cumulative) / 1000
+
+    return import_time, imported_modules
+
+
+def main() -> int:
+    failed = False
+
+    for module_name, (budget, forbidden_modules) in IMPORT_BUDGETS.items():
+        measurements = [measure_import(module_name) for _ in range(RUNS)]
+        import_time = min(t for t, _ in measurements)
+        imported_modules = measurements[0][1]
+
+        loaded = sorted(m for m in forbidden_modules
+                        if any(name == m or name.startswith(f'{m}.') for name in imported_modules))
+        ok = import_time <= budget and not loaded
+        failed |= not ok
+
+        print(f'{"OK  " if ok else "FAIL"} {module_name}: {import_time:.1f} мс (бюджет {budget} мс)'
+              + (f', импортированы {", ".join(loaded)}' if loaded else ''))
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,182 @@
+"""
+Локальный HTTP сервер медиафайлов для бенчмарков (``devs/benchmark.py``) и проверок загрузки
+(``devs/check_downloads.py``).
+
+Сервер отдает файлы из памяти по путям, зарегистрированным методом ``add_file()``,
+поддерживает Range запросы (ответ 206 с заголовком Content-Range), ограничение
+скорости отдачи и случайные ошибки: ответ 503 или обрыв соединения посреди
+тела ответа. Ошибки происходят только в Range запросах сегментов, чтобы
+проверочный запрос ``bytes=0-0`` загрузчика всегда проходил.
+"""
+
+import random
+import re
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from typing import Optional
+
+__all__ = ('FakeMediaServer',)
+
+_RANGE_RE = re.compile(r'bytes=(\d+)-(\d*)$')
+
+
+class FakeMediaServer:
+    """
+    Локальный HTTP сервер медиафайлов, работающий в фоновом потоке.
+
+    Args:
+        rate: Скорость отдачи одного ответа (байт/с). 0 - без ограничения.
+        error_rate: Вероятность ответа 503 на Range запрос сегмента.
+        drop_rate: Вероятность обрыва соединения посреди ответа на Range запрос сегмента.
+        seed: Начальное значение генератора случайных ошибок.
+
+    Attributes:
+        requests_count: Количество обработанных запросов.
+        sent_bytes: Количество отправленных байт тел ответов.
+        errors_count: Количество ответов 503 и оборванных соединений.
+    """
+
+    def __init__(self,
+                 rate: int = 0,
+                 error_rate: float = 0.0,
+                 drop_rate: float = 0.0,
+                 seed: int = 0):
+        self.rate = rate
+        self.error_rate = error_rate
+        self.drop_rate = drop_rate
+        self.requests_count = 0
+        self.sent_bytes = 0
+        self.errors_count = 0
+
+        self._files = {}  # {путь: (содержимое, Content-Type)}
+        self._random = random.Random(seed)
+        self._lock = Lock()
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def add_file(self, path: str, content: bytes, content_type: str = 'application/octet-stream') -> str:
+        """
+        Регистрирует файл.
+
+        Args:
+            path: Путь файла на сервере (начинается с '/').
+            content: Содержимое файла.
+            content_type: Значение заголовка Content-Type.
+
+        Returns:
+            URL адрес файла.
+        """
+        self._files[path] = (content, content_type)
+        return self.base_url + path
+
+    def start(self) -> 'FakeMediaServer':
+        self._thread = Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> 'FakeMediaServer':
+        return self.start()
+
+    def __exit__(self, *_) -> None:
+        self.stop()
+
+    def _pick_error(self) -> Optional[str]:
+        """Возвращает случайную ошибку ответа на Range запрос ('503', 'drop') или None"""
+        with self._lock:
+            value = self._random.random()
+        if value < self.error_rate:
+            return '503'
+        if value < self.error_rate + self.drop_rate:
+            return 'drop'
+        return None
+
+    def _count(self, sent_bytes: int = 0, error: bool = False) -> None:
+        with self._lock:
+            self.sent_bytes += sent_bytes
+            self.errors_count += error
+
+    def _make_handler(self) -> type:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Заголовки и тело ответа отправляются отдельно, без задержки алгоритма Нейгла
+            disable_nagle_algorithm = True
+
+            def log_message(self, *_):
+                pass
+
+            def handle(self):
+                try:
+                    super().handle()
+                except ConnectionError:  # клиент закрыл соединение
+                    pass
+
+            def do_GET(self):
+                with server._lock:
+                    server.requests_count += 1
+
+                path = self.path.split('?', 1)[0]
+                if path not in server._files:
+                    self.send_error(404)
+                    return
+                content, content_type = server._files[path]
+
+                start, end = 0, len(content) - 1
+                range_match = _RANGE_RE.match(self.headers.get('Range', ''))
+                if range_match:
+                    start = int(range_match.group(1))
+                    end = min(int(range_match.group(2) or end), len(content) - 1)
+                    if start > end:
+                        self.send_error(416)
+                        return
+
+                error = server._pick_error() if range_match and end > 0 else None
+                if error == '503':
+                    server._count(error=True)
+                    self.send_response(503)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+
+                self.send_response(206 if range_match else 200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Accept-Ranges', 'bytes')
+                self.send_header('Content-Length', str(end - start + 1))
+                if range_match:
+                    self.send_header('Content-Range', f'bytes {start}-{end}/{len(content)}')
+                self.end_headers()
+
+                body = memoryview(content)[start:end + 1]
+                if error == 'drop':
+                    body = body[:len(body) // 2]
+
+                block_size = 64 * 1024
+                began = time.monotonic()
+                sent = 0
+                try:
+                    while sent < len(body):
+                        self.wfile.write(body[sent:sent + block_size])
+                        sent += len(body[sent:sent + block_size])
+                        if server.rate and (delay := sent / server.rate - (time.monotonic() - began)) > 0:
+                            time.sleep(delay)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                server._count(sent)
+
+                if error == 'drop':
+                    server._count(error=True)
+                    self.close_connection = True
+
+        return Handler
@@ -9,13 +9,21 @@ from PyQt5.QtCore import Qt, QTimer
 import settings.settings as s
 from ui.video_dialog_ui import Ui_VideoDialog
 from ui.video_download_dialog_ui import Ui_VideoDownloadDialog
+from ui.bulk_add_dialog_ui import Ui_BulkAddDialog
 from downloaders.tools import *
 from downloaders.base import Downloader
-from tools import get_thumbnail_path, human_size, show_notification
+from downloaders.format_policy import FormatPolicy
+from db.manager import DbManager
+from downloaders.bandwidth import get_bandwidth_limiter
+from downloaders.ratelimit import get_rate_limiters_stats
+from downloaders.thumbnails import get_thumbnail_cache
+from tools import human_size, human_duration
+from gui_tools import get_thumbnail_pixmap, get_pixmap_cache_stats, show_notification
 from threads import *
+from engine import DownloadEngine
 from exceptions import *
 
-__all__ = ('EditVideoDialog', 'VideoDownloadDialog')
+__all__ = ('EditVideoDialog', 'BulkAddDialog', 'VideoDownloadDialog')
 
 
 def errors_reporting(func):
@@ -51,6 +59,10 @@ class EditVideoDialog(QtWidgets.QDialog, Ui_VideoDialog):
         url: Введенный ранее URL адрес видеоролика (указывается при редактировании).
         resource_name: Выбранный ранее источник видеоролика (указывается при редактировании).
         selected_format_name: Выбранный ранее формат видеоролика (указывается при редактировании).
+        video_info: Сохраненная информация о видеоролике (указывается при редактировании).
+        video_info_time: Время получения сохраненной информации (указывается при редактировании).
+        output_mode: Выбранный ранее режим формирования выходного файла
+                     (None - режим из настроек).
     """
 
     def __init__(self,
@@ -58,12 +70,18 @@ class EditVideoDialog(QtWidgets.QDialog, Ui_VideoDialog):
                  url: Optional[str] = None,
                  resource_name: Optional[str] = None,
                  selected_format_name: Optional[str] = None,
+                 video_info: Optional[str] = None,
+                 video_info_time: Optional[float] = None,
+                 output_mode: Optional[str] = None,
                  parent=None):
         super(EditVideoDialog, self).__init__(parent=parent)
         self.setupUi(self)
 
         self._logger = getLogger(str(self.__class__))
 
+        # Сохраненная информация используется, только если ссылка и источник не изменились
+        self.cached_video_info = (url, resource_name, video_info, video_info_time)
+
         # Настройки окна
         self.setFixedSize(self.width(), self.height())
         self.setWindowTitle(title)
@@ -79,6 +97,11 @@ class EditVideoDialog(QtWidgets.QDialog, Ui_VideoDialog):
         self.resource_box.setEditText('Выберите источник')
         self.resource_box.currentTextChanged.connect(self.resource_changed)
 
+        self.output_mode_box.addItem(s.GLOBAL_OUTPUT_MODE_NAME, None)
+        for mode, mode_name in s.OUTPUT_MODES.items():
+            self.output_mode_box.addItem(mode_name, mode)
+        self.output_mode_box.setCurrentIndex(max(0, self.output_mode_box.findData(output_mode)))
+
         # Настройки QPushButton
         self.check_button.setEnabled(False)
         self.check_button.clicked.connect(self.check_button_clicked)
@@ -88,6 +111,13 @@ class EditVideoDialog(QtWidgets.QDialog, Ui_VideoDialog):
         self.cancel_button.clicked.connect(self.reject)
         self.save_button.clicked.connect(self.accept)
 
+        # Задачи получения информации и превью выполняются в общем пуле рабочих потоков
+        self.video_info_task = None
+        self.tn_task = None
+        self.timeout_timer = QTimer(self)
+        self.timeout_timer.setSingleShot(True)
+        self.timeout_timer.timeout.connect(self.timeout_reached)
+
         # Если в режиме редактирования:
         if url:
             self.selected_format_name = selected_format_name
@@ -134,29 +164,34 @@ class EditVideoDialog(QtWidgets.QDialog, Ui_VideoDialog):
         self.formats_box.setEditable(False)
 
         video_url = self.url_edit.text()
-        dl_class = get_downloader(self.resource_box.currentText())
+        resource_name = self.resource_box.currentText()
+        dl_class = get_downloader(resource_name)
 
-        self.timeout_timer = QTimer(self)
-        self.timeout_timer.timeout.connect(self.timeout_reached)
+        cached_url, cached_resource_name, video_info, video_info_time = self.cached_video_info
+        if (cached_url, cached_resource_name) != (video_url, resource_name):
+            video_info, video_info_time = None, None
+
+        self.cancel_tasks()
         self.timeout_timer.start(s.THREAD_WORKING_TIMEOUT)
 
-        self.video_info_download_thread = VideoInfoDownloadThread(dl_class, video_url)
-        self.video_info_download_thread.error_raised.connect(self.thread_error_raised)
-        self.video_info_download_thread.info_downloaded.connect(self.video_info_downloaded)
-        self.video_info_download_thread.start()
+        self.video_info_task = VideoInfoDownloadTask(dl_class, video_url,
+                                                     video_info=video_info,
+                                                     video_info_time=video_info_time)
+        self.video_info_task.error_raised.connect(self.task_error_raised)
+        self.video_info_task.info_downloaded.connect(self.video_info_downloaded)
+        self.video_info_task.start()
 
     def video_info_downloaded(self, dl: Downloader):
         self.dl = dl
 
-        self.timeout_timer.stop()
         self.timeout_timer.start(s.THREAD_WORKING_TIMEOUT + 7000)
 
-        self.tn_download_thread = ThumbnailDownloadThread(self.dl)
-        self.tn_download_thread.error_raised.connect(self.thread_error_raised)
-        self.tn_download_thread.thumbnail_downloaded.connect(self.thumbnail_downloaded)
-        self.tn_download_thread.start()
+        self.tn_task = ThumbnailDownloadTask(self.dl)
+        self.tn_task.error_raised.connect(self.task_error_raised)
+        self.tn_task.thumbnail_downloaded.connect(self.thumbnail_downloaded)
+        self.tn_task.start()
 
-    def thread_error_raised(self, err: str):
+    def task_error_raised(self, err: str):
         self._logger.error(f'error: {err}')
 
         self.timeout_timer.stop()
@@ -179,7 +214,7 @@ class EditVideoDialog(QtWidgets.QDialog, Ui_VideoDialog):
 
     @errors_reporting
     def thumbnail_downloaded(self, tn_filename: str):
-        print('tn_pixmap path:', tn_filename)
+        self._logger.debug(f'EditVideoDialog: thumbnail: {tn_filename}')
 
         self.timeout_timer.stop()
 
@@ -201,13 +236,12 @@ class EditVideoDialog(QtWidgets.QDialog, Ui_VideoDialog):
                 self.formats_box.setEditText('Выберите формат')
                 self.save_button.setEnabled(False)
 
-        self.thumbnail_filename = tn_filename
+        self.thumbnail_filename = tn_filename or None
 
-        if tn_filename is not None:
-            tn_pixmap = QtGui.QPixmap(get_thumbnail_path(tn_filename))
-            tn_pixmap = tn_pixmap.scaled(self.thumbnail_label.width(),
-                                         self.thumbnail_label.height(),
-                                         Qt.KeepAspectRatio)
+        if tn_filename:
+            tn_pixmap = get_thumbnail_pixmap(tn_filename,
+                                             self.thumbnail_label.width(),
+                                             self.thumbnail_label.height())
             self.thumbnail_label.clear()
             self.thumbnail_label.setAlignment(Qt.AlignRight)
             self.thumbnail_label.setPixmap(tn_pixmap)
@@ -232,20 +266,23 @@ class EditVideoDialog(QtWidgets.QDialog, Ui_VideoDialog):
             self.check_status_label.setStyleSheet('color: rgb(255, 65, 68);')
 
     def timeout_reached(self, *_):
+        # Результаты задач, время выполнения которых превышено, не используются
+        self.cancel_tasks()
+
         self.report_error('Превышено время ожидания. '
                           'Попробуйте еще раз через несколько минут.')
 
-        # Завершение процессов, время выполнения которых превышено.
-        try:
-            if self.video_info_download_thread.isRunning():
-                self.video_info_download_thread.terminate()
-        except (AttributeError, NameError):
-            pass
-        try:
-            if self.tn_download_thread.isRunning():
-                self.tn_download_thread.terminate()
-        except (AttributeError, NameError):
-            pass
+    def cancel_tasks(self) -> None:
+        """Отменяет задачи получения информации о видеоролике и превью"""
+        self.timeout_timer.stop()
+        for task in (self.video_info_task, self.tn_task):
+            if task is not None:
+                task.cancel()
+        self.video_info_task = self.tn_task = None
+
+    def done(self, result: int) -> None:
+        self.cancel_tasks()
+        QtWidgets.QDialog.done(self, result)
 
     def get_inputs(self) -> dict:
         """
@@ -257,7 +294,8 @@ class EditVideoDialog(QtWidgets.QDialog, Ui_VideoDialog):
         ``{'dl': объект_загрузчика,
         'format_name': название_формата,
         'tn_filename': имя_файла_превью,
-        'resource_name': название_источника}``
+        'resource_name': название_источника,
+        'output_mode': режим_выходного_файла_или_None}``
 
         Returns:
             Данные, введенные пользователем и дополнительную информацию о видеоролике
@@ -265,22 +303,179 @@ class EditVideoDialog(QtWidgets.QDialog, Ui_VideoDialog):
         return {'dl': self.dl,
                 'format_name': self.formats_box.currentText(),
                 'tn_filename': self.thumbnail_filename,
-                'resource_name': self.resource_box.currentText()}
+                'resource_name': self.resource_box.currentText(),
+                'output_mode': self.output_mode_box.currentData()}
+
+
+class BulkAddDialog(QtWidgets.QDialog, Ui_BulkAddDialog):
+    """
+    Форма диалогового окна добавления списка видеороликов: нескольких ссылок,
+    плейлиста или канала. Формат каждого видеоролика выбирается автоматически
+    по выбранному качеству.
+
+    Args:
+        title: Заголовок диалогового окна.
+    """
+
+    def __init__(self,
+                 title: str = 'Добавить список видеороликов',
+                 parent=None):
+        super(BulkAddDialog, self).__init__(parent=parent)
+        self.setupUi(self)
+
+        self._logger = getLogger(str(self.__class__))
+
+        # Настройки окна
+        self.setFixedSize(self.width(), self.height())
+        self.setWindowTitle(title)
+        self.setWindowIcon(QtGui.QIcon(s.APP_ICON_PATH))
+
+        # Настройки QComboBox
+        self.resource_box.addItems(get_downloaders_names())
+        self.resource_box.setInsertPolicy(QtWidgets.QComboBox.NoInsert)
+        self.resource_box.setEditText('Выберите источник')
+        self.resource_box.currentTextChanged.connect(self.inputs_changed)
+
+        self.quality_box.addItems(s.BULK_QUALITY_OPTIONS.keys())
+        self.codec_box.addItems(s.BULK_CODEC_OPTIONS.keys())
+
+        self.urls_edit.textChanged.connect(self.inputs_changed)
+
+        # Настройки QPushButton
+        self.add_button.clicked.connect(self.add_button_clicked)
+        self.cancel_button.clicked.connect(self.reject)
+
+        self.bulk_info_task = None
+        self.videos = []
+        self.problem_urls = []
+
+        self._logger.debug('BulkAddDialog: inited')
+
+    def get_urls(self) -> list[str]:
+        """Возвращает список введенных ссылок без повторений"""
+        return list(dict.fromkeys(self.urls_edit.toPlainText().split()))
+
+    def inputs_changed(self, *_):
+        self.add_button.setEnabled(self.resource_box.currentText() in get_downloaders_names()
+                                   and bool(self.get_urls()))
+
+    def add_button_clicked(self, *_):
+        self._logger.debug('BulkAddDialog: add_button is clicked')
+
+        self.add_button.setEnabled(False)
+        self.resource_box.setEnabled(False)
+        self.urls_edit.setReadOnly(True)
+        self.quality_box.setEnabled(False)
+        self.codec_box.setEnabled(False)
+        self.bytes_per_minute_box.setEnabled(False)
+        self.total_bytes_box.setEnabled(False)
+        self.separate_audio_box.setEnabled(False)
+
+        self.status_label.setText('Получение списка видеороликов...')
+        self.progress_bar.setValue(0)
+
+        dl_class = get_downloader(self.resource_box.currentText())
+
+        self.bulk_info_task = BulkInfoDownloadTask(dl_class, self.get_urls())
+        self.bulk_info_task.progress.connect(self.display_progress)
+        self.bulk_info_task.video_failed.connect(self.video_failed)
+        self.bulk_info_task.info_downloaded.connect(self.info_downloaded)
+        self.bulk_info_task.error_raised.connect(self.bulk_error_raised)
+        self.bulk_info_task.start()
+
+    def display_progress(self, done: int, total: int):
+        self.progress_bar.setValue(int(done / total * 100))
+        self.status_label.setText(f'Получение информации: {done}/{total}')
+
+    def video_failed(self, url: str, err: str):
+        self._logger.error(f'BulkAddDialog: {url}: {err}')
+        self.problem_urls.append(url)
+
+    def bulk_error_raised(self, err: str):
+        QtWidgets.QMessageBox.critical(self, 'Ошибка', f'Не удалось получить список видеороликов.\n'
+                                                       f'Код ошибки: {err}',
+                                       defaultButton=QtWidgets.QMessageBox.Ok)
+        QtWidgets.QDialog.reject(self)
+
+    def get_format_policy(self) -> FormatPolicy:
+        """Возвращает правила выбора формата видеороликов, введенные пользователем"""
+        quality = s.BULK_QUALITY_OPTIONS[self.quality_box.currentText()]
+        audio_only = quality == s.AUDIO_FORMAT_PROPERTIES_STRING
+
+        return FormatPolicy(max_height=None if audio_only else quality,
+                            codecs=s.BULK_CODEC_OPTIONS[self.codec_box.currentText()],
+                            max_bytes_per_minute=self.bytes_per_minute_box.value() * 1024 ** 2 or None,
+                            total_bytes_budget=self.total_bytes_box.value() * 1024 ** 3 or None,
+                            separate_audio=self.separate_audio_box.isChecked(),
+                            audio_only=audio_only)
+
+    def info_downloaded(self, downloaders: list[Downloader]):
+        format_names = self.get_format_policy().select_batch(downloaders)
+
+        for dl, format_name in zip(downloaders, format_names):
+            if format_name is None:
+                self.problem_urls.append(dl.url)
+                continue
+
+            self.videos.append({'dl': dl,
+                                'format_name': format_name,
+                                'tn_filename': None,
+                                'resource_name': self.resource_box.currentText()})
+
+        if self.problem_urls:
+            show_notification(self, 'Добавление видеороликов',
+                              f'Не удалось добавить видеороликов: {len(self.problem_urls)}.\n'
+                              'Проверьте правильность ссылок, наличие выбранного качества '
+                              'и ограничения объема.')
+
+        self.accept()
+
+    def get_inputs(self) -> list[dict]:
+        """
+        Возвращает список словарей данных добавляемых видеороликов.
+        Словари имеют тот же вид, что и словарь ``EditVideoDialog.get_inputs()``.
+
+        Returns:
+            Список словарей данных видеороликов.
+        """
+        return self.videos
+
+    def reject(self) -> None:
+        # Уже начатые запросы завершаются в пуле рабочих потоков, их результаты не используются
+        if self.bulk_info_task is not None:
+            self.bulk_info_task.cancel()
+        QtWidgets.QDialog.reject(self)
 
 
 class VideoDownloadDialog(QtWidgets.QDialog, Ui_VideoDownloadDialog):
     """
     Форма диалогового окна загрузки видеороликов.
 
+    Загрузкой управляет очередь ``engine.DownloadEngine``: одновременно выполняется
+    не более ``max_parallel`` загрузок, выходные файлы формируются в пуле процессов,
+    а состояние загрузок периодически сохраняется в базе данных, поэтому прерванные
+    загрузки продолжаются с места остановки при следующем запуске. Окно только
+    отображает события очереди, обрабатывая их по таймеру.
+
     Args:
         videos: Список словарей с информацией о видеороликах, возвращаемый
                 ``db.manager.DbManager.get_all_table_videos()``.
         save_path: Путь до папки сохраниния видеороликов.
+        db: Объект управления базой данных приложения.
+        max_parallel: Максимальное количество одновременно скачиваемых видеороликов.
+        output_mode: Режим формирования выходного файла для видеороликов,
+                     для которых он не указан (см. ``settings.OUTPUT_MODES``).
+        archive_mode: Загрузка видеороликов, которые есть в архиве скачанных
+                      видеороликов (см. ``settings.ARCHIVE_MODES``).
     """
 
     def __init__(self,
                  videos: list[dict],
                  save_path: str,
+                 db: DbManager,
+                 max_parallel: int = 1,
+                 output_mode: str = s.DEFAULT_OUTPUT_MODE,
+                 archive_mode: str = s.DEFAULT_ARCHIVE_MODE,
                  parent=None):
         super(VideoDownloadDialog, self).__init__(parent=parent)
         self.setupUi(self)
@@ -296,65 +491,125 @@ class VideoDownloadDialog(QtWidgets.QDialog, Ui_VideoDownloadDialog):
         self.status_label.setText('Подготовка к скачиванию...')
         self.progress_bar.setValue(0)
 
-        self.videos = videos
         self.videos_amount = len(videos)
-        self.current_video_index = 0
-        self.save_path = save_path
-        self.problem_videos = []
+        self.engine = DownloadEngine(db, videos, save_path,
+                                     max_parallel=max_parallel,
+                                     output_mode=output_mode,
+                                     on_event=self.engine_event,
+                                     download_thumbnails=True,
+                                     archive_mode=archive_mode)
         self.status_params = {
-            'ind': 0,
+            'done': 0,
             'total_videos': len(videos),
-            'downloaded': '0B',
-            'total_bytes': '0B',
-            'status': 'Подготовка к скачиванию...'
+            'active': 0,
+            'processing': 0,
+            'downloaded': human_size(0),
+            'total_bytes': human_size(0),
+            'speed': human_size(0),
         }
 
+        # Настройка таблицы очереди: строка с прогрессом для каждого видеоролика
+        self.queue_rows = {}
+        self.queue_table.setRowCount(len(videos))
+        self.queue_table.setColumnWidth(0, 330)
+        self.queue_table.setColumnWidth(1, 140)
+        self.queue_table.horizontalHeader().setStretchLastSection(True)
+        for row, video in enumerate(videos):
+            self.queue_rows[video['id']] = row
+            self.queue_table.setItem(row, 0, QtWidgets.QTableWidgetItem(video['title']))
+            self.queue_table.setItem(row, 1, QtWidgets.QTableWidgetItem('В очереди'))
+            row_progress_bar = QtWidgets.QProgressBar()
+            row_progress_bar.setValue(0)
+            if video.get('total_bytes') and video.get('downloaded_bytes'):  # прерванная загрузка
+                row_progress_bar.setValue(int(video['downloaded_bytes'] / video['total_bytes'] * 100))
+            self.queue_table.setCellWidget(row, 2, row_progress_bar)
+
+        # События очереди загрузки обрабатываются в потоке интерфейса по таймеру,
+        # прогресс всех загрузок приходит одним событием не чаще PROGRESS_UPDATE_INTERVAL
+        self.engine_timer = QTimer(self)
+        self.engine_timer.timeout.connect(self.engine.process_events)
+        self.engine_timer.start(s.ENGINE_POLL_INTERVAL)
+
         # Настройка QPushButton
-        self.pause_button.hide()  # TODO: доделать приостановку скачивания
+        self.pause_button.clicked.connect(self.pause_clicked)
         self.stop_button.clicked.connect(self.stop_clicked)
 
-        self.download_video()
+        # Общее ограничение скорости скачивания меняется без перезапуска загрузок
+        self.db = db
+        bandwidth_limit = int(db.get_setting('bandwidth_limit'))
+        get_bandwidth_limiter().set_rate(bandwidth_limit)
+        self.bandwidth_limit_box.setValue(bandwidth_limit / 1024 ** 2)
+        self.bandwidth_limit_box.valueChanged.connect(self.bandwidth_limit_changed)
 
-    def download_video(self) -> None:
-        """
-        Начинает загрузку первого видеоролика из списка self.videos.
-        """
-        self.pause_button.setEnabled(False)
+        self.engine.start()
+        for video_id in self.engine.jobs:
+            self.set_row_status(video_id, 'Подготовка...')
+        self.set_dl_status(active=len(self.engine.jobs))
 
-        if not self.videos:
-            self.all_downloaded()
-            return
-
-        self.current_video_index += 1
+        if not videos:
+            QTimer.singleShot(0, self.all_downloaded)
 
-        self.progress_bar.setValue(0)
-        self.set_dl_status(ind=self.current_video_index,
-                           downloaded=human_size(0),
-                           total_bytes=human_size(0),
-                           status='Подготовка к скачиванию...')
+    def engine_event(self, event: dict) -> None:
+        """
+        Отображает событие очереди загрузки (см. документацию к классу ``engine.DownloadEngine``).
 
-        dl_class = get_downloader(self.videos[0]['resource'])
-        video_url = self.videos[0]['url']
+        Args:
+            event: Словарь события.
+        """
+        video_id = event['video_id']
 
-        self.info_download_thread = VideoInfoDownloadThread(dl_class, video_url)
-        self.info_download_thread.error_raised.connect(self.thread_error_raised)
-        self.info_download_thread.info_downloaded.connect(self.video_info_downloaded)
-        self.info_download_thread.start()
+        if event['event'] == 'info':
+            self.video_info_downloaded(video_id, event)
 
-    def video_info_downloaded(self, dl: Downloader):
-        self.current_dl = dl
+        elif event['event'] == 'progress':
+            self.display_download_progress(event)
+            return
 
-        self.tn_download_thread = ThumbnailDownloadThread(self.current_dl)
-        self.tn_download_thread.error_raised.connect(self.thread_error_raised)
-        self.tn_download_thread.thumbnail_downloaded.connect(self.thumbnail_downloaded)
-        self.tn_download_thread.start()
+        elif event['event'] == 'downloaded':
+            self.set_row_status(video_id, 'Обработка...')
+            self.queue_table.cellWidget(self.queue_rows[video_id], 2).setRange(0, 0)
+            self.update_total_progress()
+
+        elif event['event'] == 'finished':
+            self._logger.info(f'Video {video_id} saved: {event["output_file_path"]}')
+            self.set_row_status(video_id, 'Готово')
+            row_progress_bar = self.queue_table.cellWidget(self.queue_rows[video_id], 2)
+            row_progress_bar.setRange(0, 100)
+            row_progress_bar.setValue(100)
+            self.set_dl_status(done=len(self.engine.finished_videos))
+            self.update_total_progress()
+
+        elif event['event'] == 'skipped':
+            self._logger.info(f'Video {video_id} is already downloaded: {event["output_file_path"]}')
+            self.set_row_status(video_id, 'Уже скачано')
+            self.queue_table.cellWidget(self.queue_rows[video_id], 2).setValue(100)
+            self.set_dl_status(done=len(self.engine.finished_videos))
+            self.update_total_progress()
+
+        elif event['event'] == 'error':
+            self.video_failed(video_id, event)
+
+        elif event['event'] in ('paused', 'resumed'):
+            self.download_paused(event['event'] == 'paused')
+
+        elif event['event'] == 'queue_finished':
+            self.all_downloaded()
+            return
 
-    def thumbnail_downloaded(self, tn_filename: str):
-        if tn_filename is not None:
-            tn_pixmap = QtGui.QPixmap(get_thumbnail_path(tn_filename))
-            tn_pixmap = tn_pixmap.scaled(self.thumbnail_label.width(),
-                                         self.thumbnail_label.height(),
-                                         Qt.KeepAspectRatio)
+        # Следующие видеоролики начинаются после обработки события
+        for job_video_id, job in self.engine.jobs.items():
+            if job['dl'] is None:
+                self.set_row_status(job_video_id, 'Подготовка...')
+        if not self.engine.jobs:  # события прогресса больше не приходят
+            self.status_params['speed'] = human_size(0)
+        self.set_dl_status(active=len(self.engine.jobs), processing=len(self.engine.postprocessing_jobs))
+
+    def video_info_downloaded(self, video_id: int, event: dict) -> None:
+        # В верхней панели отображается последний начатый видеоролик
+        if tn_filename := event['thumbnail_filename']:
+            tn_pixmap = get_thumbnail_pixmap(tn_filename,
+                                             self.thumbnail_label.width(),
+                                             self.thumbnail_label.height())
             self.thumbnail_label.clear()
             self.thumbnail_label.setAlignment(Qt.AlignRight)
             self.thumbnail_label.setPixmap(tn_pixmap)
@@ -364,69 +619,129 @@ class VideoDownloadDialog(QtWidgets.QDialog, Ui_VideoDownloadDialog):
             self.thumbnail_label.setAlignment(Qt.AlignHCenter)
             self.thumbnail_label.setText('Превью недоступно')
 
-        title_str = f'<h4 style="font-weight: 500; margin-bottom: 0.3em;">{self.current_dl.title}</h4>' \
-                    f'<span style="font-size: 16px; color: #666">Автор: {self.current_dl.author}</span>'
+        title_str = f'<h4 style="font-weight: 500; margin-bottom: 0.3em;">{event["title"]}</h4>' \
+                    f'<span style="font-size: 16px; color: #666">Автор: {event["author"]}</span>'
         self.video_title_label.setText(title_str)
 
-        self.set_dl_status(status='Идет скачивание...',
-                           total_bytes=human_size(self.current_dl.get_total_bytes(
-                               self.videos[0]['format_name']
-                           )))
+        self.set_row_status(video_id, 'Приостановлено' if self.engine.paused else 'Идет скачивание...')
+        self.update_total_bytes()
+
+    def display_download_progress(self, event: dict) -> None:
+        """
+        Отображает прогресс всех активных загрузок (одно обновление на событие).
+
+        Args:
+            event: Словарь события 'progress'.
+        """
+        for video_id, progress in event['videos'].items():
+            if progress['total_bytes']:
+                self.queue_table.cellWidget(self.queue_rows[video_id], 2).setValue(
+                    int(progress['downloaded_bytes'] / progress['total_bytes'] * 100)
+                )
+
+        total_bytes = event['total_bytes']
+        self.progress_bar.setFormat(s.DOWNLOAD_PROGRESS_TEMPLATE.format(eta=human_duration(event['eta'])))
+        self.status_params.update(speed=human_size(event['speed']),
+                                  total_bytes=human_size(total_bytes) if total_bytes is not None else None)
+        self.update_total_progress()  # строка статуса перерисовывается один раз
+
+    def update_total_progress(self) -> None:
+        """
+        Обновляет общий прогресс скачивания очереди: доля скачанных видеороликов
+        с учетом прогресса активных загрузок.
+        """
+        engine = self.engine
+        done = float(len(engine.finished_videos) + len(engine.problem_videos) + len(engine.postprocessing_jobs))
+        for job in engine.jobs.values():
+            if job['total_bytes']:
+                done += min(job['downloaded_bytes'] / job['total_bytes'], 1.0)
+
+        self.progress_bar.setValue(int(done / max(self.videos_amount, 1) * 100))
+        self.set_dl_status(downloaded=human_size(engine.get_downloaded_bytes()))
 
-        self.video_download_thread = VideoDownloadThread(self.current_dl, self.save_path,
-                                                         self.videos[0]['format_string'])
-        self.video_download_thread.download_progress.connect(self.display_download_progress)
-        self.video_download_thread.error_raised.connect(self.download_video_thread_error)
-        self.video_download_thread.downloaded.connect(self.video_downloaded)
-        self.video_download_thread.start()
+    def update_total_bytes(self) -> None:
+        """
+        Обновляет общий объем начатых загрузок. Если объем хотя бы одной
+        активной загрузки неизвестен, общий объем не отображается.
+        """
+        total_bytes = self.engine.get_total_bytes()
+        self.set_dl_status(total_bytes=human_size(total_bytes) if total_bytes is not None else None)
 
-    def display_download_progress(self, total_bytes: int,
-                                  downloaded_bytes: int, status: str):
-        if status == 'error':
-            self.download_video_thread_error(OtherError(Exception('status "error" while downloading')))
+    def bandwidth_limit_changed(self, value: float) -> None:
+        bandwidth_limit = int(value * 1024 ** 2)
+        get_bandwidth_limiter().set_rate(bandwidth_limit)
+        self.db.set_setting('bandwidth_limit', str(bandwidth_limit))
+
+    def pause_clicked(self) -> None:
+        if self.engine.paused:
+            self.engine.resume()
+        else:
+            self.engine.pause()
 
-        self.progress_bar.setValue(int(downloaded_bytes / total_bytes * 100))
-        self.set_dl_status(downloaded=human_size(downloaded_bytes))
+    def download_paused(self, paused: bool) -> None:
+        """
+        Отображает приостановку или продолжение загрузок.
 
-    def video_downloaded(self):
-        self.videos.pop(0)
-        self.download_video()
+        Args:
+            paused: Загрузки приостановлены.
+        """
+        self.pause_button.setText('Продолжить' if paused else 'Приостановить')
+        for video_id, job in self.engine.jobs.items():
+            if job['dl'] is not None:
+                self.set_row_status(video_id, 'Приостановлено' if paused else 'Идет скачивание...')
+        if paused:
+            self.status_params['speed'] = human_size(0)
 
     def stop_clicked(self):
-        if self.video_download_thread.isRunning():
-            self.video_download_thread.terminate()
+        self.engine_timer.stop()
+        self._logger.info(f'Rate limiters stats: {get_rate_limiters_stats()}')
+        self._logger.info(f'Thumbnails cache stats: {get_thumbnail_cache().get_stats()}, '
+                          f'pixmap cache stats: {get_pixmap_cache_stats()}')
+        self.engine.stop()
         show_notification(self, 'Скачивание завершено',
                           'Скачивание завершено. ' + ('Скачивание некоторых видеороликов прервалось ошибкой.'
-                                                      if self.problem_videos else ''))
+                                                      if self.engine.problem_videos else ''))
         QtWidgets.QDialog.reject(self)
 
     def all_downloaded(self):
         self.stop_clicked()
 
-    def thread_error_raised(self, err: str):
-        self._logger.error(f'error: {err}')
-
-        self.problem_videos.insert(0, self.videos.pop(0))
-
-        if err == 'InternetConnectionError':
-            self.report_error('Не удалось подключиться к ресурсу. '
-                              'Проверьте подключение к интернету и попробуйте снова.')
-
-        elif err == 'IncorrectLinkError':
-            self.report_error('Не удалось получить доступ к видеоролику. '
-                              'Попробуйте снова через несколько минут.')
+    def video_failed(self, video_id: int, event: dict) -> None:
+        """
+        Отображает ошибку загрузки видеоролика.
 
+        Args:
+            video_id: id видеоролика в базе данных.
+            event: Словарь события 'error'.
+        """
+        self._logger.error(f'Error while video {video_id} {event["stage"]}: '
+                           f'{event["error"]}({event["message"]})')
+
+        if event['stage'] == 'postprocessing':
+            status = 'Ошибка обработки'
+            self.queue_table.cellWidget(self.queue_rows[video_id], 2).setRange(0, 100)
+        elif event['stage'] == 'download':
+            status = 'Ошибка скачивания'
+        elif event['error'] == 'InternetConnectionError':
+            status = 'Нет подключения'
+        elif event['error'] == 'IncorrectLinkError':
+            status = 'Нет доступа'
         else:
-            self.report_error('Произошла неизвестная ошибка. '
-                              'Попробуйте снова через несколько минут.\n'
-                              f'Код ошибки: {err}')
+            status = f'Ошибка: {event["error"]}'
 
-        self.download_video()
+        self.set_row_status(video_id, status)
+        self.update_total_bytes()
+        self.update_total_progress()
 
-    def download_video_thread_error(self, err: Exception):
-        self._logger.error(f'Error while video {self.current_video_index} downloading: {err.__repr__()}')
-        self.problem_videos.insert(0, self.videos.pop(0))
-        self.download_video()
+    def set_row_status(self, video_id: int, status: str) -> None:
+        """
+        Обновляет статус видеоролика в таблице очереди.
+
+        Args:
+            video_id: id видеоролика в базе данных.
+            status: Текст статуса.
+        """
+        self.queue_table.item(self.queue_rows[video_id], 1).setText(status)
 
     def set_dl_status(self, **kwargs) -> None:
         """
@@ -434,7 +749,7 @@ class VideoDownloadDialog(QtWidgets.QDialog, Ui_VideoDownloadDialog):
 
         Args:
             **kwargs: Один или несколько параметров скачивания:
-                      ind, total_videos, downloaded, total_bytes, status.
+                      done, total_videos, active, processing, downloaded, total_bytes, speed.
         """
         self.status_params.update(kwargs)
         if self.status_params.get('total_bytes', None) is None:
@@ -454,7 +769,11 @@ class VideoDownloadDialog(QtWidgets.QDialog, Ui_VideoDownloadDialog):
 
     def get_remaining_videos(self) -> list[int]:
         """Возвращает id нескачанных видеороликов"""
-        return list(map(lambda x: x['id'], self.problem_videos))
+        return self.engine.get_remaining_videos()
+
+    def get_finished_videos(self) -> list[int]:
+        """Возвращает id скачанных видеороликов"""
+        return self.engine.get_finished_videos()
 
     def reject(self) -> None:
         self.stop_clicked()
@@ -0,0 +1,83 @@
+import heapq
+import json
+import shutil
+from logging import getLogger
+from typing import Optional
+
+import settings.settings as s
+from downloaders.tools import get_downloader
+
+__all__ = ('estimate_video_bytes', 'check_disk_space')
+
+_logger = getLogger(__name__)
+
+
+def estimate_video_bytes(video: dict) -> Optional[int]:
+    """
+    Возвращает ожидаемый объем видеоролика очереди загрузки: объем, сохраненный
+    при начале загрузки, или объем выбранного формата из сохраненной информации
+    о видеоролике (точный или оценка по битрейту, см. ``Downloader.get_formats_properties()``).
+    Обращений к интернет-сервису нет.
+
+    Args:
+        video: Словарь видеоролика, возвращаемый ``DbManager.get_all_table_videos()``.
+
+    Returns:
+        Объем в байтах или None, если он неизвестен.
+    """
+    if video.get('total_bytes'):
+        return video['total_bytes']
+    if not video.get('video_info') or not video.get('format_name'):
+        return None
+
+    try:
+        dl = get_downloader(video['resource'])(video['url'], json.loads(video['video_info']),
+                                                video.get('video_info_time'))
+        properties = dl.get_formats_properties() or {}
+        if (format_properties := properties.get(video['format_name'])) and format_properties['total_bytes']:
+            return format_properties['total_bytes']
+        return dl.get_total_bytes(video['format_name'])
+    except Exception as err:
+        _logger.warning(f'Size of video {video.get("id")} is not estimated: {err!r}')
+        return None
+
+
+def check_disk_space(videos: list[dict], save_path: str, max_parallel: int = 1) -> dict:
+    """
+    Проверяет, хватит ли свободного места в папке сохранения для всей очереди загрузки.
+
+    Необходимый объем - сумма оставшихся объемов видеороликов (без уже скачанной части
+    прерванных загрузок), объем ``max_parallel`` самых больших видеороликов (при
+    формировании выходного файла файлы потоков и выходной файл существуют одновременно)
+    и запас ``settings.DISK_SPACE_RESERVE``. Видеоролики с неизвестным объемом
+    не учитываются, их количество возвращается отдельно.
+
+    Args:
+        videos: Список словарей видеороликов, возвращаемый ``DbManager.get_all_table_videos()``.
+        save_path: Путь до папки сохранения видеороликов.
+        max_parallel: Максимальное количество одновременно скачиваемых видеороликов.
+
+    Returns:
+        Словарь с ключами ``required_bytes``, ``free_bytes``, ``unknown_videos``
+        (количество видеороликов с неизвестным объемом) и ``enough`` (True,
+        если свободного места достаточно).
+    """
+    remaining_bytes = 0
+    sizes = []
+    unknown_videos = 0
+    for video in videos:
+        if (total_bytes := estimate_video_bytes(video)) is None:
+            unknown_videos += 1
+            continue
+        sizes.append(total_bytes)
+        remaining_bytes += max(total_bytes - (video.get('downloaded_bytes') or 0), 0)
+
+    required_bytes = remaining_bytes + sum(heapq.nlargest(max(max_parallel, 1), sizes)) + s.DISK_SPACE_RESERVE
+    free_bytes = shutil.disk_usage(save_path).free
+
+    return {
+        'required_bytes': required_bytes,
+        'free_bytes': free_bytes,
+        'unknown_videos': unknown_videos,
+        'enough': required_bytes <= free_bytes,
+    }
@@ -0,0 +1,165 @@
+from threading import Lock
+from typing import Optional
+from urllib.parse import urlparse
+
+import settings.settings as s
+from downloaders.ratelimit import TokenBucket
+
+__all__ = ('BandwidthLimiter',
+           'get_bandwidth_limiter',
+           'get_url_host')
+
+
+def get_url_host(url: Optional[str]) -> Optional[str]:
+    """
+    Возвращает имя хоста URL адреса (None, если адрес не указан или не содержит хоста).
+
+    Args:
+        url: URL адрес.
+
+    Returns:
+        Имя хоста в нижнем регистре или None.
+    """
+    return urlparse(url).hostname if url else None
+
+
+class BandwidthLimiter:
+    """
+    Общее ограничение скорости скачивания для всех загрузок процесса.
+
+    Каждый поток, читающий данные из сети (сегменты и потоки видеороликов, превью),
+    после получения блока вызывает ``consume()`` и, если скорость превышена, ждет.
+    Скорость ограничивается общей "корзиной токенов" (``TokenBucket``, токен - байт),
+    а не отдельными задержками каждой загрузки: токены резервируются в порядке
+    обращения, поэтому скорость делится между активными соединениями поровну
+    и не зависит от их количества.
+
+    Дополнительно можно ограничить скорость скачивания с отдельных хостов.
+    Ограничение хоста действует и на его поддомены (ограничение 'googlevideo.com'
+    общее для всех серверов 'rN---sn-....googlevideo.com').
+
+    Ограничения можно менять во время скачивания: новые значения действуют
+    со следующего блока данных, загрузки не перезапускаются.
+
+    Args:
+        rate: Общее ограничение скорости (байт/с). 0 - без ограничения.
+        host_rates: Ограничения скорости хостов вида ``{хост: байт/с}``.
+    """
+
+    def __init__(self,
+                 rate: int = 0,
+                 host_rates: Optional[dict[str, int]] = None):
+        self._lock = Lock()
+        self._bucket = None
+        self._host_buckets = {}  # {хост из ограничений: TokenBucket}
+        self._hosts = {}  # кэш сопоставления хостов URL адресов с хостами ограничений
+
+        self.set_rate(rate)
+        for host, host_rate in (host_rates or {}).items():
+            self.set_host_rate(host, host_rate)
+
+    @property
+    def rate(self) -> int:
+        """Общее ограничение скорости (байт/с), 0 - без ограничения"""
+        bucket = self._bucket
+        return int(bucket.rate) if bucket is not None else 0
+
+    def set_rate(self, rate: int) -> None:
+        """
+        Изменяет общее ограничение скорости.
+
+        Args:
+            rate: Ограничение скорости (байт/с). 0 - без ограничения.
+        """
+        with self._lock:
+            self._bucket = self._update_bucket(self._bucket, rate)
+
+    def set_host_rate(self, host: str, rate: int) -> None:
+        """
+        Изменяет ограничение скорости скачивания с хоста и его поддоменов.
+
+        Args:
+            host: Имя хоста.
+            rate: Ограничение скорости (байт/с). 0 - без ограничения.
+        """
+        host = host.lower()
+        with self._lock:
+            bucket = self._update_bucket(self._host_buckets.get(host), rate)
+            if bucket is None:
+                self._host_buckets.pop(host, None)
+            else:
+                self._host_buckets[host] = bucket
+            self._hosts.clear()
+
+    def get_host_rates(self) -> dict[str, int]:
+        """
+        Возвращает ограничения скорости хостов.
+
+        Returns:
+            Словарь вида ``{хост: байт/с}``.
+        """
+        with self._lock:
+            return {host: int(bucket.rate) for host, bucket in self._host_buckets.items()}
+
+    def consume(self, size: int, host: Optional[str] = None) -> float:
+        """
+        Учитывает скачанный блок данных и ждет, если ограничение скорости превышено.
+        Без ограничений возвращается сразу.
+
+        Args:
+            size: Размер блока (в байтах).
+            host: Хост, с которого скачан блок.
+
+        Returns:
+            Время ожидания в секундах.
+        """
+        waited = 0.0
+        if host is not None and self._host_buckets:
+            if (host_bucket := self._get_host_bucket(host)) is not None:
+                waited += host_bucket.acquire(size)
+        if (bucket := self._bucket) is not None:
+            waited += bucket.acquire(size)
+        return waited
+
+    def _get_host_bucket(self, host: str) -> Optional[TokenBucket]:
+        with self._lock:
+            if host not in self._hosts:
+                self._hosts[host] = next((self._host_buckets[limited_host] for limited_host in self._host_buckets
+                                          if host == limited_host or host.endswith(f'.{limited_host}')), None)
+            return self._hosts[host]
+
+    @staticmethod
+    def _update_bucket(bucket: Optional[TokenBucket], rate: int) -> Optional[TokenBucket]:
+        """Изменяет скорость корзины (создает корзину или возвращает None, если ограничение снято)"""
+        if not rate or rate <= 0:
+            if bucket is not None:
+                bucket.release()  # потоки, ожидающие по прежнему ограничению, продолжают работу
+            return None
+
+        # Вместимость корзины - объем, который можно скачать подряд без ожидания
+        capacity = max(rate * s.BANDWIDTH_BURST_SECONDS, s.DOWNLOAD_BLOCK_SIZE)
+        if bucket is None:
+            return TokenBucket(rate, capacity)
+        bucket.set_rate(rate, capacity)
+        return bucket
+
+
+_bandwidth_limiter: Optional[BandwidthLimiter] = None
+_bandwidth_limiter_lock = Lock()
+
+
+def get_bandwidth_limiter() -> BandwidthLimiter:
+    """
+    Возвращает общее для всего процесса ограничение скорости скачивания.
+    Ограничения скорости хостов берутся из ``settings.HOST_BANDWIDTH_LIMITS``,
+    общее ограничение (параметр настроек 'bandwidth_limit') устанавливается
+    окном загрузки или ``queue_runner.py``.
+
+    Returns:
+        Ограничение скорости скачивания.
+    """
+    global _bandwidth_limiter
+    with _bandwidth_limiter_lock:
+        if _bandwidth_limiter is None:
+            _bandwidth_limiter = BandwidthLimiter(0, s.HOST_BANDWIDTH_LIMITS)
+        return _bandwidth_limiter
@@ -1,7 +1,12 @@
+import time
 from logging import Logger, getLogger
+from threading import Event
 from typing import Optional, Union, Callable
 
 import settings.settings as s
+from downloaders.format_policy import FormatPolicy
+from downloaders.ratelimit import get_rate_limiter
+from tracing import get_tracer
 
 __all__ = ('Downloader',)
 
@@ -12,27 +17,49 @@ class Downloader:
 
     Args:
         url: URL адрес видеоролика.
+        video_info: Сохраненная ранее информация о видеоролике (см. ``get_video_info_json()``).
+                    Если указана, загрузчик создается без обращения к интернет-сервису.
+        video_info_time: Время получения информации о видеоролике (timestamp).
 
     Attributes:
         url: URL адрес видеоролика.
+        video_info_time: Время получения информации о видеоролике (timestamp).
+        part_path: Путь до незавершенного файла (.part) текущей загрузки или None.
+        postprocessing_args: Аргументы функции ``downloaders.postprocessing.postprocess()``
+                             для последней загрузки, выполненной с ``postprocessing=False``.
         _logger: Объект канала логирования. Представлен классом Logger модуля logging.
     """
 
     url: str
     title: str
+    video_info_time: float
+    part_path: Optional[str]
+    postprocessing_args: Optional[tuple]
     _logger: Logger
 
     def __init__(self,
-                 url: str):
+                 url: str,
+                 video_info: Optional[dict] = None,
+                 video_info_time: Optional[float] = None):
         self.url = url
+        self.video_info_time = video_info_time if video_info_time is not None else time.time()
+        self.part_path = None
+        self.postprocessing_args = None
         self._logger = getLogger(str(self.__class__))
         self._logger.debug('class inited')
 
+        # Установлено, если загрузка не приостановлена (см. pause_download())
+        self._resume_event = Event()
+        self._resume_event.set()
+
     def download(self,
                  on_progress: Union[Callable, list[Callable]],
                  path: Optional[str] = None,
                  file_name: Optional[str] = s.OUTPUT_FILE_TEMPLATE,
-                 download_format: Optional[Union[int, str]] = None) -> str:
+                 download_format: Optional[Union[int, str]] = None,
+                 output_path: Optional[str] = None,
+                 output_mode: str = s.DEFAULT_OUTPUT_MODE,
+                 postprocessing: bool = True) -> str:
         """
         Начинает загрузку видеоролика.
 
@@ -40,17 +67,72 @@ class Downloader:
         количество скачанных байт - int и статус скачивания ('downloading',
         'finished' или 'error') - str.
 
+        Если указан ``output_path`` прерванной ранее загрузки, загрузка
+        продолжается с места остановки.
+
         Args:
             on_progress: Функция, вызываемая при получении фрагмента видеоролика.
             path: Путь к папке загрузки файла.
             file_name: Имя выходного файла.
             download_format: Идентификатор формата загружаемого видеороликаю
+            output_path: Путь выходного файла без расширения (см. ``prepare_output_path()``).
+                         Если None - вычисляется по ``path`` и ``file_name``.
+            output_mode: Режим формирования выходного файла (см. ``settings.OUTPUT_MODES``).
+            postprocessing: Если False - выходной файл не формируется, аргументы функции
+                            ``postprocess()`` сохраняются в ``postprocessing_args``
+                            (например, для выполнения в пуле процессов).
 
         Returns:
-            Путь, по которому был загружен видеоролик
+            Путь, по которому был загружен видеоролик (без расширения)
+        """
+        pass
+
+    def stop_download(self) -> None:
+        """
+        Прерывает текущую загрузку, если загрузчик выполняет ее в дополнительных потоках.
         """
         pass
 
+    def pause_download(self) -> None:
+        """
+        Приостанавливает текущую (или следующую) загрузку: потоки загрузки перестают
+        читать данные из сети до вызова ``resume_download()``, скачанные данные
+        сохраняются. Загрузчики, которые не поддерживают приостановку, продолжают загрузку.
+        """
+        self._resume_event.clear()
+
+    def resume_download(self) -> None:
+        """
+        Продолжает приостановленную загрузку с места остановки.
+        """
+        self._resume_event.set()
+
+    @property
+    def paused(self) -> bool:
+        """
+        Загрузка приостановлена
+        """
+        return not self._resume_event.is_set()
+
+    def prepare_output_path(self,
+                            path: str,
+                            file_name: str = s.OUTPUT_FILE_TEMPLATE,
+                            download_format: Optional[Union[int, str]] = None) -> str:
+        """
+        Вычисляет путь выходного файла видеоролика (без расширения), не совпадающий
+        с уже существующими файлами.
+
+        Args:
+            path: Путь к папке загрузки файла.
+            file_name: Шаблон имени выходного файла.
+            download_format: Идентификатор формата загружаемого видеоролика.
+
+        Returns:
+            Путь выходного файла без расширения.
+        """
+        return '/'.join(path.split('/') + [file_name.format(extractor=self.__class__.__name__,
+                                                             title=self.title)])
+
     def get_formats_dict(self) -> Optional[dict[str, str]]:
         """
         Получает возможные форматы скачивания видеоролика.
@@ -72,6 +154,21 @@ class Downloader:
         """
         pass
 
+    def get_formats_properties(self) -> Optional[dict[str, dict]]:
+        """
+        Возвращает свойства форматов видеоролика для автоматического выбора формата
+        (``downloaders.format_policy.FormatPolicy``).
+
+        Возвращает словарь вида ``{название_формата: словарь_свойств}``, словарь свойств
+        содержит ключи ``height``, ``fps``, ``vcodec`` (None, если неизвестны), ``total_bytes``
+        (объем файла или его оценка по битрейту, None - неизвестен), ``separate_audio``
+        (формат "только видео", скачивается вместе с общей аудиодорожкой) и ``audio_only``.
+
+        Returns:
+            Словарь свойств форматов или None, если выбор формата недоступен.
+        """
+        return None
+
     def download_thumbnail(self,
                            path: str = s.THUMBNAILS_DIRECTORY_PATH,
                            is_high_quality: bool = False) -> Optional[str]:
@@ -102,6 +199,111 @@ class Downloader:
         """
         pass
 
+    @classmethod
+    def extract_urls(cls, url: str) -> list[str]:
+        """
+        Возвращает список ссылок на видеоролики по ссылке на видеоролик,
+        плейлист или канал. Для ссылки на один видеоролик возвращается ``[url]``.
+
+        Args:
+            url: URL адрес видеоролика, плейлиста или канала.
+
+        Returns:
+            Список URL адресов видеороликов.
+        """
+        return [url]
+
+    @classmethod
+    def get_archive_id(cls, url: str) -> Optional[str]:
+        """
+        Возвращает id видеоролика в интернет-сервисе по URL адресу без обращения
+        к интернет-сервису (ключ архива скачанных видеороликов) или ``None``,
+        если id невозможно определить по ссылке.
+
+        Args:
+            url: URL адрес видеоролика.
+
+        Returns:
+            id видеоролика или None.
+        """
+        return None
+
+    def get_best_format_name(self, max_height: Optional[int] = None) -> Optional[str]:
+        """
+        Возвращает название формата с наибольшим разрешением, не превышающим
+        ``max_height``, или ``None``, если подходящего формата нет или
+        выбор формата недоступен.
+
+        Args:
+            max_height: Максимальная высота кадра видеоролика. Если None - без ограничения.
+
+        Returns:
+            Название формата или None.
+        """
+        return FormatPolicy(max_height=max_height).select(self)
+
+    def get_video_info_json(self) -> Optional[str]:
+        """
+        Возвращает информацию о видеоролике в виде JSON строки для сохранения
+        в базе данных или ``None``, если загрузчик не поддерживает сохранение информации.
+
+        Returns:
+            JSON строка с информацией о видеоролике или None.
+        """
+        return None
+
+    @classmethod
+    def is_video_info_expired(cls,
+                              video_info: dict,
+                              video_info_time: float) -> bool:
+        """
+        Проверяет, устарела ли сохраненная информация о видеоролике:
+        прошло больше ``settings.VIDEO_INFO_TTL`` секунд с момента ее получения.
+
+        Args:
+            video_info: Сохраненная информация о видеоролике.
+            video_info_time: Время получения информации о видеоролике (timestamp).
+
+        Returns:
+            True, если информацию необходимо получить заново, иначе False.
+        """
+        return time.time() - video_info_time > s.VIDEO_INFO_TTL
+
+    def _wait_for_request(self) -> float:
+        """
+        Ожидает, пока запрос к интернет-сервису загрузчика не превысит
+        ограничение частоты запросов ``settings.REQUEST_RATE_LIMITS``.
+
+        Returns:
+            Время ожидания в секундах.
+        """
+        with get_tracer().span('wait', limiter=self.rate_limit_key):
+            waited = get_rate_limiter(self.rate_limit_key).acquire()
+        if waited:
+            self._logger.debug(f'DL({self.url}): request delayed by rate limiter for {waited:.2f}s')
+        return waited
+
+    @property
+    def rate_limit_key(self) -> str:
+        """
+        Имя интернет-сервиса для ограничителя частоты запросов
+        """
+        return self.__class__.__name__.lower()
+
+    @property
+    def archive_id(self) -> Optional[str]:
+        """
+        id видеоролика в интернет-сервисе (ключ архива скачанных видеороликов), если нет - None
+        """
+        return None
+
+    @property
+    def duration(self) -> Optional[float]:
+        """
+        Длительность видеоролика в секундах, если неизвестна - None
+        """
+        return None
+
     @property
     def title(self) -> str:
         """
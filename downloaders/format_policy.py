@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+
+import heapq
+from logging import getLogger
+from typing import TYPE_CHECKING, Optional, Sequence
+
+import settings.settings as s
+
+if TYPE_CHECKING:
+    from downloaders.base import Downloader
+
+__all__ = ('FormatPolicy', 'get_codec_name')
+
+
+def get_codec_name(vcodec: Optional[str]) -> Optional[str]:
+    """
+    Возвращает название семейства видеокодека (ключ ``settings.VIDEO_CODECS``)
+    по названию кодека youtube_dl (``'avc1.640028'`` -> ``'h264'``).
+
+    Args:
+        vcodec: Название кодека youtube_dl.
+
+    Returns:
+        Название семейства кодека или None, если кодек неизвестен.
+    """
+    if not isinstance(vcodec, str):
+        return None
+
+    vcodec = vcodec.lower()
+    for codec_name, prefixes in s.VIDEO_CODECS.items():
+        if vcodec.startswith(prefixes):
+            return codec_name
+    return None
+
+
+class FormatPolicy:
+    """
+    Правила автоматического выбора формата видеороликов без диалога для каждого видеоролика.
+
+    Форматы видеоролика ранжируются за один проход по словарю
+    ``Downloader.get_formats_properties()``: форматы, нарушающие правила, отбрасываются,
+    остальные упорядочиваются по высоте кадра, предпочтению кодека, FPS и объему.
+    Для списка видеороликов (``select_batch()``) дополнительно соблюдается общий
+    объем: пока сумма объемов выбранных форматов больше ``total_bytes_budget``,
+    самый большой видеоролик понижается до следующего по рангу формата меньшего объема.
+
+    Форматы с неизвестным объемом не проверяются ограничением объема в минуту
+    и не учитываются в общем объеме.
+
+    Args:
+        max_height: Максимальная высота кадра. Если None - без ограничения.
+        codecs: Кодеки видео в порядке предпочтения (ключи ``settings.VIDEO_CODECS``).
+                Форматы с другими кодеками не выбираются. Пустой - любой кодек.
+        max_bytes_per_minute: Максимальный объем одной минуты видеоролика (в байтах).
+                              Если None - без ограничения.
+        total_bytes_budget: Максимальный общий объем списка видеороликов (в байтах).
+                            Если None - без ограничения.
+        separate_audio: Разрешить форматы "только видео", которые скачиваются вместе
+                        с общей для всех форматов аудиодорожкой. Если False - выбираются
+                        только форматы со звуком в том же потоке (без объединения потоков).
+        audio_only: Выбирать только аудио формат.
+    """
+
+    def __init__(self,
+                 max_height: Optional[int] = None,
+                 codecs: Sequence[str] = (),
+                 max_bytes_per_minute: Optional[int] = None,
+                 total_bytes_budget: Optional[int] = None,
+                 separate_audio: bool = True,
+                 audio_only: bool = False):
+        self._logger = getLogger(str(self.__class__))
+
+        self.max_height = max_height
+        self.codecs = tuple(codecs)
+        self.max_bytes_per_minute = max_bytes_per_minute
+        self.total_bytes_budget = total_bytes_budget
+        self.separate_audio = separate_audio
+        self.audio_only = audio_only
+
+    def rank(self, dl: 'Downloader') -> list[tuple[str, Optional[int]]]:
+        """
+        Возвращает подходящие форматы видеоролика от лучшего к худшему.
+
+        Args:
+            dl: Загрузчик видеоролика.
+
+        Returns:
+            Список пар ``(название_формата, объем_в_байтах)``. Пустой, если
+            подходящих форматов нет или выбор формата недоступен.
+        """
+        properties = dl.get_formats_properties()
+        if not properties:
+            return []
+
+        minutes = dl.duration / 60 if dl.duration else None
+
+        ranked = []
+        for format_name, p in properties.items():
+            if p['audio_only'] != self.audio_only:
+                continue
+
+            total_bytes = p['total_bytes']
+            if self.max_bytes_per_minute is not None and total_bytes is not None and minutes \
+                    and total_bytes / minutes > self.max_bytes_per_minute:
+                continue
+
+            if self.audio_only:
+                ranked.append(((0, 0, 0, -(total_bytes or 0)), format_name, total_bytes))
+                continue
+
+            height = p['height'] or 0
+            if self.max_height is not None and (not p['height'] or height > self.max_height):
+                continue
+            if p['separate_audio'] and not self.separate_audio:
+                continue
+
+            codec_rank = 0
+            if self.codecs:
+                codec_name = get_codec_name(p['vcodec'])
+                if codec_name not in self.codecs:
+                    continue
+                codec_rank = len(self.codecs) - self.codecs.index(codec_name)
+
+            ranked.append(((height, codec_rank, p['fps'] or 0, -(total_bytes or 0)), format_name, total_bytes))
+
+        ranked.sort(key=lambda x: x[0], reverse=True)
+        return [(format_name, total_bytes) for _, format_name, total_bytes in ranked]
+
+    def select(self, dl: 'Downloader') -> Optional[str]:
+        """
+        Возвращает название лучшего подходящего формата видеоролика
+        (без учета общего объема) или ``None``, если подходящего формата нет.
+
+        Args:
+            dl: Загрузчик видеоролика.
+
+        Returns:
+            Название формата или None.
+        """
+        ranked = self.rank(dl)
+        return ranked[0][0] if ranked else None
+
+    def select_batch(self, downloaders: Sequence['Downloader']) -> list[Optional[str]]:
+        """
+        Выбирает форматы списка видеороликов с учетом общего объема ``total_bytes_budget``.
+
+        Сначала каждому видеоролику назначается лучший подходящий формат, затем, пока
+        общий объем превышен, самый большой видеоролик понижается до следующего
+        подходящего формата меньшего объема. Если понижать больше некуда, видеоролики,
+        не помещающиеся в оставшийся объем, пропускаются (в порядке списка).
+
+        Args:
+            downloaders: Загрузчики видеороликов.
+
+        Returns:
+            Названия выбранных форматов в порядке ``downloaders``
+            (None - подходящего формата нет или видеоролик не поместился в общий объем).
+        """
+        ranked = [self.rank(dl) for dl in downloaders]
+        choices = [0 if r else None for r in ranked]
+
+        if self.total_bytes_budget is None:
+            return [r[c][0] if c is not None else None for r, c in zip(ranked, choices)]
+
+        def size(i: int) -> int:
+            return ranked[i][choices[i]][1] or 0
+
+        total = sum(size(i) for i, c in enumerate(choices) if c is not None)
+
+        # Понижение формата самых больших видеороликов
+        heap = [(-size(i), i) for i, c in enumerate(choices) if c is not None and size(i)]
+        heapq.heapify(heap)
+        while heap and total > self.total_bytes_budget:
+            _, i = heapq.heappop(heap)
+            current = size(i)
+            for j in range(choices[i] + 1, len(ranked[i])):
+                if (ranked[i][j][1] or 0) < current:
+                    choices[i] = j
+                    total -= current - size(i)
+                    if size(i):
+                        heapq.heappush(heap, (-size(i), i))
+                    break
+
+        # Пропуск видеороликов, которые не помещаются в общий объем даже в худшем формате
+        result = []
+        remaining = self.total_bytes_budget
+        for i, c in enumerate(choices):
+            if c is None:
+                result.append(None)
+            elif size(i) > remaining:
+                self._logger.info(f'FormatPolicy: {downloaders[i].url}: skipped, total bytes budget exceeded')
+                result.append(None)
+            else:
+                remaining -= size(i)
+                result.append(ranked[i][c][0])
+
+        return result
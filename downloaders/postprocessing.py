@@ -0,0 +1,226 @@
+import json
+import multiprocessing
+import os
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from logging import getLogger
+from threading import Lock
+from typing import Optional, TYPE_CHECKING
+
+import settings.settings as s
+from exceptions import OtherError
+
+if TYPE_CHECKING:
+    from youtube_dl.postprocessor.ffmpeg import FFmpegPostProcessor
+
+__all__ = ('get_streams_codecs',
+           'get_format_codecs',
+           'postprocess',
+           'get_postprocessing_pool')
+
+_logger = getLogger(__name__)
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = Lock()
+
+
+@lru_cache(maxsize=None)
+def _get_ffmpeg() -> 'FFmpegPostProcessor':
+    """Возвращает объект youtube_dl, определяющий пути до ffmpeg и ffprobe"""
+    # youtube_dl импортируется при первом вызове: модуль используется окном загрузки
+    # и консольным запуском очереди, которым весь youtube_dl при запуске не нужен
+    from youtube_dl.postprocessor.ffmpeg import FFmpegPostProcessor
+    return FFmpegPostProcessor()
+
+
+def get_format_codecs(format_dict: dict) -> list[tuple[str, str]]:
+    """
+    Возвращает кодеки потоков формата по словарю формата youtube_dl.
+
+    Args:
+        format_dict: Словарь формата.
+
+    Returns:
+        Список вида ``[(тип_потока, кодек), ...]``, например ``[('video', 'avc1')]``.
+    """
+    codecs = []
+    for codec_type, key in (('video', 'vcodec'), ('audio', 'acodec')):
+        codec = format_dict.get(key)
+        if codec and codec != 'none':
+            codecs.append((codec_type, codec.split('.')[0].lower()))
+    return codecs
+
+
+def get_streams_codecs(file_path: str) -> Optional[list[tuple[str, str]]]:
+    """
+    Определяет кодеки видео и аудио потоков файла с помощью ffprobe.
+
+    Args:
+        file_path: Путь до медиафайла.
+
+    Returns:
+        Список вида ``[(тип_потока, кодек), ...]`` или None, если ffprobe недоступен.
+    """
+    ffmpeg = _get_ffmpeg()
+    if not ffmpeg.probe_available or ffmpeg.probe_basename != 'ffprobe':
+        return None
+
+    result = subprocess.run([ffmpeg.probe_executable, '-v', 'error',
+                             '-show_entries', 'stream=codec_type,codec_name',
+                             '-of', 'json', file_path],
+                            capture_output=True)
+    if result.returncode != 0:
+        return None
+
+    streams = json.loads(result.stdout.decode('utf-8', 'ignore') or '{}').get('streams', [])
+    return [(stream['codec_type'], stream['codec_name'].lower())
+            for stream in streams
+            if stream.get('codec_type') in ('video', 'audio') and stream.get('codec_name')]
+
+
+def _get_map_args(files_codecs: list[list[tuple[str, str]]]) -> list[str]:
+    """
+    Возвращает аргументы ``-map`` ffmpeg для объединения раздельных потоков
+    независимо от порядка файлов: видео поток берется из первого файла с видео,
+    аудио поток - из первого файла только с аудио (или из первого файла с аудио).
+    Если кодеки файлов неизвестны, в выходной файл копируются все потоки всех файлов.
+
+    Args:
+        files_codecs: Кодеки потоков каждого файла.
+
+    Returns:
+        Список аргументов ffmpeg.
+    """
+    files_types = [{codec_type for codec_type, _ in file_codecs} for file_codecs in files_codecs]
+    video_index = next((i for i, types in enumerate(files_types) if 'video' in types), None)
+    audio_index = next((i for i, types in enumerate(files_types) if types == {'audio'}),
+                       next((i for i, types in enumerate(files_types) if 'audio' in types), None))
+
+    if video_index is None or audio_index is None:
+        return [arg for index in range(len(files_codecs)) for arg in ('-map', str(index))]
+    return ['-map', f'{video_index}:v:0', '-map', f'{audio_index}:a:0']
+
+
+def postprocess(files_paths: list[str],
+                output_path: str,
+                output_mode: str = s.DEFAULT_OUTPUT_MODE,
+                codecs: Optional[list[list[tuple[str, str]]]] = None) -> str:
+    """
+    Формирует выходной файл видеоролика из скачанных файлов потоков.
+
+    Режимы (см. ``settings.OUTPUT_MODES``):
+
+    * 'native' - исходный контейнер: один файл остается без изменений,
+      раздельные потоки объединяются в mp4, webm или mkv (в зависимости от кодеков);
+    * 'mp4' - если кодеки совместимы с mp4, потоки копируются в контейнер mp4
+      (m4a для аудио) без перекодирования, иначе - как 'native';
+    * 'transcode' - контейнер mp4, несовместимые с ним потоки перекодируются
+      (``settings.TRANSCODE_VIDEO_CODEC``, ``settings.TRANSCODE_AUDIO_CODEC``).
+
+    Функция не использует Qt и объекты загрузчиков, поэтому может
+    выполняться в отдельном процессе.
+
+    Args:
+        files_paths: Пути скачанных файлов (один файл или видео и аудио потоки).
+        output_path: Путь выходного файла без расширения.
+        output_mode: Режим формирования выходного файла.
+        codecs: Кодеки потоков каждого файла, заявленные интернет-сервисом
+                (см. ``get_format_codecs()``). Используются, если ffprobe недоступен.
+
+    Returns:
+        Путь выходного файла.
+    """
+    files_codecs = []
+    for index, file_path in enumerate(files_paths):
+        file_codecs = get_streams_codecs(file_path)
+        if file_codecs is None:
+            file_codecs = codecs[index] if codecs and index < len(codecs) else []
+        files_codecs.append(file_codecs)
+    streams = [stream for file_codecs in files_codecs for stream in file_codecs]
+
+    has_video = any(codec_type == 'video' for codec_type, _ in streams)
+    mp4_ext = 'mp4' if has_video else 'm4a'
+    mp4_compatible = bool(streams) and all(codec in s.MP4_CODECS for _, codec in streams)
+
+    if output_mode not in s.OUTPUT_MODES:
+        output_mode = s.DEFAULT_OUTPUT_MODE
+
+    if output_mode == 'mp4' and not mp4_compatible:
+        _logger.info(f'{output_path}: codecs {streams} are not compatible with mp4, native container is kept')
+        output_mode = 'native'
+
+    transcoded_types = []
+    if output_mode == 'transcode':
+        ext = mp4_ext
+        transcoded_types = [codec_type for codec_type in ('video', 'audio')
+                            if any(t == codec_type and c not in s.MP4_CODECS for t, c in streams)]
+    elif output_mode == 'mp4':
+        ext = mp4_ext
+    elif len(files_paths) == 1:
+        ext = os.path.splitext(files_paths[0])[1][1:]
+    elif mp4_compatible:
+        ext = mp4_ext
+    elif all(codec in s.WEBM_CODECS for _, codec in streams):
+        ext = 'webm'
+    else:
+        ext = 'mkv'
+
+    output_file_path = f'{output_path}.{ext}'
+
+    # Файл уже в нужном контейнере и не требует перекодирования
+    if files_paths == [output_file_path] and not transcoded_types:
+        return output_file_path
+
+    codec_args = ['-c', 'copy']
+    if 'video' in transcoded_types:
+        codec_args += ['-c:v', s.TRANSCODE_VIDEO_CODEC]
+    if 'audio' in transcoded_types:
+        codec_args += ['-c:a', s.TRANSCODE_AUDIO_CODEC]
+
+    ffmpeg = _get_ffmpeg()
+    if not ffmpeg.available or ffmpeg.basename != 'ffmpeg':
+        raise OtherError(Exception('ffmpeg not found'))
+
+    args = [ffmpeg.executable, '-y', '-loglevel', 'error']
+    for file_path in files_paths:
+        args += ['-i', file_path]
+    if len(files_paths) == 1:
+        args += ['-map', '0']
+    else:
+        args += _get_map_args(files_codecs)
+    temp_file_path = f'{output_path}.temp.{ext}'
+    args += codec_args + [temp_file_path]
+
+    _logger.debug(f'{output_path}: ffmpeg {" ".join(args[1:])}')
+
+    result = subprocess.run(args, capture_output=True)
+    if result.returncode != 0:
+        if os.path.isfile(temp_file_path):
+            os.remove(temp_file_path)
+        message = result.stderr.decode('utf-8', 'ignore').strip().splitlines()
+        raise OtherError(Exception(f'ffmpeg error: {message[-1] if message else result.returncode}'))
+
+    os.replace(temp_file_path, output_file_path)
+    for file_path in files_paths:
+        if file_path != output_file_path and os.path.isfile(file_path):
+            os.remove(file_path)
+
+    return output_file_path
+
+
+def get_postprocessing_pool() -> ProcessPoolExecutor:
+    """
+    Возвращает общий для всего приложения пул процессов для ``postprocess()``
+    размера ``settings.POSTPROCESSING_WORKERS`` (по умолчанию - количество ядер
+    процессора). Процессы запускаются методом "spawn", так как основной процесс
+    многопоточный.
+
+    Returns:
+        Пул процессов.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=s.POSTPROCESSING_WORKERS or os.cpu_count() or 1,
+                                        mp_context=multiprocessing.get_context('spawn'))
+        return _pool
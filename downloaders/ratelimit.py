@@ -0,0 +1,177 @@
+import time
+from threading import Condition, Lock
+from typing import Optional
+
+import settings.settings as s
+
+__all__ = ('TokenBucket',
+           'get_rate_limiter',
+           'get_rate_limiters_stats')
+
+
+class TokenBucket:
+    """
+    Потокобезопасный ограничитель частоты по алгоритму "token bucket".
+
+    Запрос задерживается только в том случае, если в корзине недостаточно
+    токенов, то есть если заданная частота запросов будет превышена.
+    Токены резервируются заранее, поэтому одновременно ожидающие потоки
+    получают доступ в порядке очереди. Ожидающие потоки пробуждаются при изменении
+    скорости (``set_rate()``) и пересчитывают время ожидания по новой скорости.
+
+    Args:
+        rate: Скорость пополнения корзины (токенов в секунду).
+        capacity: Вместимость корзины - максимальное количество запросов,
+                  которые можно выполнить подряд без ожидания.
+
+    Attributes:
+        rate: Скорость пополнения корзины (токенов в секунду).
+        capacity: Вместимость корзины.
+        requests: Общее количество запросов.
+        delayed_requests: Количество запросов, которым пришлось ждать.
+        total_wait: Суммарное время ожидания всех запросов (в секундах).
+        max_wait: Максимальное время ожидания одного запроса (в секундах).
+    """
+
+    rate: float
+    capacity: float
+    requests: int
+    delayed_requests: int
+    total_wait: float
+    max_wait: float
+
+    def __init__(self,
+                 rate: float,
+                 capacity: float = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self.requests = 0
+        self.delayed_requests = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+        self._tokens = capacity
+        self._filled = 0.0  # общее количество токенов, добавленных в корзину
+        self._generation = 0  # увеличивается release(), чтобы прервать ожидание
+        self._last_refill = time.monotonic()
+        self._lock = Lock()
+        self._condition = Condition(self._lock)
+
+    def acquire(self, tokens: float = 1) -> float:
+        """
+        Забирает ``tokens`` токенов из корзины, при необходимости ожидая их пополнения.
+
+        Args:
+            tokens: Количество токенов (стоимость запроса).
+
+        Returns:
+            Время ожидания в секундах.
+        """
+        with self._condition:
+            self._refill()
+            self._tokens -= tokens
+            self.requests += 1
+            if self._tokens >= 0:
+                return 0.0
+
+            # Поток ждет, пока корзина не пополнится на размер долга после его запроса
+            target = self._filled - self._tokens
+            generation = self._generation
+            began = time.monotonic()
+            while self._filled < target and generation == self._generation:
+                self._condition.wait((target - self._filled) / self.rate)
+                self._refill()
+            wait = time.monotonic() - began
+
+            self.delayed_requests += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+        return wait
+
+    def set_rate(self,
+                 rate: float,
+                 capacity: Optional[float] = None) -> None:
+        """
+        Изменяет скорость пополнения (и, при необходимости, вместимость) корзины.
+
+        Args:
+            rate: Новая скорость пополнения корзины (токенов в секунду).
+            capacity: Новая вместимость корзины.
+        """
+        with self._condition:
+            self._refill()
+            self.rate = rate
+            if capacity is not None:
+                self.capacity = capacity
+                self._tokens = min(self._tokens, capacity)
+            self._condition.notify_all()
+
+    def release(self) -> None:
+        """
+        Прекращает ожидание всех потоков и списывает долг корзины
+        (например, если ограничение снято и корзина больше не используется).
+        """
+        with self._condition:
+            self._refill()
+            self._tokens = self.capacity
+            self._generation += 1
+            self._condition.notify_all()
+
+    def get_stats(self) -> dict:
+        """
+        Возвращает счетчики ограничителя: ``requests``, ``delayed_requests``,
+        ``total_wait``, ``max_wait``.
+
+        Returns:
+            Словарь счетчиков.
+        """
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'delayed_requests': self.delayed_requests,
+                'total_wait': self.total_wait,
+                'max_wait': self.max_wait,
+            }
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.rate)
+        self._filled += tokens - self._tokens
+        self._tokens = tokens
+        self._last_refill = now
+
+
+_rate_limiters: dict[str, TokenBucket] = {}
+_rate_limiters_lock = Lock()
+
+
+def get_rate_limiter(key: str) -> TokenBucket:
+    """
+    Возвращает общий для всего процесса ограничитель частоты запросов к
+    интернет-сервису ``key`` (имя экстрактора, например, 'youtube').
+    Параметры ограничителя берутся из ``settings.REQUEST_RATE_LIMITS``.
+
+    Args:
+        key: Имя интернет-сервиса.
+
+    Returns:
+        Ограничитель частоты запросов.
+    """
+    with _rate_limiters_lock:
+        if key not in _rate_limiters:
+            rate, capacity = s.REQUEST_RATE_LIMITS.get(key, s.DEFAULT_REQUEST_RATE_LIMIT)
+            _rate_limiters[key] = TokenBucket(rate, capacity)
+        return _rate_limiters[key]
+
+
+def get_rate_limiters_stats() -> dict[str, dict]:
+    """
+    Возвращает счетчики всех созданных ограничителей частоты запросов.
+
+    Returns:
+        Словарь вида ``{имя_сервиса: счетчики}``.
+    """
+    with _rate_limiters_lock:
+        limiters = dict(_rate_limiters)
+    return {key: limiter.get_stats() for key, limiter in limiters.items()}
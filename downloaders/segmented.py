@@ -0,0 +1,323 @@
+import errno
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from logging import getLogger
+from queue import Queue, Empty
+from threading import Lock, Event
+from typing import Callable, Optional
+
+import requests
+
+import settings.settings as s
+from exceptions import OtherError
+from downloaders.bandwidth import get_bandwidth_limiter, get_url_host
+from downloaders.session import get_session
+
+__all__ = ('SegmentedDownloader',)
+
+
+class SegmentedDownloader:
+    """
+    Многопоточный загрузчик файлов по HTTP.
+
+    Файл разбивается на сегменты размером ``settings.SEGMENT_SIZE`` байт,
+    которые скачиваются несколькими соединениями одновременно (HTTP Range
+    запросы) и записываются в заранее выделенный файл ``{path}.part``
+    по своим смещениям (место под весь файл выделяется сразу, если это возможно,
+    см. ``settings.PREALLOCATE_FILES``). Номера скачанных сегментов сохраняются в файле
+    ``{path}.part.segments``, поэтому прерванная загрузка продолжается
+    с места остановки. Если сервер не поддерживает Range запросы,
+    файл скачивается одним соединением. Скорость всех соединений ограничивается
+    общим ограничением скорости скачивания (``downloaders.bandwidth``).
+
+    Загрузку можно приостановить, сбросив событие ``resume_event``: соединения
+    сегментов закрываются после текущего блока, а после установки события
+    сегменты продолжают скачиваться новыми Range запросами с того же смещения.
+    При скачивании одним соединением чтение просто останавливается.
+
+    Функция ``on_progress`` вызывается так же, как в ``Downloader.download()``:
+    с общим количеством байт, количеством скачанных байт и статусом.
+
+    Args:
+        url: URL адрес файла.
+        path: Путь выходного файла.
+        on_progress: Функция, вызываемая при получении фрагмента файла.
+        headers: Заголовки HTTP запросов.
+        connections: Количество одновременных соединений.
+        resume_event: Событие, сброшенное на время приостановки загрузки.
+
+    Attributes:
+        url: URL адрес файла.
+        path: Путь выходного файла.
+        part_path: Путь незавершенного файла.
+        total_bytes: Размер файла в байтах (None, если неизвестен).
+        downloaded_bytes: Количество скачанных байт.
+        stopped: Загрузка прервана вызовом ``stop()``.
+    """
+
+    url: str
+    path: str
+    part_path: str
+    total_bytes: Optional[int]
+    downloaded_bytes: int
+    stopped: bool
+
+    def __init__(self,
+                 url: str,
+                 path: str,
+                 on_progress: Callable,
+                 headers: Optional[dict] = None,
+                 connections: int = s.SEGMENTED_CONNECTIONS,
+                 resume_event: Optional[Event] = None):
+        self.url = url
+        self.path = path
+        self.part_path = f'{path}.part'
+        self.total_bytes = None
+        self.downloaded_bytes = 0
+        self.stopped = False
+
+        self._on_progress = on_progress
+        self._headers = dict(headers or {})
+        self._connections = connections
+        self._segments_path = f'{self.part_path}.segments'
+        self._done_segments = set()
+        self._lock = Lock()
+        self._abort = Event()
+        if resume_event is None:
+            resume_event = Event()
+            resume_event.set()
+        self._resume = resume_event
+        self._fd = None
+        self._bandwidth = get_bandwidth_limiter()
+        self._host = get_url_host(url)
+        self._logger = getLogger(self.__class__.__name__)
+
+    def download(self) -> str:
+        """
+        Скачивает файл.
+
+        Returns:
+            Путь выходного файла.
+        """
+        try:
+            response = self._request(0, 0)
+
+            # Общий размер может быть неизвестен ('bytes 0-0/*'), тогда файл скачивается одним соединением
+            total_bytes = response.headers.get('Content-Range', '').rpartition('/')[2]
+            if response.status_code == 206 and total_bytes.isdigit():
+                response.close()
+                self.total_bytes = int(total_bytes)
+                self._download_segments()
+            else:
+                self._download_single(response)
+        except requests.RequestException as err:
+            raise OtherError(err)
+
+        os.replace(self.part_path, self.path)
+        if os.path.isfile(self._segments_path):
+            os.remove(self._segments_path)
+
+        self._on_progress(self.total_bytes, self.downloaded_bytes, 'finished')
+        return self.path
+
+    def stop(self) -> None:
+        """
+        Прерывает загрузку. Скачанные сегменты сохраняются в незавершенном файле.
+        """
+        self.stopped = True
+        self._abort.set()
+
+    def _download_segments(self) -> None:
+        segments_amount = max(1, -(-self.total_bytes // s.SEGMENT_SIZE))
+        self._load_state()
+
+        segments = Queue()
+        for index in range(segments_amount):
+            if index not in self._done_segments:
+                segments.put(index)
+            else:
+                start, end = self._get_segment_range(index)
+                self.downloaded_bytes += end - start + 1
+
+        self._logger.debug(f'{self.url}: {segments_amount} segments, '
+                           f'{len(self._done_segments)} already downloaded')
+
+        # Состояние записывается до выделения места: файл полного размера
+        # без состояния не должен считаться скачанным при следующем запуске
+        self._save_state()
+        self._fd = os.open(self.part_path, os.O_RDWR | os.O_CREAT | getattr(os, 'O_BINARY', 0))
+        try:
+            self._preallocate()
+
+            workers = min(self._connections, segments.qsize()) or 1
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(self._segments_worker, segments)
+                           for _ in range(workers)]
+                errors = [future.exception() for future in futures]
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+        for err in errors:
+            if err is not None:
+                raise err
+
+        if self._abort.is_set():
+            raise OtherError(Exception('download stopped'))
+
+    def _preallocate(self) -> None:
+        """
+        Устанавливает размер незавершенного файла равным размеру файла. Если доступен
+        ``posix_fallocate``, место на диске выделяется сразу: файл не фрагментируется
+        при записи сегментов, а нехватка места обнаруживается до начала скачивания.
+        Уже скачанные данные не изменяются.
+        """
+        if os.fstat(self._fd).st_size > self.total_bytes:
+            os.ftruncate(self._fd, self.total_bytes)
+
+        if s.PREALLOCATE_FILES and hasattr(os, 'posix_fallocate'):
+            try:
+                os.posix_fallocate(self._fd, 0, self.total_bytes)
+                return
+            except OSError as err:
+                if err.errno == errno.ENOSPC:
+                    raise
+                # Файловая система не поддерживает выделение места
+                self._logger.debug(f'{self.url}: posix_fallocate failed: {err}')
+
+        if os.fstat(self._fd).st_size != self.total_bytes:
+            os.ftruncate(self._fd, self.total_bytes)
+
+    def _segments_worker(self, segments: Queue) -> None:
+        while not self._abort.is_set():
+            try:
+                index = segments.get_nowait()
+            except Empty:
+                return
+
+            try:
+                self._download_segment(index)
+            except Exception:
+                self._abort.set()  # остальные соединения завершаются, скачанные сегменты сохранены
+                raise
+
+    def _download_segment(self, index: int) -> None:
+        start, end = self._get_segment_range(index)
+        offset = start
+        attempt = 0
+
+        while offset <= end:
+            if not self._wait_for_resume():
+                return
+            try:
+                with self._request(offset, end) as response:
+                    if response.status_code != 206:
+                        raise requests.HTTPError(f'HTTP {response.status_code} for range request')
+
+                    for block in response.iter_content(s.DOWNLOAD_BLOCK_SIZE):
+                        if self._abort.is_set():
+                            return
+                        self._write(offset, block)
+                        offset += len(block)
+                        self._add_progress(len(block))
+                        self._bandwidth.consume(len(block), self._host)
+                        if not self._resume.is_set():
+                            break  # приостановка: соединение закрывается, смещение сохранено
+                    else:
+                        if offset <= end:
+                            raise requests.ConnectionError(f'segment {index} was not downloaded completely')
+            except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as err:
+                attempt += 1
+                self._logger.warning(f'{self.url}: segment {index} attempt {attempt} failed: {err}')
+                if attempt > s.SEGMENT_RETRIES:
+                    raise
+
+        with self._lock:
+            self._done_segments.add(index)
+            self._save_state()
+
+    def _download_single(self, response: requests.Response) -> None:
+        """Скачивает файл одним соединением, если сервер не поддерживает Range запросы"""
+        response.close()
+
+        with self._request() as response, open(self.part_path, 'wb') as handle:
+            if not response.ok:
+                raise requests.HTTPError(f'HTTP {response.status_code}')
+
+            if response.headers.get('Content-Length', '').isdigit():
+                self.total_bytes = int(response.headers['Content-Length'])
+
+            for block in response.iter_content(s.DOWNLOAD_BLOCK_SIZE):
+                if not self._wait_for_resume():
+                    raise OtherError(Exception('download stopped'))
+                handle.write(block)
+                self._add_progress(len(block))
+                self._bandwidth.consume(len(block), self._host)
+
+    def _wait_for_resume(self) -> bool:
+        """
+        Ожидает продолжения приостановленной загрузки.
+
+        Returns:
+            False, если загрузка прервана вызовом ``stop()``.
+        """
+        while not self._resume.wait(s.PAUSE_POLL_INTERVAL):
+            if self._abort.is_set():
+                return False
+        return not self._abort.is_set()
+
+    def _request(self,
+                 start: Optional[int] = None,
+                 end: Optional[int] = None) -> requests.Response:
+        headers = dict(self._headers)
+        if start is not None:
+            headers['Range'] = f'bytes={start}-{end}'
+        return get_session().get(self.url, headers=headers, stream=True, timeout=s.HTTP_TIMEOUT)
+
+    def _write(self, offset: int, data: bytes) -> None:
+        if hasattr(os, 'pwrite'):
+            os.pwrite(self._fd, data, offset)
+        else:  # Windows: позиционная запись недоступна
+            with self._lock:
+                os.lseek(self._fd, offset, os.SEEK_SET)
+                os.write(self._fd, data)
+
+    def _add_progress(self, size: int) -> None:
+        with self._lock:
+            self.downloaded_bytes += size
+            downloaded_bytes = self.downloaded_bytes
+        self._on_progress(self.total_bytes, downloaded_bytes, 'downloading')
+
+    def _get_segment_range(self, index: int) -> tuple[int, int]:
+        start = index * s.SEGMENT_SIZE
+        return start, min(start + s.SEGMENT_SIZE, self.total_bytes) - 1
+
+    def _load_state(self) -> None:
+        """
+        Загружает номера скачанных сегментов. Если файла состояния нет, а
+        незавершенный файл меньше полного размера (например, его начало скачано
+        одним соединением), скачанными считаются сегменты, полностью находящиеся
+        в начале файла. Незавершенный файл полного размера без файла состояния
+        мог быть только выделен заранее, поэтому скачивается заново.
+        """
+        try:
+            with open(self._segments_path, encoding='utf-8') as handle:
+                state = json.load(handle)
+            if state.get('total_bytes') == self.total_bytes and state.get('segment_size') == s.SEGMENT_SIZE:
+                self._done_segments = set(state['segments'])
+            return
+        except (OSError, ValueError, KeyError):
+            pass
+
+        if os.path.isfile(self.part_path) and (prefix := os.path.getsize(self.part_path)) < self.total_bytes:
+            self._done_segments = {index for index in range(prefix // s.SEGMENT_SIZE)
+                                   if self._get_segment_range(index)[1] < prefix}
+
+    def _save_state(self) -> None:
+        tmp_path = f'{self._segments_path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as handle:
+            json.dump({'total_bytes': self.total_bytes,
+                       'segment_size': s.SEGMENT_SIZE,
+                       'segments': sorted(self._done_segments)}, handle)
+        os.replace(tmp_path, self._segments_path)
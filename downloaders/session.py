@@ -0,0 +1,125 @@
+from contextlib import contextmanager
+from queue import LifoQueue, Empty
+from threading import Lock
+from typing import Iterator, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from youtube_dl import YoutubeDL
+
+import settings.settings as s
+
+__all__ = ('YoutubeDLPool',
+           'get_ydl_pool',
+           'get_session')
+
+
+class YoutubeDLPool:
+    """
+    Пул объектов ``YoutubeDL``, общий для всех загрузчиков.
+
+    Повторное использование объекта ``YoutubeDL`` избавляет от регистрации
+    экстракторов, создания нового хранилища cookie и повторной загрузки
+    кэшируемых экстракторами данных (например, кода плеера Youtube) для
+    каждого видеоролика. Одновременно объект используется только одним потоком.
+
+    Args:
+        size: Максимальное количество объектов ``YoutubeDL`` в пуле.
+    """
+
+    size: int
+
+    def __init__(self, size: int):
+        self.size = size
+        self._idle = LifoQueue()
+        self._created = 0
+        self._lock = Lock()
+
+    @contextmanager
+    def acquire(self, params: Optional[dict] = None) -> Iterator[YoutubeDL]:
+        """
+        Выдает свободный объект ``YoutubeDL`` с параметрами ``params``
+        на время выполнения блока ``with``. Если свободных объектов нет и
+        пул заполнен, ожидает освобождения объекта.
+
+        Args:
+            params: Параметры ``YoutubeDL`` (как в конструкторе ``YoutubeDL``).
+                    Параметр ``progress_hooks`` тоже поддерживается,
+                    ``postprocessors`` - нет.
+
+        Yields:
+            Объект ``YoutubeDL``.
+        """
+        ydl = self._take()
+        base_params = dict(ydl.params)
+        params = dict(params or {})
+
+        ydl.params.update(params)
+        ydl._progress_hooks = list(params.get('progress_hooks', []))
+        try:
+            yield ydl
+        finally:
+            ydl.params = base_params
+            ydl._progress_hooks = []
+            ydl._download_retcode = 0
+            ydl._num_downloads = 0
+            self._idle.put(ydl)
+
+    def _take(self) -> YoutubeDL:
+        try:
+            return self._idle.get_nowait()
+        except Empty:
+            pass
+
+        with self._lock:
+            create = self._created < self.size
+            if create:
+                self._created += 1
+
+        if create:
+            return YoutubeDL({})
+        return self._idle.get()
+
+
+_ydl_pool: Optional[YoutubeDLPool] = None
+_session: Optional[requests.Session] = None
+_lock = Lock()
+
+
+def get_ydl_pool() -> YoutubeDLPool:
+    """
+    Возвращает общий для всего процесса пул объектов ``YoutubeDL``
+    размера ``settings.YOUTUBE_DL_POOL_SIZE``.
+
+    Returns:
+        Пул объектов ``YoutubeDL``.
+    """
+    global _ydl_pool
+    with _lock:
+        if _ydl_pool is None:
+            _ydl_pool = YoutubeDLPool(s.YOUTUBE_DL_POOL_SIZE)
+        return _ydl_pool
+
+
+def get_session() -> requests.Session:
+    """
+    Возвращает общую для всего процесса HTTP сессию ``requests.Session``.
+
+    Сессия поддерживает постоянные (keep-alive) соединения и хранит пул
+    соединений для каждого хоста (см. ``settings.HTTP_POOL_CONNECTIONS`` и
+    ``settings.HTTP_POOL_MAXSIZE``), поэтому запросы к одному хосту из разных
+    потоков используют уже установленные соединения.
+
+    Returns:
+        HTTP сессия.
+    """
+    global _session
+    with _lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=s.HTTP_POOL_CONNECTIONS,
+                                  pool_maxsize=s.HTTP_POOL_MAXSIZE,
+                                  max_retries=s.HTTP_MAX_RETRIES)
+            _session.mount('http://', adapter)
+            _session.mount('https://', adapter)
+        return _session
@@ -0,0 +1,255 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from logging import getLogger
+from threading import Lock
+from typing import Callable, Iterable, Optional
+
+import settings.settings as s
+
+__all__ = ('ThumbnailCache',
+           'get_thumbnail_cache')
+
+
+class ThumbnailCache:
+    """
+    Дисковый кэш превью видеороликов с ограничением объема и вытеснением
+    давно не использованных файлов (LRU).
+
+    Файлы превью адресуются по содержимому: имя файла - SHA-1 хэш его
+    содержимого, поэтому одинаковые изображения хранятся один раз.
+    Соответствие ключей (например, ``youtube-BaW_jenozKc``) именам файлов
+    хранится в файле индекса ``settings.THUMBNAILS_CACHE_INDEX_FILENAME``.
+    Время последнего использования файла - время его изменения (mtime). Папка
+    кэша читается один раз при создании объекта, дальше порядок использования
+    и размеры файлов хранятся в памяти.
+
+    Файлы, на которые ссылаются сохраненные данные (например, строки таблицы
+    видеороликов в базе данных), не вытесняются, даже если объем кэша превышен
+    (см. ``set_referenced_files_getter()``).
+
+    Args:
+        path: Путь до папки кэша.
+        max_bytes: Максимальный объем кэша в байтах.
+
+    Attributes:
+        path: Путь до папки кэша.
+        max_bytes: Максимальный объем кэша в байтах.
+        hits: Количество найденных в кэше превью.
+        misses: Количество превью, отсутствовавших в кэше.
+        evictions: Количество вытесненных из кэша файлов.
+    """
+
+    path: str
+    max_bytes: int
+    hits: int
+    misses: int
+    evictions: int
+
+    def __init__(self,
+                 path: str = s.THUMBNAILS_DIRECTORY_PATH,
+                 max_bytes: int = s.THUMBNAILS_CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._index_path = os.path.join(path, s.THUMBNAILS_CACHE_INDEX_FILENAME)
+        self._lock = Lock()
+        self._logger = getLogger(self.__class__.__name__)
+
+        # Файлы кэша вида {имя_файла: размер} в порядке использования (последний - недавно использованный)
+        self._files: OrderedDict[str, int] = OrderedDict()
+        self._total_bytes = 0
+        self._get_referenced_files: Optional[Callable[[], Iterable[str]]] = None
+
+        os.makedirs(path, exist_ok=True)
+        self._index = self._load_index()
+        self._scan_files()
+
+    def set_referenced_files_getter(self, getter: Optional[Callable[[], Iterable[str]]]) -> None:
+        """
+        Устанавливает функцию, возвращающую имена файлов превью, которые используются
+        вне кэша и не должны вытесняться. Функция вызывается только при вытеснении.
+
+        Args:
+            getter: Функция без аргументов, возвращающая имена файлов (None - все файлы можно вытеснять).
+        """
+        with self._lock:
+            self._get_referenced_files = getter
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Возвращает имя файла превью по ключу и отмечает файл как использованный.
+
+        Args:
+            key: Ключ превью.
+
+        Returns:
+            Имя файла превью или None, если превью нет в кэше.
+        """
+        with self._lock:
+            filename = self._index.get(key)
+            if filename is not None:
+                try:
+                    os.utime(os.path.join(self.path, filename))
+                except FileNotFoundError:
+                    self._forget_file(filename)
+                    filename = None
+                    del self._index[key]
+                else:
+                    self._touch_file(filename)
+
+            if filename is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+            return filename
+
+    def put(self, key: str, data: bytes, ext: str) -> str:
+        """
+        Сохраняет превью в кэш и, при превышении объема кэша,
+        вытесняет давно не использованные файлы.
+
+        Args:
+            key: Ключ превью.
+            data: Содержимое файла превью.
+            ext: Расширение файла превью.
+
+        Returns:
+            Имя файла превью.
+        """
+        filename = f'{hashlib.sha1(data).hexdigest()}.{ext}'
+        file_path = os.path.join(self.path, filename)
+
+        with self._lock:
+            if filename in self._files and os.path.isfile(file_path):
+                os.utime(file_path)
+            else:
+                tmp_path = f'{file_path}.tmp'
+                with open(tmp_path, 'wb') as handle:
+                    handle.write(data)
+                os.replace(tmp_path, file_path)
+            self._touch_file(filename, len(data))
+
+            self._index[key] = filename
+            self._evict(keep=filename)
+            self._save_index()
+
+        return filename
+
+    def get_stats(self) -> dict:
+        """
+        Возвращает статистику кэша: ``hits``, ``misses``, ``evictions``,
+        ``files``, ``bytes``.
+
+        Returns:
+            Словарь статистики кэша.
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'files': len(self._files),
+                'bytes': self._total_bytes,
+            }
+
+    def _scan_files(self) -> None:
+        """Читает размеры файлов папки кэша и упорядочивает их по времени использования"""
+        files = []
+        with os.scandir(self.path) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name != s.THUMBNAILS_CACHE_INDEX_FILENAME \
+                        and not entry.name.endswith('.tmp'):
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, entry.name, stat.st_size))
+
+        for _, filename, size in sorted(files):
+            self._files[filename] = size
+            self._total_bytes += size
+
+    def _touch_file(self, filename: str, size: Optional[int] = None) -> None:
+        """Отмечает файл как недавно использованный (и добавляет новый файл)"""
+        if filename in self._files:
+            self._files.move_to_end(filename)
+        elif size is not None:
+            self._files[filename] = size
+            self._total_bytes += size
+
+    def _forget_file(self, filename: str) -> None:
+        if (size := self._files.pop(filename, None)) is not None:
+            self._total_bytes -= size
+
+    def _evict(self, keep: Optional[str] = None) -> None:
+        if self._total_bytes <= self.max_bytes:
+            return
+
+        referenced = set()
+        if self._get_referenced_files is not None:
+            try:
+                referenced = set(self._get_referenced_files())
+            except Exception as err:
+                # Без списка используемых файлов вытеснение небезопасно
+                self._logger.error(f'Referenced thumbnails are not loaded, eviction is skipped: {err!r}')
+                return
+
+        removed = set()
+        for filename in list(self._files):
+            if self._total_bytes <= self.max_bytes:
+                break
+            if filename == keep or filename in referenced:
+                continue
+            try:
+                os.remove(os.path.join(self.path, filename))
+            except FileNotFoundError:
+                pass
+            except OSError as err:
+                self._logger.error(f'Failed to remove thumbnail {filename}: {err}')
+                continue
+            self._forget_file(filename)
+            removed.add(filename)
+            self.evictions += 1
+
+        if self._total_bytes > self.max_bytes:
+            self._logger.debug(f'Thumbnails cache exceeds the limit by referenced files: {self._total_bytes} bytes')
+
+        if removed:
+            self._index = {k: v for k, v in self._index.items() if v not in removed}
+            self._logger.debug(f'Thumbnails evicted: {len(removed)}')
+
+    def _load_index(self) -> dict[str, str]:
+        try:
+            with open(self._index_path, encoding='utf-8') as handle:
+                return json.load(handle)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self) -> None:
+        tmp_path = f'{self._index_path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as handle:
+            json.dump(self._index, handle)
+        os.replace(tmp_path, self._index_path)
+
+
+_caches: dict[str, ThumbnailCache] = {}
+_caches_lock = Lock()
+
+
+def get_thumbnail_cache(path: str = s.THUMBNAILS_DIRECTORY_PATH) -> ThumbnailCache:
+    """
+    Возвращает общий для всего процесса кэш превью для папки ``path``.
+
+    Args:
+        path: Путь до папки кэша.
+
+    Returns:
+        Кэш превью.
+    """
+    with _caches_lock:
+        if path not in _caches:
+            _caches[path] = ThumbnailCache(path)
+        return _caches[path]
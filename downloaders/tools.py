@@ -1,3 +1,6 @@
+from importlib import import_module
+from threading import Lock
+
 from settings.downloaders import DOWNLOADERS
 from downloaders.base import Downloader
 
@@ -6,10 +9,15 @@ from typing import Type
 __all__ = ('get_downloaders_names',
            'get_downloader')
 
+# Импортированные классы загрузчиков вида {имя_загрузчика: класс_загрузчика}
+_loaded_downloaders = {}
+_loaded_downloaders_lock = Lock()
+
 
 def get_downloaders_names() -> list[str]:
     """
     Возвращает список имен интернет-платформ для загрузки видеороликов.
+    Модули загрузчиков при этом не импортируются.
 
     Returns:
         Список имен интернет-платформ.
@@ -20,7 +28,7 @@ def get_downloaders_names() -> list[str]:
 def get_downloader(name: str) -> Type[Downloader]:
     """
     Возвращает загрузчик, имя которого передается в качестве
-    аргумента ``name``.
+    аргумента ``name``. Модуль загрузчика импортируется при первом обращении.
 
     Args:
         name: Имя необходимого загрузчика.
@@ -28,4 +36,11 @@ def get_downloader(name: str) -> Type[Downloader]:
     Returns:
         Класс необходимого загрузчика.
     """
-    return DOWNLOADERS[name]
+    with _loaded_downloaders_lock:
+        if name not in _loaded_downloaders:
+            downloader = DOWNLOADERS[name]
+            if isinstance(downloader, str):
+                module_name, class_name = downloader.rsplit('.', 1)
+                downloader = getattr(import_module(module_name), class_name)
+            _loaded_downloaders[name] = downloader
+        return _loaded_downloaders[name]
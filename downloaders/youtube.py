@@ -1,22 +1,41 @@
 # -*- coding: utf-8 -*-
 
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
 from logging import Logger
+from threading import Lock
 from typing import Union, Callable, Optional
+from urllib.parse import urlparse, parse_qs
+import copy
+import gc
+import json
 import os
-from pprint import pprint
+import re
+import time
 
 import requests
 from youtube_dl import YoutubeDL
+from youtube_dl.extractor import get_info_extractor
 from youtube_dl.utils import DownloadError, YoutubeDLError
 
 import settings.settings as s
 from exceptions import *
+from downloaders.bandwidth import get_bandwidth_limiter, get_url_host
 from downloaders.base import Downloader
+from downloaders.postprocessing import get_format_codecs, postprocess
+from downloaders.ratelimit import get_rate_limiter
+from downloaders.segmented import SegmentedDownloader
+from downloaders.session import get_ydl_pool, get_session
+from downloaders.thumbnails import get_thumbnail_cache
 from tools import *
 
 __all__ = ('Youtube',)
 
 
+class _DownloadPaused(Exception):
+    """Загрузка youtube_dl прервана приостановкой (см. ``Downloader.pause_download()``)"""
+
+
 class Youtube(Downloader):
     """
     Загрузчик видеороликов с видеохостинга Youtube при помощи модуля youtube_dl.
@@ -30,9 +49,14 @@ class Youtube(Downloader):
         _formats: Словарь форматов вида ``{название_формата: словарь_формата}``
         _ydl_logger: Класс логирования для youtube_dl.
         _cached_sorted_formats: Кэшированное значение функции get_sorted_formats_names.
+        _segmented_downloaders: Многопоточные загрузчики потоков текущей загрузки.
+        _download_stopped: Текущая загрузка прервана вызовом ``stop_download()``.
 
     Args:
         url: URL адрес видеоролика
+        video_info: Сохраненный ранее словарь ``_video_info``. Если указан,
+                    ``extract_info()`` не вызывается.
+        video_info_time: Время получения словаря ``video_info`` (timestamp).
     """
 
     url: str
@@ -42,28 +66,14 @@ class Youtube(Downloader):
     _cached_sorted_formats: Optional[list[str]]
 
     def __init__(self,
-                 url: str):
-        super(Youtube, self).__init__(url)
+                 url: str,
+                 video_info: Optional[dict] = None,
+                 video_info_time: Optional[float] = None):
+        super(Youtube, self).__init__(url, video_info, video_info_time)
 
         self._cached_sorted_formats = None
-
-        try:
-            with YoutubeDL({}) as dl:
-                self._video_info = dl.extract_info(self.url,
-                                                   download=False)
-                # Ошибка, если ссылка не на этот загрузчик
-                if self._video_info['extractor'] != self.__class__.__name__.lower():
-                    raise IncorrectLinkError()
-
-        except DownloadError as err:
-            err_message = str(err).split(': ')[1]
-
-            if err_message.startswith('Unable to download API page'):
-                raise InternetConnectionError()
-            else:
-                raise IncorrectLinkError()
-
-        self._extract_formats()
+        self._segmented_downloaders = []
+        self._download_stopped = False
 
         logger = self._logger
 
@@ -78,24 +88,27 @@ class Youtube(Downloader):
             def error(self, msg='?'):
                 logger.error(f'DL({url}): ydl err: {msg}')
 
-        self._ydl_logger = YdlLogger
+        self._ydl_logger = YdlLogger()
 
-    def download(self,
-                 on_progress: Callable,
-                 path: Optional[str] = None,
-                 file_name: str = s.OUTPUT_FILE_TEMPLATE,
-                 download_format: Union[int, str] = 'bestaudio+bestvideo/best') -> None:
+        if video_info is not None:
+            self._video_info = video_info
+            self._logger.debug(f'DL({url}): video info restored from cache')
+        else:
+            self._extract_video_info()
 
-        self._logger.info(f'DL({self.url}): starting video downloading (format: {download_format})')
+        self._extract_formats()
 
+    def prepare_output_path(self,
+                            path: str,
+                            file_name: str = s.OUTPUT_FILE_TEMPLATE,
+                            download_format: Union[int, str] = 'bestaudio+bestvideo/best') -> str:
         format_name = {v: k for k, v in self.get_formats_dict().items()}[download_format]
 
-        if path is not None:
-            path = '/'.join(path.split('/') + [file_name])
+        path = '/'.join(path.split('/') + [file_name])
 
         self._logger.debug(f'DL({self.url}): downloading format-path: {path}')
 
-        format_dict = self._formats[format_name]
+        format_dict = dict(self._formats[format_name])
         format_dict.update(self._video_info)
         format_dict['extractor'] = self.__class__.__name__
 
@@ -104,24 +117,64 @@ class Youtube(Downloader):
         file_suffix = ''
         file_index = 0
 
-        while os.path.isfile(f'{path}{file_suffix}.mp4'):  # если файл существует - добавить индекс к названию файла
+        # если файл существует - добавить индекс к названию файла
+        while any(os.path.isfile(f'{path}{file_suffix}.{ext}') for ext in s.OUTPUT_EXTENSIONS):
             file_index += 1
             file_suffix = f'({file_index})'  # например: youtube-название_видео(индекс)
 
-        path += file_suffix
+        return path + file_suffix
+
+    def download(self,
+                 on_progress: Callable,
+                 path: Optional[str] = None,
+                 file_name: str = s.OUTPUT_FILE_TEMPLATE,
+                 download_format: Union[int, str] = 'bestaudio+bestvideo/best',
+                 output_path: Optional[str] = None,
+                 output_mode: str = s.DEFAULT_OUTPUT_MODE,
+                 postprocessing: bool = True) -> str:
 
-        self._logger.info(f'Downloading file: {path}')
+        self._logger.info(f'DL({self.url}): starting video downloading (format: {download_format})')
+
+        self._download_stopped = False
+        format_name = {v: k for k, v in self.get_formats_dict().items()}[download_format]
+
+        if output_path is None:
+            output_path = self.prepare_output_path(path, file_name, download_format)
+
+        self._logger.info(f'Downloading file: {output_path}')
+
+        format_total_bytes = self.get_total_bytes(format_name)
+        download_formats = self._get_download_formats(download_format)
+        bandwidth = get_bandwidth_limiter()
+        host = get_url_host(download_formats[0].get('url')) if download_formats else None
 
         def hook(d: dict):
+            # Загрузка youtube_dl прерывается исключением из обработчика прогресса
+            if self._download_stopped:
+                raise OtherError(Exception('download stopped'))
+
+            # Приостановленная загрузка youtube_dl прерывается (соединение закрывается)
+            # и после продолжения начинается заново с места остановки (continuedl)
+            if self.paused and d['status'] == 'downloading':
+                raise _DownloadPaused()
+
             if d['status'] not in ('downloading', 'finished'):
                 on_progress(0, 0, 'error')
                 return
 
-            if not (total_bytes := self.get_total_bytes(format_name)):
+            if not (total_bytes := format_total_bytes):
                 if not (total_bytes := d.get('total_bytes')):
                     total_bytes = d.get('total_bytes_estimate')
 
             downloaded_bytes = d.get('downloaded_bytes', 0)
+            if d.get('tmpfilename') != self.part_path:  # начат следующий поток раздельного формата
+                hook.consumed_bytes = downloaded_bytes
+            self.part_path = d.get('tmpfilename')
+
+            # Обработчик вызывается после каждого прочитанного блока, поэтому
+            # ожидание в нем ограничивает скорость чтения youtube_dl
+            bandwidth.consume(max(downloaded_bytes - hook.consumed_bytes, 0), host)
+            hook.consumed_bytes = downloaded_bytes
 
             if d['status'] == 'finished':
                 hook.last_bytes = downloaded_bytes
@@ -137,26 +190,312 @@ class Youtube(Downloader):
 
         hook.last_bytes = 0
         hook.plus_bytes = 0
+        hook.consumed_bytes = 0
+
+        files_paths = None
+
+        # Медиафайлы по прямым ссылкам (в том числе видео и аудио потоки
+        # раздельных форматов) скачиваются одновременно несколькими соединениями
+        if (direct_formats := self._get_direct_http_formats(download_format)) is not None:
+            self._wait_for_request()
+            try:
+                files_paths = self._download_streams(direct_formats, output_path, format_name, on_progress)
+                files_codecs = [get_format_codecs(f) for f in direct_formats]
+            except OtherError as err:
+                if self._download_stopped:
+                    raise
+                self._logger.warning(f'DL({self.url}): segmented download failed ({err}), '
+                                     f'retrying with youtube_dl')
+                self._remove_streams_parts()
+
+        if files_paths is None:
+            # Незавершенные файлы (.part) с тем же путем продолжают скачиваться с места остановки.
+            # Раздельные потоки объединяются youtube_dl без перекодирования (в mp4 или mkv).
+            opts = {
+                'format': str(download_format),
+                'outtmpl': f'{output_path}.%(ext)s',
+                'continuedl': True,
+                'progress_hooks': [hook],
+                # Блоки постоянного размера, чтобы ограничение скорости не задерживало чтение надолго
+                'buffersize': s.DOWNLOAD_BLOCK_SIZE,
+                'noresizebuffer': True,
+                'logger': self._ydl_logger,
+            }
+
+            self._wait_for_request()
+
+            try:
+                with get_ydl_pool().acquire(opts) as dl:
+                    while True:
+                        try:
+                            # Загрузка по сохраненной информации, без повторного extract_info()
+                            try:
+                                dl.process_ie_result(
+                                    YoutubeDL.filter_requested_info(copy.deepcopy(self._video_info)),
+                                    download=True
+                                )
+                            except DownloadError:
+                                self._logger.warning(f'DL({self.url}): download by video info failed, '
+                                                     f'retrying with url')
+                                dl.download([self.url])
+                            break
+                        except _DownloadPaused:
+                            self._logger.info(f'DL({self.url}): youtube_dl download is paused')
+                        self._wait_for_resume()
+            except YoutubeDLError as err:
+                raise OtherError(err)
+
+            files_paths, files_codecs = self._find_downloaded_files(output_path, download_formats)
+
+        self.part_path = None
+        self.postprocessing_args = (files_paths, output_path, output_mode, files_codecs)
+
+        if not postprocessing:
+            self._logger.info(f'DL({self.url}): video streams downloaded, postprocessing is deferred')
+            return output_path
+
+        # Контейнер выходного файла меняется без перекодирования, если это возможно
+        output_file_path = postprocess(*self.postprocessing_args)
+
+        self._logger.info(f'DL({self.url}): video downloaded: {output_file_path}')
+
+        return output_path
+
+    def _wait_for_resume(self) -> None:
+        """
+        Ожидает продолжения загрузки youtube_dl, прерванной приостановкой.
+        Незавершенный файл прерванной загрузки youtube_dl закрывает только
+        при удалении объектов загрузки, поэтому перед продолжением они удаляются
+        сборщиком мусора: иначе несохраненный буфер файла записался бы после продолжения.
+        """
+        gc.collect()
+        while not self._resume_event.wait(s.PAUSE_POLL_INTERVAL):
+            if self._download_stopped:
+                break
+        if self._download_stopped:
+            raise OtherError(Exception('download stopped'))
+
+    def stop_download(self) -> None:
+        self._download_stopped = True
+        for segmented_downloader in self._segmented_downloaders:
+            segmented_downloader.stop()
+
+    def _get_download_formats(self, download_format: Union[int, str]) -> list[dict]:
+        """
+        Возвращает словари форматов, из которых состоит ``download_format``
+        (например, ``'137+140'``).
+
+        Args:
+            download_format: Идентификатор формата.
+
+        Returns:
+            Список словарей форматов (неизвестные идентификаторы пропускаются).
+        """
+        formats = {str(f.get('format_id')): f
+                   for f in self._video_info.get('formats', [self._video_info])}
+
+        return [formats[format_id]
+                for format_id in str(download_format).split('+')
+                if format_id in formats]
+
+    def _get_direct_http_formats(self, download_format: Union[int, str]) -> Optional[list[dict]]:
+        """
+        Возвращает словари форматов, из которых состоит ``download_format``,
+        если все они - медиафайлы, доступные по прямой HTTP ссылке (без фрагментов).
+
+        Args:
+            download_format: Идентификатор формата.
+
+        Returns:
+            Список словарей форматов или None.
+        """
+        direct_formats = self._get_download_formats(download_format)
 
-        opts = {
-            'format': str(download_format),
-            'outtmpl': path,
-            'progress_hooks': [hook],
-            'logger': self._ydl_logger,
-            'recode_video': 'mp4',
-        }
+        if len(direct_formats) != len(str(download_format).split('+')):
+            return None
+
+        for f in direct_formats:
+            if f.get('protocol') not in ('http', 'https') or not f.get('url') or not f.get('ext'):
+                return None
+
+        return direct_formats
+
+    def _download_streams(self,
+                          formats: list[dict],
+                          output_path: str,
+                          format_name: str,
+                          on_progress: Callable) -> list[str]:
+        """
+        Одновременно скачивает медиафайлы форматов ``formats`` с помощью
+        ``SegmentedDownloader``. Один медиафайл сохраняется в ``{output_path}.{ext}``,
+        потоки раздельного формата - в ``{output_path}.f{format_id}.{ext}``
+        (как в youtube_dl). Прогресс скачивания потоков суммируется.
+
+        Returns:
+            Список путей скачанных файлов.
+        """
+        if len(formats) == 1:
+            files_paths = [f"{output_path}.{formats[0]['ext']}"]
+        else:
+            files_paths = [f"{output_path}.f{f['format_id']}.{f['ext']}" for f in formats]
+
+        progress = {}
+        progress_lock = Lock()
+        format_total_bytes = self.get_total_bytes(format_name)
+
+        def stream_progress(index: int, total_bytes: Optional[int], downloaded_bytes: int, status: str):
+            with progress_lock:
+                progress[index] = (total_bytes, downloaded_bytes)
+                totals = [t for t, _ in progress.values()]
+                downloaded_bytes = sum(b for _, b in progress.values())
+
+            if len(totals) == len(formats) and all(totals):
+                total_bytes = sum(totals)
+            else:
+                total_bytes = format_total_bytes
+
+            on_progress(total_bytes, downloaded_bytes, 'downloading')
+
+        self._segmented_downloaders = [SegmentedDownloader(f['url'],
+                                                           file_path,
+                                                           partial(stream_progress, index),
+                                                           headers=f.get('http_headers'),
+                                                           resume_event=self._resume_event)
+                                       for index, (f, file_path) in enumerate(zip(formats, files_paths))]
+        self.part_path = self._segmented_downloaders[0].part_path
+
+        with ThreadPoolExecutor(max_workers=len(self._segmented_downloaders)) as executor:
+            futures = [executor.submit(d.download) for d in self._segmented_downloaders]
+            for future in as_completed(futures):
+                if future.exception() is not None:
+                    for segmented_downloader in self._segmented_downloaders:
+                        segmented_downloader.stop()
+
+        for future in futures:
+            if (err := future.exception()) is not None:
+                raise err
+
+        return files_paths
+
+    def _find_downloaded_files(self,
+                               output_path: str,
+                               download_formats: list[dict]) -> tuple[list[str], list[list[tuple[str, str]]]]:
+        """
+        Возвращает пути файлов, скачанных youtube_dl по шаблону ``{output_path}.%(ext)s``,
+        и кодеки их потоков. Обычно это один файл (совмещенный формат или потоки,
+        объединенные youtube_dl). Если youtube_dl не объединил раздельные потоки
+        (например, ffmpeg ему недоступен), остаются файлы потоков
+        ``{output_path}.f{format_id}.{ext}``, они объединяются ``postprocess()``.
+
+        Args:
+            output_path: Путь выходного файла без расширения.
+            download_formats: Словари скачанных форматов (см. ``_get_download_formats()``).
+
+        Returns:
+            Список путей файлов и список кодеков потоков каждого файла.
+        """
+        directory, name = os.path.split(output_path)
+        files_names = os.listdir(directory or '.')
+
+        pattern = re.compile(re.escape(name) + r'\.\w+')
+        if merged_files_names := [file_name for file_name in files_names if pattern.fullmatch(file_name)]:
+            file_path = max((os.path.join(directory, file_name) for file_name in merged_files_names),
+                            key=os.path.getmtime)
+            return [file_path], [[codec for f in download_formats for codec in get_format_codecs(f)]]
+
+        streams_pattern = re.compile(re.escape(name) + r'\.f([\w-]+)\.\w+')
+        streams_paths = {match.group(1): os.path.join(directory, file_name)
+                         for file_name in files_names
+                         if (match := streams_pattern.fullmatch(file_name))}
+
+        if not download_formats or any(str(f.get('format_id')) not in streams_paths for f in download_formats):
+            raise OtherError(FileNotFoundError(f'{output_path}: downloaded file not found'))
 
-        if download_format != self._formats.get(s.AUDIO_FORMAT_PROPERTIES_STRING,
-                                                {'format_id': None})['format_id']:
-            opts['merge_output_format'] = 'mp4'
+        self._logger.info(f'DL({self.url}): video streams are not merged by youtube_dl')
+        return ([streams_paths[str(f.get('format_id'))] for f in download_formats],
+                [get_format_codecs(f) for f in download_formats])
 
+    def _remove_streams_parts(self) -> None:
+        """
+        Удаляет незавершенные файлы многопоточной загрузки: youtube_dl продолжает
+        загрузку .part файла с его конца, а эти файлы заранее выделены целиком.
+        """
+        for segmented_downloader in self._segmented_downloaders:
+            part_path = segmented_downloader.part_path
+            for file_path in (part_path, f'{part_path}.segments'):
+                if os.path.isfile(file_path):
+                    os.remove(file_path)
+        self._segmented_downloaders = []
+        self.part_path = None
+
+    @classmethod
+    def extract_urls(cls, url: str) -> list[str]:
+        with get_ydl_pool().acquire({'extract_flat': 'in_playlist', 'quiet': True}) as dl:
+            # Ссылка на один видеоролик распознается без обращения к интернет-сервису
+            if dl.get_info_extractor(cls.__name__).suitable(url):
+                return [url]
+
+            get_rate_limiter(cls.__name__.lower()).acquire()
+
+            try:
+                info = dl.extract_info(url, download=False)
+            except DownloadError:
+                raise IncorrectLinkError()
+
+        if info.get('_type') not in ('playlist', 'multi_video'):
+            return [url]
+
+        return [cls._get_entry_url(entry)
+                for entry in info.get('entries') or []
+                if entry]
+
+    @classmethod
+    def get_archive_id(cls, url: str) -> Optional[str]:
+        # id извлекается регулярным выражением экстрактора youtube_dl, без запросов
+        info_extractor = get_info_extractor(cls.__name__)
+        if not info_extractor.suitable(url):
+            return None
         try:
-            with YoutubeDL(opts) as dl:
-                dl.download([self.url])
-        except YoutubeDLError as err:
-            raise OtherError(err)
+            return info_extractor._match_id(url)
+        except (AssertionError, IndexError, TypeError):
+            return None
+
+    @classmethod
+    def _get_entry_url(cls, entry: dict) -> str:
+        """
+        Возвращает URL адрес видеоролика по элементу плейлиста,
+        полученному при "плоском" (``extract_flat``) извлечении.
 
-        self._logger.info(f'DL({self.url}): video downloaded')
+        Args:
+            entry: Словарь элемента плейлиста.
+
+        Returns:
+            URL адрес видеоролика.
+        """
+        url = entry.get('url') or entry['id']
+        if url.startswith('http'):
+            return url
+        return f'https://www.youtube.com/watch?v={url}'
+
+    def get_video_info_json(self) -> Optional[str]:
+        return json.dumps(YoutubeDL.filter_requested_info(self._video_info),
+                          ensure_ascii=False, default=str)
+
+    @classmethod
+    def is_video_info_expired(cls,
+                              video_info: dict,
+                              video_info_time: float) -> bool:
+        if super(Youtube, cls).is_video_info_expired(video_info, video_info_time):
+            return True
+
+        # Ссылки на медиафайлы подписаны и содержат время истечения срока действия (параметр expire)
+        for f in video_info.get('formats', [video_info]):
+            expire = parse_qs(urlparse(f.get('url', '')).query).get('expire')
+            if expire and expire[0].isdigit() and \
+                    int(expire[0]) - s.VIDEO_INFO_EXPIRE_MARGIN < time.time():
+                return True
+
+        return False
 
     def get_formats_dict(self) -> Optional[dict[str, str]]:
         audio_format = self._formats.get(s.AUDIO_FORMAT_PROPERTIES_STRING, None)
@@ -198,9 +537,44 @@ class Youtube(Downloader):
 
         return self._cached_sorted_formats
 
+    def get_formats_properties(self) -> Optional[dict[str, dict]]:
+        def estimate_size(f: dict) -> Optional[int]:
+            # Объем неизвестен - оценка по битрейту (кбит/с) и длительности
+            if f.get('filesize_approx'):
+                return int(f['filesize_approx'])
+            if f.get('tbr') and self.duration:
+                return int(f['tbr'] * self.duration * 125)
+            return None
+
+        audio_format = self._formats.get(s.AUDIO_FORMAT_PROPERTIES_STRING, {})
+        audio_bytes = audio_format.get('filesize') or estimate_size(audio_format)
+        properties = {}
+
+        for format_name, f in self._formats.items():
+            audio_only = f.get('vcodec') == 'none'
+            separate_audio = not audio_only and f.get('acodec') == 'none'
+
+            # Объем форматов "только видео" в _formats уже включает объем аудиодорожки
+            total_bytes = f.get('filesize')
+            if not total_bytes and (total_bytes := estimate_size(f)) and separate_audio:
+                total_bytes = audio_bytes and total_bytes + audio_bytes
+
+            height = f.get('height')
+            fps = f.get('fps')
+            properties[format_name] = {
+                'height': height if isinstance(height, int) else None,
+                'fps': fps if isinstance(fps, (int, float)) else None,
+                'vcodec': None if audio_only else f.get('vcodec'),
+                'total_bytes': total_bytes or None,
+                'separate_audio': separate_audio,
+                'audio_only': audio_only,
+            }
+
+        return properties
+
     def download_thumbnail(self,
                            path: str = s.THUMBNAILS_DIRECTORY_PATH,
-                           is_high_quality: bool = False) -> str:
+                           is_high_quality: bool = False) -> Optional[str]:
         self._logger.info(f'DL({self.url}): starting download thumbnail')
 
         if not is_high_quality:
@@ -218,24 +592,36 @@ class Youtube(Downloader):
             thumbnail_url = self._video_info['thumbnail']
 
         thumbnail_ext = get_thumbnail_extension(thumbnail_url)
-        thumbnail_filename = f"{self._video_info['extractor']}-{self._video_info['id']}.{thumbnail_ext}"
-        thumbnail_path = f'{path}/{thumbnail_filename}'
+        thumbnail_key = f"{self._video_info['extractor']}-{self._video_info['id']}"
+        if is_high_quality:
+            thumbnail_key += '-hq'
+
+        cache = get_thumbnail_cache(path)
+        thumbnail_filename = cache.get(thumbnail_key)
 
-        if not os.path.isfile(thumbnail_path):
+        if thumbnail_filename is None:
 
             try:
-                with open(thumbnail_path, 'wb') as handle:
-                    response = requests.get(thumbnail_url, stream=True)
+                # Соединение возвращается в пул общей сессии после закрытия ответа
+                with get_session().get(thumbnail_url, stream=True, timeout=s.HTTP_TIMEOUT) as response:
                     if not response.ok:
                         self._logger.error(f'DL({self.url}): resp not ok: {response}')
-                    for block in response.iter_content(1024):
-                        if not block:
-                            break
-                        handle.write(block)
-
-            except (requests.ConnectionError, requests.HTTPError) as err:
+                        return None
+
+                    bandwidth = get_bandwidth_limiter()
+                    host = get_url_host(thumbnail_url)
+                    blocks = []
+                    for block in response.iter_content(s.DOWNLOAD_BLOCK_SIZE):
+                        blocks.append(block)
+                        bandwidth.consume(len(block), host)
+                    content = b''.join(blocks)
+
+            except (requests.ConnectionError, requests.HTTPError, requests.Timeout,
+                    requests.exceptions.ChunkedEncodingError) as err:
                 raise OtherError(err.__class__.__name__)
 
+            thumbnail_filename = cache.put(thumbnail_key, content, thumbnail_ext)
+
             self._logger.debug(f'DL({self.url}): thumbnail downloaded')
 
         return thumbnail_filename
@@ -246,6 +632,31 @@ class Youtube(Downloader):
         except KeyError:
             return None
 
+    def _extract_video_info(self) -> None:
+        """
+        Получает словарь информации о видеоролике с помощью ``YoutubeDL.extract_info()``
+        и записывает его в атрибут ``_video_info``.
+        """
+        self._wait_for_request()
+
+        try:
+            with get_ydl_pool().acquire({'logger': self._ydl_logger}) as dl:
+                self._video_info = dl.extract_info(self.url,
+                                                   download=False)
+                # Ошибка, если ссылка не на этот загрузчик
+                if self._video_info['extractor'] != self.__class__.__name__.lower():
+                    raise IncorrectLinkError()
+
+        except DownloadError as err:
+            err_message = str(err).split(': ')[1]
+
+            if err_message.startswith('Unable to download API page'):
+                raise InternetConnectionError()
+            else:
+                raise IncorrectLinkError()
+
+        self.video_info_time = time.time()
+
     def _extract_formats(self) -> None:
         """
         Получает и записывает в атрибут ``_formats`` словарь форматов
@@ -268,12 +679,22 @@ class Youtube(Downloader):
                                     key=lambda x: x['abr'])
             self._formats[s.AUDIO_FORMAT_PROPERTIES_STRING] = best_audio_format
 
-        pprint(filtered_video_formats)
         for f in filtered_video_formats:
+            f = dict(f)  # копия, чтобы не изменять сохраняемый словарь _video_info
             if is_only_video_format(f) and audio_formats:
-                f['filesize'] += best_audio_format['filesize']
+                # Объем неизвестен, если неизвестен объем одного из потоков
+                f['filesize'] = f.get('filesize') and best_audio_format.get('filesize') and \
+                    f['filesize'] + best_audio_format['filesize']
             self._formats[s.FORMAT_PROPTIES_FPS_TEMPLATE.format(**f)] = f
 
+    @property
+    def archive_id(self) -> Optional[str]:
+        return self._video_info.get('id')
+
+    @property
+    def duration(self) -> Optional[float]:
+        return self._video_info.get('duration')
+
     @property
     def title(self) -> Optional[str]:
         return self._video_info.get('title', 'Заголовок отсутствует')
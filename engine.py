@@ -0,0 +1,536 @@
+import json
+import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from functools import partial
+from logging import getLogger
+from queue import Queue, Empty
+from threading import Lock
+from typing import Callable, Optional
+
+import settings.settings as s
+from db.manager import DbManager
+from downloaders.base import Downloader
+from downloaders.postprocessing import postprocess, get_postprocessing_pool
+from downloaders.tools import get_downloader
+from progress import ProgressAggregator
+from tracing import get_tracer
+
+__all__ = ('DownloadEngine',)
+
+
+class DownloadEngine:
+    """
+    Очередь загрузки видеороликов, не зависящая от интерфейса. Используется
+    окном загрузки (``dialogs.VideoDownloadDialog``) и консольным запуском
+    очереди (``queue_runner.py``).
+
+    Видеоролики скачиваются параллельно в пуле из ``max_parallel`` потоков.
+    Для каждого видеоролика создается загрузчик (из сохраненной информации,
+    если она не устарела) и скачиваются потоки видеоролика
+    (``Downloader.download(postprocessing=False)``), после чего выходной файл
+    формируется в пуле процессов, а место загрузки занимает следующий видеоролик.
+
+    Рабочие потоки не вызывают обработчик событий: события передаются через
+    очередь и обрабатываются методом ``process_events()`` в потоке, создавшем
+    объект. Прогресс скачивания в очередь не передается: рабочие потоки только
+    обновляют последнее значение в ``progress.ProgressAggregator``, а ``process_events()``
+    выдает одно событие прогресса для всех загрузок раз в ``progress_interval``.
+    В этом же потоке периодически сохраняется состояние загрузок, а путь выходного
+    файла рабочий поток записывает в базу данных сам (через собственное соединение
+    ``DbManager``) до начала скачивания, поэтому прерванные загрузки продолжаются
+    с места остановки.
+
+    События - словари с ключами ``event`` (тип события), ``video_id`` и параметрами события:
+
+    * 'info' - загрузчик создан: ``title``, ``author``, ``thumbnail_filename``, ``total_bytes``;
+    * 'output_path' - путь выходного файла определен: ``output_path``;
+    * 'progress' - прогресс всех активных загрузок, не чаще раза в ``progress_interval``
+      (``video_id`` равен None): ``videos`` (словарь вида ``{id_видеоролика: прогресс}``,
+      см. ``progress.ProgressAggregator.sample()``), общие ``downloaded_bytes``,
+      ``total_bytes`` (None, если неизвестен), ``speed`` (байт/с) и ``eta`` (в секундах или None);
+    * 'downloaded' - потоки скачаны, начато формирование выходного файла;
+    * 'finished' - видеоролик сохранен: ``output_file_path``;
+    * 'skipped' - видеоролик уже есть в архиве скачанных видеороликов
+      и не скачивается: ``output_file_path``;
+    * 'error' - ``stage`` ('info', 'download' или 'postprocessing'),
+      ``error`` (имя класса исключения), ``message``;
+    * 'paused', 'resumed' - загрузки приостановлены или продолжены (``video_id`` равен None);
+    * 'queue_finished' - очередь завершена (``video_id`` равен None).
+
+    Args:
+        db: Объект управления базой данных приложения.
+        videos: Список словарей с информацией о видеороликах, возвращаемый
+                ``DbManager.get_all_table_videos()``.
+        save_path: Путь до папки сохраниния видеороликов.
+        max_parallel: Максимальное количество одновременно скачиваемых видеороликов.
+        output_mode: Режим формирования выходного файла для видеороликов,
+                     для которых он не указан (см. ``settings.OUTPUT_MODES``).
+        on_event: Функция, вызываемая для каждого события.
+        download_thumbnails: Скачивать ли превью видеороликов (для отображения в окне).
+        archive_mode: Загрузка видеороликов, которые есть в архиве скачанных
+                      видеороликов (см. ``settings.ARCHIVE_MODES``). Архив проверяется
+                      по id видеоролика из ссылки до обращения к интернет-сервису.
+        progress_interval: Минимальный интервал между событиями прогресса (в милисекундах).
+
+    Этапы загрузки каждого видеоролика (получение информации, превью, ожидание
+    ограничителя частоты запросов, скачивание, формирование выходного файла)
+    записываются объектом ``tracing.get_tracer()``, если запись интервалов включена.
+
+    Attributes:
+        videos: Очередь видеороликов, загрузка которых еще не начата.
+        jobs: Активные загрузки вида ``{id_видеоролика: словарь_загрузки}``.
+        postprocessing_jobs: Загрузки, выходной файл которых формируется.
+        finished_videos: Скачанные (и пропущенные, так как уже скачаны) видеоролики.
+        problem_videos: Видеоролики, загрузка которых завершилась ошибкой.
+        finished_bytes: Количество байт, скачанных завершенными загрузками.
+        paused: Загрузки приостановлены (см. ``pause()``).
+    """
+
+    videos: list[dict]
+    jobs: dict[int, dict]
+    postprocessing_jobs: dict[int, dict]
+    finished_videos: list[dict]
+    problem_videos: list[dict]
+    finished_bytes: int
+    paused: bool
+
+    def __init__(self,
+                 db: DbManager,
+                 videos: list[dict],
+                 save_path: str,
+                 max_parallel: int = 1,
+                 output_mode: str = s.DEFAULT_OUTPUT_MODE,
+                 on_event: Optional[Callable[[dict], None]] = None,
+                 download_thumbnails: bool = False,
+                 archive_mode: str = s.DEFAULT_ARCHIVE_MODE,
+                 progress_interval: int = s.PROGRESS_UPDATE_INTERVAL):
+        self.db = db
+        self.videos = list(videos)
+        self.save_path = save_path
+        self.max_parallel = max(1, max_parallel)
+        self.output_mode = output_mode
+        self.download_thumbnails = download_thumbnails
+        self.archive_mode = archive_mode
+        self.progress_interval = progress_interval
+        self.jobs = {}
+        self.postprocessing_jobs = {}
+        self.finished_videos = []
+        self.problem_videos = []
+        self.finished_bytes = 0
+        self.paused = False
+
+        self._on_event = on_event or (lambda event: None)
+        self._events = Queue()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_parallel)
+        self._stopped = False
+        # Согласует приостановку (поток событий) с созданием загрузчиков (рабочие потоки)
+        self._pause_lock = Lock()
+        self._last_state_save = time.monotonic()
+        self._progress = ProgressAggregator()
+        self._last_progress = time.monotonic()
+        self._logger = getLogger(self.__class__.__name__)
+
+    def start(self) -> None:
+        """
+        Начинает загрузку видеороликов из очереди.
+        """
+        self._schedule()
+
+    def run(self) -> None:
+        """
+        Выполняет очередь до конца в текущем потоке (без интерфейса).
+        При прерывании (Ctrl+C) загрузки останавливаются с сохранением состояния.
+        """
+        self.start()
+        try:
+            while self.process_events(timeout=s.ENGINE_POLL_INTERVAL / 1000):
+                pass
+        except KeyboardInterrupt:
+            self.stop()
+
+    def process_events(self, timeout: Optional[float] = None) -> bool:
+        """
+        Обрабатывает накопившиеся события рабочих потоков: обновляет состояние
+        загрузок, начинает следующие загрузки и вызывает обработчик событий.
+
+        Args:
+            timeout: Время ожидания первого события в секундах (None - не ждать).
+
+        Returns:
+            False, если очередь завершена или остановлена, иначе - True.
+        """
+        if self._stopped:
+            return False
+
+        try:
+            event = self._events.get(timeout=timeout) if timeout else self._events.get_nowait()
+            while True:
+                self._handle_event(event)
+                event = self._events.get_nowait()
+        except Empty:
+            pass
+
+        if time.monotonic() - self._last_progress >= self.progress_interval / 1000:
+            self._emit_progress()
+
+        if time.monotonic() - self._last_state_save >= s.DOWNLOAD_STATE_SAVE_INTERVAL / 1000:
+            self.save_download_states()
+
+        if not self._stopped and not self.videos and not self.jobs and not self.postprocessing_jobs:
+            self._stopped = True
+            self._executor.shutdown(wait=False)
+            self._on_event({'event': 'queue_finished', 'video_id': None})
+            return False
+
+        return not self._stopped
+
+    def stop(self) -> None:
+        """
+        Останавливает загрузки и сохраняет их состояние в базе данных. Формирование
+        выходных файлов уже скачанных видеороликов не прерывается: метод ждет его
+        завершения и записывает результаты (с выдачей событий 'finished' и 'error'),
+        иначе при следующем запуске эти видеоролики скачивались бы заново.
+        """
+        if self._stopped:
+            return
+        self._stopped = True
+
+        for job in self.jobs.values():
+            if job['dl'] is not None:
+                job['dl'].stop_download()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+        # События обработчика завершения из очереди уже не обрабатываются
+        wait([job['postprocessing_future'] for job in self.postprocessing_jobs.values()])
+        for video_id, job in list(self.postprocessing_jobs.items()):
+            if (err := job['postprocessing_future'].exception()) is not None:
+                self._handle_event({'event': 'error', 'video_id': video_id, 'stage': 'postprocessing',
+                                    'error': err.__class__.__name__, 'message': str(err)})
+            else:
+                self._handle_event({'event': 'finished', 'video_id': video_id,
+                                    'output_file_path': job['postprocessing_future'].result()})
+
+        self._apply_progress(self._progress.sample())
+        self.save_download_states('stopped')
+
+    def pause(self) -> None:
+        """
+        Приостанавливает активные загрузки: загрузчики перестают читать данные
+        из сети, а скорость скачивания освобождается для других загрузок процесса.
+        Скачанные данные и загрузчики (с информацией о видеороликах и выбранными
+        форматами) сохраняются, новые загрузки из очереди не начинаются.
+        Формирование выходных файлов продолжается.
+        """
+        with self._pause_lock:
+            if self._stopped or self.paused:
+                return
+            self.paused = True
+
+            for job in self.jobs.values():
+                if job['dl'] is not None:
+                    job['dl'].pause_download()
+
+        self._apply_progress(self._progress.sample())
+        self.save_download_states()
+        self._on_event({'event': 'paused', 'video_id': None})
+
+    def resume(self) -> None:
+        """
+        Продолжает приостановленные загрузки с места остановки
+        (без повторного получения информации о видеороликах).
+        """
+        with self._pause_lock:
+            if self._stopped or not self.paused:
+                return
+            self.paused = False
+
+            for job in self.jobs.values():
+                if job['dl'] is not None:
+                    job['dl'].resume_download()
+
+        self._schedule()
+        self._on_event({'event': 'resumed', 'video_id': None})
+
+    def save_download_states(self, state: str = 'downloading') -> None:
+        """
+        Сохраняет в базе данных состояние всех активных загрузок одной транзакцией.
+
+        Args:
+            state: Состояние загрузки (см. документацию к классу ``DbManager``).
+        """
+        self._last_state_save = time.monotonic()
+        states = [{'id': video_id,
+                   'state': state,
+                   'output_path': job['output_path'],
+                   'part_path': job['dl'].part_path if job['dl'] is not None else None,
+                   'downloaded_bytes': job['downloaded_bytes'],
+                   'total_bytes': job['total_bytes']}
+                  for video_id, job in self.jobs.items()
+                  if job['output_path'] is not None]
+        if states:
+            self.db.update_table_videos_download_states(states)
+
+    def get_downloaded_bytes(self) -> int:
+        """Возвращает общее количество скачанных байт всех загрузок"""
+        return self.finished_bytes + sum(job['downloaded_bytes'] for job in self.jobs.values())
+
+    def get_total_bytes(self) -> Optional[int]:
+        """
+        Возвращает общий объем начатых загрузок или None, если объем
+        хотя бы одной активной загрузки неизвестен.
+        """
+        totals = [job['total_bytes'] for job in self.jobs.values()]
+        if None in totals:
+            return None
+        return self.finished_bytes + sum(totals)
+
+    def get_remaining_videos(self) -> list[int]:
+        """Возвращает id нескачанных видеороликов"""
+        remaining = self.problem_videos + [job['video'] for job in self.jobs.values()] + \
+            [job['video'] for job in self.postprocessing_jobs.values()] + self.videos
+        return [video['id'] for video in remaining]
+
+    def get_finished_videos(self) -> list[int]:
+        """Возвращает id скачанных видеороликов"""
+        return [video['id'] for video in self.finished_videos]
+
+    def _schedule(self) -> None:
+        """Начинает загрузки из очереди, пока их количество меньше ``max_parallel``"""
+        while not self._stopped and not self.paused and self.videos and len(self.jobs) < self.max_parallel:
+            video = self.videos.pop(0)
+
+            if (archive_entry := self._find_in_archive(video)) is not None:
+                self.finished_videos.append(video)
+                self.db.update_table_videos_download_states([{'id': video['id'], 'state': 'finished'}])
+                self._on_event({'event': 'skipped', 'video_id': video['id'],
+                                'output_file_path': archive_entry['output_path']})
+                continue
+
+            # Прерванная загрузка продолжается, только если папка сохранения не изменилась
+            output_path = video.get('output_path')
+            if output_path and os.path.dirname(output_path) != self.save_path.rstrip('/'):
+                output_path = None
+
+            self.jobs[video['id']] = {
+                'video': video,
+                'dl': None,
+                'total_bytes': video.get('total_bytes') if output_path else None,
+                'downloaded_bytes': 0,
+                'output_path': output_path,
+                'postprocessing_future': None,
+            }
+            self._executor.submit(self._download, video['id'])
+
+    def _find_in_archive(self, video: dict) -> Optional[dict]:
+        """
+        Возвращает запись архива скачанных видеороликов, если видеоролик
+        не нужно скачивать (см. ``archive_mode``), иначе - None.
+        """
+        if self.archive_mode == 'off' or not video.get('format_name'):
+            return None
+
+        archive_id = get_downloader(video['resource']).get_archive_id(video['url'])
+        if archive_id is None:
+            return None
+
+        entry = self.db.get_archive_entry(video['resource'], archive_id, video['format_name'])
+        if entry is None:
+            return None
+
+        if self.archive_mode == 'verify':
+            output_path = entry['output_path']
+            if not output_path or not os.path.isfile(output_path) or \
+                    os.path.getsize(output_path) != entry['total_bytes']:
+                self._logger.info(f'Archived file of video {video["id"]} is missing or changed, '
+                                  f'downloading again')
+                return None
+
+        return entry
+
+    def _download(self, video_id: int) -> None:
+        """Загрузка видеоролика, выполняется в рабочем потоке"""
+        try:
+            with get_tracer().job(video_id):
+                self._download_video(video_id)
+        finally:
+            # Пул потоков создается для каждого запуска очереди, поэтому соединение
+            # рабочего потока с базой данных не должно оставаться открытым
+            self.db.close_thread_connection()
+
+    def _download_video(self, video_id: int) -> None:
+        job = self.jobs[video_id]
+        video = job['video']
+        tracer = get_tracer()
+
+        stage = 'info'
+        try:
+            with tracer.span('extract'):
+                dl = self._create_downloader(video)
+            # Загрузчик, созданный после вызова pause(), сразу приостанавливается
+            with self._pause_lock:
+                job['dl'] = dl
+                if self.paused:
+                    dl.pause_download()
+
+            thumbnail_filename = None
+            if self.download_thumbnails:
+                try:
+                    with tracer.span('thumbnail'):
+                        thumbnail_filename = dl.download_thumbnail()
+                except Exception as err:
+                    self._logger.error(f'Thumbnail of video {video_id} is not downloaded: {err!r}')
+
+            total_bytes = dl.get_total_bytes(video['format_name'])
+            self._put_event('info', video_id,
+                            title=dl.title,
+                            author=dl.author,
+                            thumbnail_filename=thumbnail_filename,
+                            total_bytes=total_bytes)
+            if self._stopped:
+                return
+
+            stage = 'download'
+            output_path = job['output_path']
+            if output_path is None:
+                output_path = dl.prepare_output_path(self.save_path, download_format=video['format_string'])
+            self.db.update_table_videos_download_states([{'id': video_id,
+                                                          'state': 'downloading',
+                                                          'output_path': output_path,
+                                                          'total_bytes': total_bytes}])
+            self._put_event('output_path', video_id, output_path=output_path)
+
+            with tracer.span('transfer', format_name=video.get('format_name')) as span:
+                dl.download(on_progress=partial(self._on_progress, video_id),
+                            path=self.save_path,
+                            download_format=video['format_string'],
+                            output_path=output_path,
+                            output_mode=video.get('output_mode') or self.output_mode,
+                            postprocessing=False)
+                if tracer.enabled:
+                    span.set(bytes=sum(os.path.getsize(path) for path in dl.postprocessing_args[0]))
+        except Exception as err:
+            if not self._stopped:
+                self._logger.error(f'Error while video {video_id} {stage}: {err!r}')
+                self._put_event('error', video_id, stage=stage,
+                                error=err.__class__.__name__, message=str(err))
+            return
+
+        self._put_event('downloaded', video_id, postprocessing_args=dl.postprocessing_args)
+
+    def _create_downloader(self, video: dict) -> Downloader:
+        """Создает загрузчик из сохраненной информации, если она не устарела"""
+        dl_class = get_downloader(video['resource'])
+
+        if video.get('video_info') and video.get('video_info_time') is not None:
+            video_info = json.loads(video['video_info'])
+            if not dl_class.is_video_info_expired(video_info, video['video_info_time']):
+                return dl_class(video['url'], video_info, video['video_info_time'])
+
+        return dl_class(video['url'])
+
+    def _on_progress(self, video_id: int, total_bytes: int, downloaded_bytes: int, status: str) -> None:
+        if status == 'error':
+            self._put_event('error', video_id, stage='download',
+                            error='OtherError', message='status "error" while downloading')
+        else:
+            self._progress.update(video_id, total_bytes, downloaded_bytes)
+
+    def _apply_progress(self, progress: dict[int, dict]) -> None:
+        """Записывает прогресс загрузок (``ProgressAggregator.sample()``) в словари активных загрузок"""
+        for video_id, p in progress.items():
+            if (job := self.jobs.get(video_id)) is not None:
+                job['downloaded_bytes'] = p['downloaded_bytes']
+                if p['total_bytes']:
+                    job['total_bytes'] = p['total_bytes']
+
+    def _emit_progress(self) -> None:
+        """Выдает событие прогресса всех активных загрузок"""
+        self._last_progress = time.monotonic()
+        progress = {video_id: p for video_id, p in self._progress.sample(self._last_progress).items()
+                    if video_id in self.jobs}
+        if not progress:
+            return
+        self._apply_progress(progress)
+
+        downloaded_bytes = self.get_downloaded_bytes()
+        total_bytes = self.get_total_bytes()
+        speed = sum(p['speed'] for p in progress.values())
+        eta = None
+        if total_bytes is not None and speed > 0:
+            eta = max(total_bytes - downloaded_bytes, 0) / speed
+
+        self._on_event({'event': 'progress', 'video_id': None, 'videos': progress,
+                        'downloaded_bytes': downloaded_bytes, 'total_bytes': total_bytes,
+                        'speed': speed, 'eta': eta})
+
+    def _postprocessing_done(self, video_id: int, future: Future) -> None:
+        if future.cancelled():
+            return
+        if (err := future.exception()) is not None:
+            self._put_event('error', video_id, stage='postprocessing',
+                            error=err.__class__.__name__, message=str(err))
+        else:
+            self._put_event('finished', video_id, output_file_path=future.result())
+
+    def _record_postprocessing(self, job: dict, outcome: str = 'ok', **attrs) -> None:
+        """Записывает интервал формирования выходного файла (от передачи в пул процессов до результата)"""
+        start, began = job['postprocessing_start']
+        get_tracer().record('postprocess', job['video']['id'], start, time.perf_counter() - began, outcome, **attrs)
+
+    def _put_event(self, event: str, video_id: Optional[int], **params) -> None:
+        self._events.put({'event': event, 'video_id': video_id, **params})
+
+    def _handle_event(self, event: dict) -> None:
+        video_id = event['video_id']
+        job = self.jobs.get(video_id) or self.postprocessing_jobs.get(video_id)
+        if job is None:  # загрузка уже завершена ошибкой
+            return
+
+        if event['event'] == 'info':
+            if event['total_bytes']:
+                job['total_bytes'] = event['total_bytes']
+
+        elif event['event'] == 'output_path':
+            job['output_path'] = event['output_path']
+
+        elif event['event'] == 'downloaded':
+            if video_id not in self.jobs:
+                return
+            self._apply_progress({video_id: self._progress.remove(video_id) or job})
+            self.jobs.pop(video_id)
+            self.finished_bytes += job['downloaded_bytes']
+            self.postprocessing_jobs[video_id] = job
+
+            job['postprocessing_start'] = (time.time(), time.perf_counter())
+            future = get_postprocessing_pool().submit(postprocess, *event.pop('postprocessing_args'))
+            future.add_done_callback(partial(self._postprocessing_done, video_id))
+            job['postprocessing_future'] = future
+
+        elif event['event'] == 'finished':
+            self._record_postprocessing(job, bytes=os.path.getsize(event['output_file_path']))
+            self.postprocessing_jobs.pop(video_id)
+            self.finished_videos.append(job['video'])
+            with self.db.transaction():
+                self.db.update_table_videos_download_states([{'id': video_id, 'state': 'finished'}])
+                if (archive_id := job['dl'].archive_id) is not None and job['video'].get('format_name'):
+                    self.db.add_archive_entries([{
+                        'resource': job['video']['resource'],
+                        'video_id': archive_id,
+                        'format_name': job['video']['format_name'],
+                        'output_path': event['output_file_path'],
+                        'total_bytes': os.path.getsize(event['output_file_path']),
+                        'finished_time': time.time(),
+                    }])
+
+        elif event['event'] == 'error':
+            if event['stage'] == 'postprocessing':
+                self._record_postprocessing(job, outcome='error', error=event['error'])
+            self._progress.remove(video_id)
+            self.jobs.pop(video_id, None)
+            self.postprocessing_jobs.pop(video_id, None)
+            self.problem_videos.insert(0, job['video'])
+            self.db.update_table_videos_download_states([{'id': video_id, 'state': 'error'}])
+
+        self._on_event(event)
+        self._schedule()
@@ -0,0 +1,111 @@
+from collections import OrderedDict
+
+from PyQt5.QtWidgets import QWidget, QMessageBox, QCheckBox
+from PyQt5.QtGui import QPixmap
+from PyQt5.QtCore import Qt
+
+import settings.settings as s
+from tools import get_thumbnail_path
+
+__all__ = (
+    'get_thumbnail_pixmap',
+    'get_pixmap_cache_stats',
+    'notify_with_checkbox',
+    'show_notification'
+)
+
+
+# Кэш масштабированных изображений превью вида {(имя_файла, ширина, высота): QPixmap}
+_pixmap_cache = OrderedDict()
+_pixmap_cache_stats = {'hits': 0, 'misses': 0}
+
+
+def get_thumbnail_pixmap(filename: str,
+                         width: int,
+                         height: int) -> QPixmap:
+    """
+    Возвращает изображение превью, масштабированное под размер ``width`` x ``height``
+    с сохранением пропорций. Изображения кэшируются в памяти (не более
+    ``settings.PIXMAP_CACHE_SIZE`` штук), поэтому повторное отображение превью
+    не требует декодирования файла.
+
+    Args:
+        filename: Имя файла превью.
+        width: Ширина области отображения.
+        height: Высота области отображения.
+
+    Returns:
+        Масштабированное изображение превью.
+    """
+    key = (filename, width, height)
+
+    if key in _pixmap_cache:
+        _pixmap_cache_stats['hits'] += 1
+        _pixmap_cache.move_to_end(key)
+        return _pixmap_cache[key]
+
+    _pixmap_cache_stats['misses'] += 1
+    pixmap = QPixmap(get_thumbnail_path(filename)).scaled(width, height, Qt.KeepAspectRatio)
+
+    _pixmap_cache[key] = pixmap
+    if len(_pixmap_cache) > s.PIXMAP_CACHE_SIZE:
+        _pixmap_cache.popitem(last=False)
+
+    return pixmap
+
+
+def get_pixmap_cache_stats() -> dict:
+    """
+    Возвращает статистику кэша изображений превью: ``hits``, ``misses``, ``size``.
+
+    Returns:
+        Словарь статистики кэша.
+    """
+    return dict(_pixmap_cache_stats, size=len(_pixmap_cache))
+
+
+def notify_with_checkbox(window: QWidget,
+                         title: str,
+                         text: str) -> tuple[bool, bool]:
+    """
+    Показывает окно-предупреждение с возможностью отмены действия и
+    флажком "Больше не спрашивать".
+
+    Args:
+        window: Объект родительского окна.
+        title: Заголовок окна-предупреждения
+        text: Текст окна-предупреждения
+
+    Returns:
+        notify_with_checkbox: Кортеж с двумя элементами типа bool - нажал ли пользователь кнопку
+                              "Продолжить" и установлен ли флажок "Больше не спрашивать".
+    """
+    message_box = QMessageBox(window)
+    message_box.setWindowTitle(title)
+    message_box.setText(text)
+    message_box.setIcon(QMessageBox.Warning)
+    message_box.addButton('Отмена', QMessageBox.RejectRole)
+    message_box.addButton('Продолжить', QMessageBox.AcceptRole)
+
+    checkbox = QCheckBox('Больше не спрашивать')
+    message_box.setCheckBox(checkbox)
+
+    accepted = message_box.exec()
+    checkbox_checked = message_box.checkBox().isChecked()
+
+    return accepted, checkbox_checked
+
+
+def show_notification(window: QWidget,
+                      title: str,
+                      text: str) -> None:
+    """
+    Показывает окно-уведомление с кнопкой "ОК"
+
+    Args:
+        window: Объект родительского окна.
+        title: Заголовок окна.
+        text: Текст уведомления.
+    """
+    QMessageBox.information(window, title, text,
+                            defaultButton=QMessageBox.Ok)
@@ -0,0 +1,158 @@
+from collections import OrderedDict
+from typing import Any
+
+from PyQt5 import QtCore
+from PyQt5.QtCore import Qt, QModelIndex
+
+import settings.settings as s
+from db.manager import DbManager
+
+__all__ = ('VideosTableModel',)
+
+
+class VideosTableModel(QtCore.QAbstractTableModel):
+    """
+    Модель таблицы видеороликов основного окна, читающая строки из базы данных по мере
+    прокрутки таблицы.
+
+    id видеороликов загружаются страницами по ``settings.VIDEOS_TABLE_PAGE_SIZE``
+    (``canFetchMore()`` / ``fetchMore()``), а данные строк (источник, заголовок, формат)
+    читаются страницами при первом отображении и хранятся в кэше на
+    ``settings.VIDEOS_TABLE_CACHE_SIZE`` строк. Поэтому время открытия окна
+    и расход памяти не зависят от длины очереди.
+
+    В "скрытых" данных (``Qt.UserRole``) ячеек каждой строки хранится id видеоролика
+    в базе данных.
+
+    Args:
+        db: Объект управления базой данных приложения.
+    """
+
+    COLUMNS = (('resource', 'Источник'), ('title', 'Заголовок'), ('format_name', 'Формат'))
+
+    def __init__(self, db: DbManager, parent=None):
+        super(VideosTableModel, self).__init__(parent)
+        self.db = db
+        self._ids = []  # id загруженных строк в порядке отображения
+        self._rows = {}  # номер строки по id видеоролика
+        self._cache = OrderedDict()  # данные строк вида {id_видеоролика: словарь_строки}
+        self._total = self.db.get_table_videos_count()
+        self.fetchMore(QModelIndex())
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._ids)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def canFetchMore(self, parent: QModelIndex) -> bool:
+        return not parent.isValid() and len(self._ids) < self._total
+
+    def fetchMore(self, parent: QModelIndex) -> None:
+        if parent.isValid():
+            return
+
+        ids = self.db.get_table_videos_ids(self._ids[-1] if self._ids else 0, s.VIDEOS_TABLE_PAGE_SIZE)
+        if not ids:
+            self._total = len(self._ids)
+            return
+
+        self.beginInsertRows(QModelIndex(), len(self._ids), len(self._ids) + len(ids) - 1)
+        for video_id in ids:
+            self._rows[video_id] = len(self._ids)
+            self._ids.append(video_id)
+        self.endInsertRows()
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
+
+        if role == Qt.UserRole:
+            return self._ids[index.row()]
+
+        if role == Qt.DisplayRole:
+            return self._get_row(index.row())[self.COLUMNS[index.column()][0]]
+
+        return None
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.DisplayRole) -> Any:
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.COLUMNS[section][1]
+        return None
+
+    def get_video_id(self, row: int) -> int:
+        """Возвращает id видеоролика строки ``row``"""
+        return self._ids[row]
+
+    def add_videos(self, ids: list[int]) -> None:
+        """
+        Добавляет в конец таблицы видеоролики, записанные в базу данных.
+
+        Args:
+            ids: id добавленных видеороликов.
+        """
+        self._total += len(ids)
+        if len(self._ids) + len(ids) < self._total:
+            return  # строки будут прочитаны при прокрутке до конца таблицы
+
+        self.beginInsertRows(QModelIndex(), len(self._ids), len(self._ids) + len(ids) - 1)
+        for video_id in ids:
+            self._rows[video_id] = len(self._ids)
+            self._ids.append(video_id)
+        self.endInsertRows()
+
+    def update_video(self, video_id: int) -> None:
+        """
+        Перечитывает из базы данных данные измененного видеоролика.
+
+        Args:
+            video_id: id видеоролика.
+        """
+        self._cache.pop(video_id, None)
+        if (row := self._rows.get(video_id)) is not None:
+            self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.COLUMNS) - 1))
+
+    def remove_videos(self, ids: list[int]) -> None:
+        """
+        Удаляет из таблицы видеоролики, удаленные из базы данных.
+        Строки удаляются непрерывными диапазонами, с конца таблицы.
+
+        Args:
+            ids: id удаленных видеороликов.
+        """
+        rows = sorted((self._rows[video_id] for video_id in ids if video_id in self._rows), reverse=True)
+
+        while rows:
+            last = first = rows.pop(0)
+            while rows and rows[0] == first - 1:
+                first = rows.pop(0)
+            self.beginRemoveRows(QModelIndex(), first, last)
+            del self._ids[first:last + 1]
+            self.endRemoveRows()
+
+        for video_id in ids:
+            self._cache.pop(video_id, None)
+        self._rows = {video_id: row for row, video_id in enumerate(self._ids)}
+        self._total = self.db.get_table_videos_count()
+
+    def _get_row(self, row: int) -> dict:
+        """
+        Возвращает данные строки из кэша. При отсутствии в кэше
+        читает из базы данных всю страницу, в которой находится строка.
+        """
+        video_id = self._ids[row]
+        if video_id in self._cache:
+            self._cache.move_to_end(video_id)
+            return self._cache[video_id]
+
+        page_start = row - row % s.VIDEOS_TABLE_PAGE_SIZE
+        page_ids = [i for i in self._ids[page_start:page_start + s.VIDEOS_TABLE_PAGE_SIZE]
+                    if i not in self._cache]
+        for video in self.db.get_table_videos_rows(page_ids):
+            self._cache[video['id']] = video
+
+        while len(self._cache) > s.VIDEOS_TABLE_CACHE_SIZE:
+            self._cache.popitem(last=False)
+
+        # Строка могла быть удалена из базы данных в другом месте
+        return self._cache.get(video_id) or dict.fromkeys(('resource', 'title', 'format_name'))
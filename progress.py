@@ -0,0 +1,101 @@
+import math
+import time
+from threading import Lock
+from typing import Hashable, Optional
+
+import settings.settings as s
+
+__all__ = ('ProgressAggregator',)
+
+
+class ProgressAggregator:
+    """
+    Объединяет прогресс нескольких загрузок для отображения с фиксированной частотой.
+
+    Рабочие потоки вызывают ``update()`` на каждом скачанном блоке, но только запоминают
+    последнее значение. Поток интерфейса периодически вызывает ``sample()`` и получает
+    одно обновление для всех активных загрузок, поэтому количество перерисовок
+    не зависит от скорости скачивания.
+
+    Скорость сглаживается экспоненциальным скользящим средним с постоянной времени
+    ``time_constant`` (вес нового значения зависит от времени между вызовами ``sample()``,
+    а не от их частоты), оставшееся время рассчитывается по сглаженной скорости.
+
+    Args:
+        time_constant: Постоянная времени сглаживания скорости (в секундах).
+    """
+
+    def __init__(self, time_constant: float = s.PROGRESS_SPEED_TIME_CONSTANT):
+        self.time_constant = time_constant
+        self._lock = Lock()
+        self._latest = {}  # последние значения рабочих потоков вида {ключ: (total_bytes, downloaded_bytes)}
+        self._states = {}  # состояние загрузок на момент последнего вызова sample()
+
+    def update(self, key: Hashable, total_bytes: Optional[int], downloaded_bytes: int) -> None:
+        """
+        Запоминает прогресс загрузки. Может вызываться из любого потока.
+
+        Args:
+            key: Ключ загрузки (например, id видеоролика).
+            total_bytes: Общий объем загрузки или None, если неизвестен.
+            downloaded_bytes: Количество скачанных байт.
+        """
+        with self._lock:
+            self._latest[key] = (total_bytes, downloaded_bytes)
+
+    def remove(self, key: Hashable) -> Optional[dict]:
+        """
+        Удаляет завершенную загрузку.
+
+        Args:
+            key: Ключ загрузки.
+
+        Returns:
+            Последний прогресс загрузки (словарь с ключами ``total_bytes`` и ``downloaded_bytes``)
+            или None, если прогресса не было.
+        """
+        with self._lock:
+            latest = self._latest.pop(key, None)
+        state = self._states.pop(key, None)
+
+        if latest is not None:
+            return {'total_bytes': latest[0], 'downloaded_bytes': latest[1]}
+        if state is not None:
+            return {'total_bytes': state['total_bytes'], 'downloaded_bytes': state['downloaded_bytes']}
+        return None
+
+    def sample(self, now: Optional[float] = None) -> dict[Hashable, dict]:
+        """
+        Возвращает прогресс всех активных загрузок: словарь вида ``{ключ: прогресс}``,
+        прогресс содержит ключи ``total_bytes``, ``downloaded_bytes``, ``speed``
+        (сглаженная скорость, байт/с) и ``eta`` (оставшееся время в секундах или None).
+
+        Args:
+            now: Время вызова (``time.monotonic()``), по умолчанию - текущее.
+
+        Returns:
+            Словарь прогресса загрузок.
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            latest = dict(self._latest)
+
+        for key, (total_bytes, downloaded_bytes) in latest.items():
+            state = self._states.get(key)
+            if state is None:
+                self._states[key] = {'total_bytes': total_bytes, 'downloaded_bytes': downloaded_bytes,
+                                     'speed': 0.0, 'eta': None, 'time': now}
+                continue
+
+            if (dt := now - state['time']) > 0:
+                speed = max(downloaded_bytes - state['downloaded_bytes'], 0) / dt
+                weight = 1 - math.exp(-dt / self.time_constant)
+                state['speed'] += (speed - state['speed']) * weight
+                state['time'] = now
+
+            state['total_bytes'] = total_bytes
+            state['downloaded_bytes'] = downloaded_bytes
+            state['eta'] = (max(total_bytes - downloaded_bytes, 0) / state['speed']
+                            if total_bytes and state['speed'] > 0 else None)
+
+        return {key: {k: v for k, v in state.items() if k != 'time'} for key, state in self._states.items()}
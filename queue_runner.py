@@ -0,0 +1,129 @@
+"""
+Скачивание очереди видеороликов из базы данных приложения без интерфейса.
+
+Каждое событие очереди (см. ``engine.DownloadEngine``) выводится в stdout
+отдельной строкой JSON. Прерванные загрузки (в том числе прерванные Ctrl+C)
+продолжаются с места остановки при следующем запуске.
+
+Пример::
+
+    python queue_runner.py --save-path ~/Videos --parallel 3 --output-mode native
+
+Интервалы времени этапов загрузки записываются параметром ``--trace-spans``,
+загрузка отдельных видеороликов профилируется параметром ``--profile``::
+
+    python queue_runner.py --save-path ~/Videos --trace-spans logs/spans.jsonl --profile 12
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+import sys
+
+import settings.settings as s
+from db.manager import DbManager
+from diskspace import check_disk_space
+from downloaders.bandwidth import get_bandwidth_limiter
+from engine import DownloadEngine
+from tools import human_size
+from tracing import configure_tracing
+
+
+def parse_rate(value: str) -> int:
+    """
+    Разбирает ограничение скорости вида '500K' или '2.5M' (в байт/с, суффиксы -
+    степени 1024, как у параметра --limit-rate youtube_dl). Разбирается без
+    youtube_dl, чтобы запуск не замедлялся его импортом.
+    """
+    if (match := re.fullmatch(r'(\d+(?:\.\d+)?)([kmgtpezy]?)', value.strip(), re.IGNORECASE)) is None:
+        raise argparse.ArgumentTypeError(f'некорректное ограничение скорости: {value}')
+    number, suffix = match.groups()
+    return round(float(number) * 1024 ** ('bkmgtpezy'.index(suffix.lower() or 'b')))
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Скачивание очереди видеороликов без интерфейса')
+    parser.add_argument('--save-path', required=True,
+                        help='папка сохранения видеороликов')
+    parser.add_argument('--db', default=s.DB_PATH,
+                        help='путь до файла базы данных приложения')
+    parser.add_argument('--parallel', type=int,
+                        help='количество одновременных загрузок (по умолчанию - из настроек)')
+    parser.add_argument('--output-mode', choices=tuple(s.OUTPUT_MODES),
+                        help='режим формирования выходного файла (по умолчанию - из настроек)')
+    parser.add_argument('--archive', choices=tuple(s.ARCHIVE_MODES),
+                        help='загрузка видеороликов из архива скачанных: verify - пропускать, если файл '
+                             'на месте, skip - пропускать, off - скачивать заново (по умолчанию - из настроек)')
+    parser.add_argument('--limit-rate', metavar='RATE', type=parse_rate,
+                        help='общее ограничение скорости скачивания в байт/с, например 500K или 2.5M '
+                             '(0 - без ограничения, по умолчанию - из настроек)')
+    parser.add_argument('--ignore-disk-space', action='store_true',
+                        help='начать скачивание, даже если свободного места в папке сохранения недостаточно')
+    parser.add_argument('--trace-spans', metavar='PATH', default=s.TRACE_SPANS_PATH,
+                        help='файл для записи интервалов времени этапов загрузки (JSON lines)')
+    parser.add_argument('--profile', metavar='VIDEO_ID', type=int, action='append', default=[],
+                        help='id видеоролика, загрузка которого профилируется cProfile и tracemalloc '
+                             f'(результаты - в папке {s.PROFILES_DIRECTORY_PATH}); можно указать несколько раз')
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str]) -> int:
+    args = parse_args(argv)
+
+    # Запуск без окна не должен зависеть от существования папки логов
+    if logs_directory := os.path.dirname(s.LOGGING_FILE_PATH):
+        os.makedirs(logs_directory, exist_ok=True)
+    logging.basicConfig(
+        filename=s.LOGGING_FILE_PATH,
+        level=logging.DEBUG if s.DEBUG else logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(name)s - %(message)s'
+    )
+
+    tracer = configure_tracing(args.trace_spans, args.profile or s.PROFILE_VIDEO_IDS)
+    db = DbManager(args.db)
+    parallel = args.parallel or int(db.get_setting('max_parallel_downloads'))
+    output_mode = args.output_mode or db.get_setting('output_mode')
+    archive_mode = args.archive or db.get_setting('archive_mode')
+    bandwidth_limit = args.limit_rate if args.limit_rate is not None else int(db.get_setting('bandwidth_limit'))
+    get_bandwidth_limiter().set_rate(bandwidth_limit)
+
+    save_path = os.path.abspath(os.path.expanduser(args.save_path))
+    if not os.path.isdir(save_path):
+        print(f'Папка {save_path} не существует', file=sys.stderr)
+        db.close()
+        return 2
+
+    videos = db.get_all_table_videos()
+    max_parallel = min(max(parallel, 1), s.MAX_PARALLEL_DOWNLOADS_LIMIT)
+
+    disk_space = check_disk_space(videos, save_path, max_parallel)
+    if not disk_space['enough']:
+        print(f'Недостаточно места в папке {save_path}: нужно около {human_size(disk_space["required_bytes"])}, '
+              f'свободно {human_size(disk_space["free_bytes"])}', file=sys.stderr)
+        if not args.ignore_disk_space:
+            db.close()
+            return 3
+
+    def print_event(event: dict) -> None:
+        print(json.dumps(event, ensure_ascii=False), flush=True)
+
+    engine = DownloadEngine(db, videos, save_path,
+                            max_parallel=max_parallel,
+                            output_mode=output_mode,
+                            on_event=print_event,
+                            archive_mode=archive_mode,
+                            progress_interval=s.THROUGHPUT_UPDATE_INTERVAL)
+    engine.run()
+
+    # Скачанные видеоролики удаляются из очереди, как и после загрузки в окне приложения
+    db.delete_table_videos_by_ids(engine.get_finished_videos())
+    db.close()
+    tracer.close()
+
+    return 1 if engine.get_remaining_videos() else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -1,9 +1,9 @@
 # Файл конфигурации
 
-from downloaders import *
-
-# Словарь загрузчиков видеороликов (ключ - название источника видео, значение - класс загрузчика)
+# Словарь загрузчиков видеороликов (ключ - название источника видео, значение - путь до класса загрузчика).
+# Модуль загрузчика импортируется при первом обращении (см. ``downloaders.tools.get_downloader()``),
+# поэтому youtube_dl и requests не замедляют запуск приложения.
 DOWNLOADERS = {
-    'YouTube': youtube.Youtube,
-    'Twitter': twitter.Twitter,
+    'YouTube': 'downloaders.youtube.Youtube',
+    'Twitter': 'downloaders.twitter.Twitter',
 }
@@ -7,11 +7,98 @@ DEBUG = True
 MAIN_WINDOW_TITLE = 'PyDownloader'
 APP_ICON_PATH = 'resources/icon.png'
 
+# Таблица видеороликов основного окна: количество строк, читаемых из базы данных
+# за один раз, и количество строк, данные которых хранятся в памяти
+VIDEOS_TABLE_PAGE_SIZE = 256
+VIDEOS_TABLE_CACHE_SIZE = 1024
+
 # Путь до файла базы данных
 DB_PATH = 'db/db.sqlite'
+# Время ожидания освобождения базы данных другим соединением (в секундах)
+DB_TIMEOUT = 30
 
-# Таймаут работы потоков скачивания информации о видеоролике и превью (в милисекундах)
+# Таймаут задач скачивания информации о видеоролике и превью (в милисекундах)
 THREAD_WORKING_TIMEOUT = 16000
+# Количество потоков общего пула рабочих потоков окон приложения (см. threads.py)
+WORKER_POOL_SIZE = 4
+
+# Ограничение частоты запросов к интернет-сервисам, чтобы избежать отказа в доступе к видеоролику.
+# Ключ - имя экстрактора, значение - (запросов в секунду, количество запросов подряд без ожидания)
+REQUEST_RATE_LIMITS = {
+    'youtube': (0.5, 3),
+    'twitter': (1.0, 5),
+}
+DEFAULT_REQUEST_RATE_LIMIT = (0.5, 2)
+
+# Размер общего пула объектов YoutubeDL
+YOUTUBE_DL_POOL_SIZE = 8
+
+# Параметры общей HTTP сессии: количество хостов, для которых хранится пул соединений,
+# максимальное количество соединений с одним хостом и количество повторов запроса
+HTTP_POOL_CONNECTIONS = 10
+HTTP_POOL_MAXSIZE = 16
+HTTP_MAX_RETRIES = 2
+# Таймаут HTTP запросов (в секундах)
+HTTP_TIMEOUT = 30
+
+# Многопоточное скачивание медиафайлов, доступных по прямой HTTP ссылке:
+# количество одновременных соединений, размер сегмента файла (в байтах),
+# количество повторов запроса сегмента и размер блока записи (в байтах)
+SEGMENTED_CONNECTIONS = 4
+SEGMENT_SIZE = 8 * 1024 * 1024
+SEGMENT_RETRIES = 3
+DOWNLOAD_BLOCK_SIZE = 64 * 1024
+# Выделять место под весь файл до начала многопоточного скачивания (posix_fallocate, где доступен)
+PREALLOCATE_FILES = True
+
+# Интервал проверки прерывания приостановленной загрузки (в секундах)
+PAUSE_POLL_INTERVAL = 0.5
+
+# Запас свободного места при проверке перед началом скачивания очереди (в байтах)
+DISK_SPACE_RESERVE = 256 * 1024 * 1024
+
+# Ограничения скорости скачивания с отдельных хостов вида {хост: байт/с} (действуют и на поддомены).
+# Общее ограничение скорости задается параметром настроек 'bandwidth_limit' (см. DbManager)
+HOST_BANDWIDTH_LIMITS = {}
+# Объем, который можно скачать подряд без ожидания при ограничении скорости (в секундах скачивания)
+BANDWIDTH_BURST_SECONDS = 0.5
+
+# Время жизни сохраненной в базе данных информации о видеоролике (в секундах)
+VIDEO_INFO_TTL = 4 * 60 * 60
+# Запас времени до истечения срока действия подписанных ссылок на медиафайлы (в секундах)
+VIDEO_INFO_EXPIRE_MARGIN = 15 * 60
+
+# Количество потоков получения информации о видеороликах при добавлении списка ссылок
+BULK_EXTRACT_WORKERS = 4
+
+# Варианты качества при добавлении списка ссылок (название: максимальная высота кадра).
+# None - лучшее доступное качество, AUDIO_FORMAT_PROPERTIES_STRING - только аудио.
+BULK_QUALITY_OPTIONS = {
+    'Лучшее качество': None,
+    'Не выше 2160p': 2160,
+    'Не выше 1440p': 1440,
+    'Не выше 1080p': 1080,
+    'Не выше 720p': 720,
+    'Не выше 480p': 480,
+    'Не выше 360p': 360,
+    'Только аудио': 'Только аудио',
+}
+
+# Семейства видеокодеков для правил выбора формата (название: префиксы названий кодеков youtube_dl)
+VIDEO_CODECS = {
+    'av1': ('av01', 'av1'),
+    'vp9': ('vp09', 'vp9'),
+    'h264': ('avc1', 'h264'),
+}
+
+# Варианты кодеков при добавлении списка ссылок (название: кодеки в порядке предпочтения).
+# Форматы с кодеками не из списка не выбираются, пустой кортеж - любой кодек.
+BULK_CODEC_OPTIONS = {
+    'Любой кодек': (),
+    'AV1, затем VP9, H.264': ('av1', 'vp9', 'h264'),
+    'VP9, затем H.264': ('vp9', 'h264'),
+    'Только H.264': ('h264',),
+}
 
 # Шаблон имени выходного файла (без расширения!)
 OUTPUT_FILE_TEMPLATE = '{extractor}-{title}'
@@ -20,9 +107,65 @@ OUTPUT_FILE_TEMPLATE = '{extractor}-{title}'
 FORMAT_PROPTIES_FPS_TEMPLATE = '{height}p {fps}fps'
 FORMAT_PROPTIES_TEMPLATE = '{height}p'
 
-# Шаблоны строки состояния скачивания видеоролика
-DOWNLOAD_STATUS_TEMPLATE = 'Видео {ind}/{total_videos}  Скачано {downloaded} / {total_bytes}  {status}'
-DOWNLOAD_STATUS_TEMPLATE_WITHOUT_BYTES = 'Видео {ind}/{total_videos}  Скачано {downloaded}  {status}'
+# Шаблоны строки состояния скачивания видеороликов (общий прогресс очереди)
+DOWNLOAD_STATUS_TEMPLATE = 'Готово {done}/{total_videos}  Активно {active}  Обработка {processing}  ' \
+                           'Скачано {downloaded} / {total_bytes}  {speed}/с'
+DOWNLOAD_STATUS_TEMPLATE_WITHOUT_BYTES = 'Готово {done}/{total_videos}  Активно {active}  Обработка {processing}  ' \
+                                         'Скачано {downloaded}  {speed}/с'
+
+# Шаблон текста общего прогресса скачивания (%p - процент, eta - оставшееся время активных загрузок)
+DOWNLOAD_PROGRESS_TEMPLATE = '%p%  Осталось {eta}'
+
+# Максимальное значение параметра 'max_parallel_downloads' (количество одновременных загрузок)
+MAX_PARALLEL_DOWNLOADS_LIMIT = 8
+
+# Интервал обновления прогресса скачивания в окне загрузки (в милисекундах)
+PROGRESS_UPDATE_INTERVAL = 200
+# Интервал вывода прогресса скачивания ``queue_runner.py`` (в милисекундах)
+THROUGHPUT_UPDATE_INTERVAL = 1000
+# Постоянная времени сглаживания скорости скачивания (в секундах)
+PROGRESS_SPEED_TIME_CONSTANT = 3.0
+
+# Интервал сохранения состояния активных загрузок в базе данных (в милисекундах)
+DOWNLOAD_STATE_SAVE_INTERVAL = 5000
+
+# Интервал обработки событий очереди загрузки ``engine.DownloadEngine`` (в милисекундах)
+ENGINE_POLL_INTERVAL = 100
+
+# Режимы формирования выходного файла (ключ - значение параметра 'output_mode', значение - название).
+# Перекодирование выполняется только в режиме 'transcode', в остальных режимах потоки копируются.
+OUTPUT_MODES = {
+    'mp4': 'MP4 без перекодирования',
+    'native': 'Исходный формат файла',
+    'transcode': 'MP4 с перекодированием',
+}
+DEFAULT_OUTPUT_MODE = 'mp4'
+# Название варианта "режим из настроек" для отдельного видеоролика
+GLOBAL_OUTPUT_MODE_NAME = 'Формат файла из настроек'
+
+# Загрузка видеороликов, которые есть в архиве скачанных видеороликов (ключ - значение
+# параметра 'archive_mode', значение - название): 'verify' - пропускать, если файл
+# из архива существует и его размер не изменился, 'skip' - пропускать без проверки,
+# 'off' - скачивать заново
+ARCHIVE_MODES = {
+    'verify': 'Проверять файл',
+    'skip': 'Пропускать',
+    'off': 'Скачивать заново',
+}
+DEFAULT_ARCHIVE_MODE = 'verify'
+
+# Кодеки, которые можно поместить в контейнер mp4 и webm без перекодирования
+# (названия youtube_dl и ffprobe)
+MP4_CODECS = ('avc1', 'h264', 'hev1', 'hvc1', 'hevc', 'av01', 'av1', 'mp4a', 'aac', 'mp3', 'alac')
+WEBM_CODECS = ('vp8', 'vp9', 'vp09', 'av01', 'av1', 'opus', 'vorbis')
+
+# Количество процессов формирования выходных файлов (ffmpeg), работающих параллельно
+# со скачиванием следующих видеороликов. None - количество ядер процессора
+POSTPROCESSING_WORKERS = None
+
+# Кодеки ffmpeg для перекодирования несовместимых с mp4 потоков
+TRANSCODE_VIDEO_CODEC = 'libx264'
+TRANSCODE_AUDIO_CODEC = 'aac'
 
 # Cтрока свойств формата аудио потока
 AUDIO_FORMAT_PROPERTIES_STRING = 'Только аудио'
@@ -30,11 +173,31 @@ AUDIO_FORMAT_PROPERTIES_STRING = 'Только аудио'
 # Разрешенные расширения видеороликов
 ALLOWED_VIDEO_EXTENSIONS = ['mp4', 'webm']
 
+# Расширения выходных файлов (используются для проверки существования файла с тем же именем)
+OUTPUT_EXTENSIONS = ('mp4', 'm4a', 'webm', 'mkv')
+
 # Путь до папки, для превью видеороликов
 THUMBNAILS_DIRECTORY_PATH = 'db/thumbnails'
 
+# Максимальный объем папки превью (в байтах) и имя файла индекса кэша превью
+THUMBNAILS_CACHE_MAX_BYTES = 50 * 1024 * 1024
+THUMBNAILS_CACHE_INDEX_FILENAME = 'index.json'
+
+# Количество масштабированных изображений превью, хранимых в памяти
+PIXMAP_CACHE_SIZE = 64
+
 # Путь до файла логирования
 LOGGING_FILE_PATH = 'logs/logs.log'
 
+# Путь до файла интервалов времени этапов загрузки (JSON lines). None - запись отключена
+TRACE_SPANS_PATH = None
+
+# id видеороликов, загрузка которых профилируется (cProfile, tracemalloc), и папка результатов
+PROFILE_VIDEO_IDS = ()
+PROFILES_DIRECTORY_PATH = 'logs/profiles'
+
+# Количество строк отчета tracemalloc (строки кода с наибольшим объемом выделенной памяти)
+TRACEMALLOC_TOP_LINES = 30
+
 # YoutubeDL-based downloaders: Индекс превью среднего качества
 MEDIUM_QUALITY_THUMBNAIL_INDEX = -2
@@ -1,106 +1,311 @@
-from typing import Type
+import json
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from logging import getLogger
+from threading import Lock
+from typing import Any, Type, Optional
 
 from PyQt5 import QtCore
 
+import settings.settings as s
+from diskspace import check_disk_space
 from downloaders.base import Downloader
+from tracing import get_tracer
 
-__all__ = ('ThumbnailDownloadThread', 'VideoInfoDownloadThread', 'VideoDownloadThread')
+__all__ = ('WorkerTask', 'ThumbnailDownloadTask', 'VideoInfoDownloadTask', 'BulkInfoDownloadTask',
+           'DiskSpaceCheckTask', 'get_worker_pool')
 
 
-class ThumbnailDownloadThread(QtCore.QThread):
+_worker_pool: Optional[ThreadPoolExecutor] = None
+_worker_pool_lock = Lock()
+
+
+def get_worker_pool() -> ThreadPoolExecutor:
+    """
+    Возвращает общий пул рабочих потоков окон приложения
+    (размер - ``settings.WORKER_POOL_SIZE``).
+
+    Returns:
+        Пул потоков.
+    """
+    global _worker_pool
+    with _worker_pool_lock:
+        if _worker_pool is None:
+            _worker_pool = ThreadPoolExecutor(max_workers=s.WORKER_POOL_SIZE, thread_name_prefix='worker')
+        return _worker_pool
+
+
+class WorkerTask(QtCore.QObject):
+    """
+    Базовый класс задачи, выполняемой в общем пуле рабочих потоков (``get_worker_pool()``).
+    Необходим для бесперебойной работы интерфейса окна приложения: потоки пула
+    создаются один раз и переиспользуются всеми задачами.
+
+    Результат метода ``run()`` передается в поток интерфейса и выдается сигналом
+    подкласса (см. ``_emit_result()``), исключение - сигналом ``error_raised``
+    с именем класса исключения. Отмена (``cancel()``) кооперативная: задача,
+    которая еще не начата, не выполняется, начатая задача может проверять
+    ``cancelled``, а ее результат после отмены не выдается. Поток не прерывается
+    принудительно, поэтому задача завершится не позже таймаута своих запросов.
+    """
+
+    error_raised = QtCore.pyqtSignal(str)
+
+    # Передача результата из рабочего потока в поток интерфейса (соединение через очередь)
+    _result_ready = QtCore.pyqtSignal(object)
+    _error_ready = QtCore.pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        QtCore.QObject.__init__(self, parent)
+        self._logger = getLogger(self.__class__.__name__)
+        self._cancelled = False
+        self._future: Optional[Future] = None
+
+        self._result_ready.connect(self._deliver_result)
+        self._error_ready.connect(self._deliver_error)
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    def start(self) -> None:
+        """Передает задачу в общий пул рабочих потоков"""
+        self._future = get_worker_pool().submit(self._execute)
+
+    def cancel(self) -> None:
+        """Отменяет задачу"""
+        self._cancelled = True
+        if self._future is not None:
+            self._future.cancel()
+
+    def is_running(self) -> bool:
+        """Возвращает True, если задача передана в пул и еще не завершена"""
+        return self._future is not None and not self._future.done()
+
+    def run(self) -> Any:
+        """
+        Выполняет задачу в рабочем потоке. Переопределяется подклассами.
+
+        Returns:
+            Результат задачи, передаваемый в ``_emit_result()``.
+        """
+        pass
+
+    def _emit_result(self, result: Any) -> None:
+        """
+        Выдает сигнал подкласса с результатом задачи (в потоке интерфейса).
+        Переопределяется подклассами.
+
+        Args:
+            result: Результат метода ``run()``.
+        """
+        pass
+
+    def _execute(self) -> None:
+        if self._cancelled:
+            return
+        try:
+            result = self.run()
+        except Exception as err:
+            self._logger.error(f'Task failed: {err!r}')
+            self._error_ready.emit(err.__class__.__name__)
+        else:
+            self._result_ready.emit(result)
+
+    def _deliver_result(self, result: Any) -> None:
+        if not self._cancelled:
+            self._emit_result(result)
+
+    def _deliver_error(self, err: str) -> None:
+        if not self._cancelled:
+            self.error_raised.emit(err)
+
+
+class ThumbnailDownloadTask(WorkerTask):
     """
-    Класс потока загрузки превью видеороликов.
-    Необходим для бесперебойной работы интерфейса окна приложения.
+    Задача загрузки превью видеоролика.
 
     Args:
         dl: Объект загрузчика, представлен классом ``downloaders.base.Downloader``.
     """
 
-    error_raised = QtCore.pyqtSignal(str)
     thumbnail_downloaded = QtCore.pyqtSignal(str)
 
     def __init__(self, dl: Downloader, parent=None):
-        QtCore.QThread.__init__(self, parent)
+        WorkerTask.__init__(self, parent)
         self.dl = dl
-        print('tn_dl_thread inited')
 
-    def run(self):
-        try:
+    def run(self) -> Optional[str]:
+        with get_tracer().span('thumbnail', url=self.dl.url):
             tn_path = self.dl.download_thumbnail()
-            print('tn downloaded')
-        except Exception as err:
-            print('Unknown error:', err)
-            self.error_raised.emit(err.__class__.__name__)
-        else:
-            self.thumbnail_downloaded.emit(tn_path)
+        self._logger.debug(f'Thumbnail downloaded: {tn_path}')
+        return tn_path
 
+    def _emit_result(self, tn_path: Optional[str]) -> None:
+        self.thumbnail_downloaded.emit(tn_path or '')
 
-class VideoInfoDownloadThread(QtCore.QThread):
+
+class VideoInfoDownloadTask(WorkerTask):
     """
-    Класс потока загрузки информации о видеоролике.
-    Необходим для бесперебойной работы интерфейса окна приложения.
+    Задача загрузки информации о видеоролике.
+
+    Если передана сохраненная информация о видеоролике и она не устарела,
+    загрузчик создается из нее без обращения к интернет-сервису.
 
     Args:
         dl_class: Класс загрузчика, представлен классом.
         url: URL адрес страницы загружаемого видеоролика.
+        video_info: JSON строка с сохраненной информацией о видеоролике.
+        video_info_time: Время получения сохраненной информации (timestamp).
     """
 
-    error_raised = QtCore.pyqtSignal(str)
     info_downloaded = QtCore.pyqtSignal(Downloader)
 
     def __init__(self,
                  dl_class: Type[Downloader],
                  url: str,
+                 video_info: Optional[str] = None,
+                 video_info_time: Optional[float] = None,
                  parent=None):
-        QtCore.QThread.__init__(self, parent)
+        WorkerTask.__init__(self, parent)
         self.dl_class = dl_class
         self.url = url
-        print('tn_dl_thread inited')
+        self.video_info = video_info
+        self.video_info_time = video_info_time
+
+    def run(self) -> Downloader:
+        video_info = None
+        if self.video_info and self.video_info_time is not None:
+            video_info = json.loads(self.video_info)
+            if self.dl_class.is_video_info_expired(video_info, self.video_info_time):
+                video_info = None
+
+        with get_tracer().span('extract', url=self.url, cached=video_info is not None):
+            if video_info is not None:
+                return self.dl_class(self.url, video_info, self.video_info_time)
+            return self.dl_class(self.url)
+
+    def _emit_result(self, dl: Downloader) -> None:
+        self.info_downloaded.emit(dl)
+
+
+class BulkInfoDownloadTask(WorkerTask):
+    """
+    Задача загрузки информации о списке видеороликов.
+
+    Ссылки на плейлисты и каналы раскрываются в ссылки на видеоролики
+    ("плоское" извлечение), после чего информация о видеороликах загружается
+    пулом из ``settings.BULK_EXTRACT_WORKERS`` потоков (отдельным от общего пула,
+    чтобы задача не ждала освобождения потоков, которые занимает сама).
+    После отмены новые запросы не начинаются, а сигналы ``progress``
+    и ``video_failed``, как и результат, не выдаются.
+
+    Args:
+        dl_class: Класс загрузчика.
+        urls: Список URL адресов видеороликов, плейлистов или каналов.
+    """
+
+    progress = QtCore.pyqtSignal(int, int)
+    video_failed = QtCore.pyqtSignal(str, str)
+    info_downloaded = QtCore.pyqtSignal(list)
+
+    # Передача промежуточных сигналов из рабочих потоков в поток интерфейса
+    _progress_ready = QtCore.pyqtSignal(int, int)
+    _video_failed_ready = QtCore.pyqtSignal(str, str)
+
+    def __init__(self,
+                 dl_class: Type[Downloader],
+                 urls: list[str],
+                 parent=None):
+        WorkerTask.__init__(self, parent)
+        self.dl_class = dl_class
+        self.urls = urls
+
+        self._progress_ready.connect(self._deliver_progress)
+        self._video_failed_ready.connect(self._deliver_video_failed)
+
+    def run(self) -> list[Downloader]:
+        video_urls = []
+        for url in self.urls:
+            if self.cancelled:
+                return []
+            try:
+                video_urls.extend(self.dl_class.extract_urls(url))
+            except Exception as err:
+                self._video_failed_ready.emit(url, err.__class__.__name__)
+
+        # Удаление повторяющихся ссылок с сохранением порядка
+        video_urls = list(dict.fromkeys(video_urls))
 
-    def run(self):
+        downloaders = {}
+        urls = iter(video_urls)
+        futures = {}
+        done = 0
+        executor = ThreadPoolExecutor(max_workers=s.BULK_EXTRACT_WORKERS)
         try:
-            dl_object = self.dl_class(self.url)
-            print('thread: dl inited')
-        except Exception as err:
-            print('Unknown error:', err)
-            self.error_raised.emit(err.__class__.__name__)
-        else:
-            self.info_downloaded.emit(dl_object)
+            while True:
+                # Запросы передаются в пул по мере освобождения потоков, пока задача не отменена
+                while not self.cancelled and len(futures) < s.BULK_EXTRACT_WORKERS and \
+                        (url := next(urls, None)) is not None:
+                    futures[executor.submit(self.dl_class, url)] = url
+                if self.cancelled or not futures:
+                    break
+
+                finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    url = futures.pop(future)
+                    try:
+                        downloaders[url] = future.result()
+                    except Exception as err:
+                        self._video_failed_ready.emit(url, err.__class__.__name__)
+                    done += 1
+                    self._progress_ready.emit(done, len(video_urls))
+        finally:
+            # Начатые запросы отмененной задачи завершаются без ожидания
+            executor.shutdown(wait=False)
+
+        if self.cancelled:
+            return []
+        return [downloaders[url] for url in video_urls if url in downloaders]
 
+    def _emit_result(self, downloaders: list[Downloader]) -> None:
+        self.info_downloaded.emit(downloaders)
 
-class VideoDownloadThread(QtCore.QThread):
+    def _deliver_progress(self, done: int, total: int) -> None:
+        if not self.cancelled:
+            self.progress.emit(done, total)
+
+    def _deliver_video_failed(self, url: str, err: str) -> None:
+        if not self.cancelled:
+            self.video_failed.emit(url, err)
+
+
+class DiskSpaceCheckTask(WorkerTask):
     """
-    Класс потока загрузки видеоролика.
-    Необходим для бесперебойной и безопасной работы интерфейса окна приложения.
+    Задача проверки свободного места в папке сохранения перед скачиванием очереди
+    (см. ``diskspace.check_disk_space()``). Оценка объема разбирает сохраненную
+    информацию о каждом видеоролике, поэтому для длинной очереди выполняется
+    в рабочем потоке.
 
     Args:
-        dl: Объект класса загрузчика, представлен классом, производным от.
-        save_path: Путь до папки сохраниния видеороликов.
-        format_string: Идентификатор формата.
+        videos: Список словарей видеороликов, возвращаемый ``DbManager.get_all_table_videos()``.
+        save_path: Путь до папки сохранения видеороликов.
+        max_parallel: Максимальное количество одновременно скачиваемых видеороликов.
     """
 
-    error_raised = QtCore.pyqtSignal(Exception)
-    downloaded = QtCore.pyqtSignal()
-    download_progress = QtCore.pyqtSignal(int, int, str)
+    checked = QtCore.pyqtSignal(dict)
 
     def __init__(self,
-                 dl: Downloader,
+                 videos: list[dict],
                  save_path: str,
-                 format_string: str,
+                 max_parallel: int = 1,
                  parent=None):
-        QtCore.QThread.__init__(self, parent)
-        self.dl = dl
+        WorkerTask.__init__(self, parent)
+        self.videos = videos
         self.save_path = save_path
-        self.format_string = format_string
-        print('video download thread inited')
+        self.max_parallel = max_parallel
 
-    def run(self):  # t.start()
-        try:
-            self.msleep(5000)  # Для избежания отказа в доступе к видеоролику со стороны интернет-сервиса
-            self.dl.download(on_progress=self.download_progress.emit,
-                             path=self.save_path,
-                             download_format=self.format_string)
-        except Exception as err:
-            self.error_raised.emit(err)
-        else:
-            self.downloaded.emit()
+    def run(self) -> dict:
+        return check_disk_space(self.videos, self.save_path, self.max_parallel)
+
+    def _emit_result(self, disk_space: dict) -> None:
+        self.checked.emit(disk_space)
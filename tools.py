@@ -1,19 +1,17 @@
-from PyQt5.QtWidgets import QWidget, QMessageBox, QCheckBox
 from typing import Optional
 
 import settings.settings as s
 
 __all__ = (
     'human_size',
+    'human_duration',
     'filter_video_formats',
     'get_only_video_formats',
     'get_only_audio_formats',
     'get_audio_video_formats',
     'is_only_video_format',
     'get_thumbnail_extension',
-    'get_thumbnail_path',
-    'notify_with_checkbox',
-    'show_notification'
+    'get_thumbnail_path'
 )
 
 
@@ -38,6 +36,26 @@ def human_size(bytes_size: Optional[int]) -> Optional[str]:
     return f"{bytes_size:.1f}И{suffix}"
 
 
+def human_duration(seconds: Optional[float]) -> str:
+    """
+    Преобразует количество секунд в читаемый для пользователя вид (1:02:03, 2:03)
+
+    Args:
+        seconds: Количество секунд. None - время неизвестно.
+
+    Returns:
+        Строка, содержащая время, или '--:--', если время неизвестно.
+    """
+    if seconds is None:
+        return '--:--'
+
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f'{hours}:{minutes:02}:{seconds:02}'
+    return f'{minutes}:{seconds:02}'
+
+
 def get_thumbnail_path(filename: str) -> str:
     """
     Возвращает путь к файлу превью по имени файла.
@@ -69,7 +87,9 @@ def is_only_video_format(format_: dict) -> bool:
 def filter_video_formats(formats: list[dict]) -> list[dict]:
     """
     Фильтрует список форматов, возвращаемый
-    ``youtube_dl.YoutubeDL.extract_info()``
+    ``youtube_dl.YoutubeDL.extract_info()``, за один проход: из форматов
+    с одинаковой строкой свойств (высота кадра и FPS) остается формат
+    с предпочтительным расширением, при равных расширениях - с большим битрейтом.
 
     Args:
         formats: Список словарей форматов
@@ -77,36 +97,19 @@ def filter_video_formats(formats: list[dict]) -> list[dict]:
     Returns:
         Отфильтрованный список видео-форматов
     """
-    video_formats = filter(
-        lambda x: x['vcodec'] != 'none',
-        formats
-    )
-
-    # удалить все видео с неразрешенными расширениями
-    video_formats = filter(
-        lambda x: x['ext'] in s.ALLOWED_VIDEO_EXTENSIONS,
-        video_formats
-    )
-
-    # formats => formats_dict{'format_string': {'ext': {format}}}
+    # {'format_string': (ранг, {format})}
     formats_dict = {}
-    for f in video_formats:
-        f_string = s.FORMAT_PROPTIES_FPS_TEMPLATE.format(**f)
-        ext = f['ext']
-        if f_string in formats_dict:
-            formats_dict[f_string][ext] = f
-        else:
-            formats_dict[f_string] = {ext: f}
+    for f in formats:
+        # удалить все аудио форматы и видео с неразрешенными расширениями
+        if f['vcodec'] == 'none' or f['ext'] not in s.ALLOWED_VIDEO_EXTENSIONS:
+            continue
 
-    # formats_dict => filtered_formats[{format}]
-    filtered_formats = []
-    for _, d in formats_dict.items():
-        filtered_formats.append(max(
-            d.items(),
-            key=lambda x: s.ALLOWED_VIDEO_EXTENSIONS.index(x[0])
-        )[1])
+        f_string = s.FORMAT_PROPTIES_FPS_TEMPLATE.format_map(f)
+        rank = (s.ALLOWED_VIDEO_EXTENSIONS.index(f['ext']), f.get('tbr') or 0)
+        if f_string not in formats_dict or rank >= formats_dict[f_string][0]:
+            formats_dict[f_string] = (rank, f)
 
-    return filtered_formats
+    return [f for _, f in formats_dict.values()]
 
 
 def get_only_audio_formats(formats: list[dict]) -> list[dict]:
@@ -171,50 +174,3 @@ def get_thumbnail_extension(url: str) -> str:
         Расширение файла изображения превью
     """
     return url.split('?')[0].split('.')[-1]
-
-
-def notify_with_checkbox(window: QWidget,
-                         title: str,
-                         text: str) -> tuple[bool, bool]:
-    """
-    Показывает окно-предупреждение с возможностью отмены действия и
-    флажком "Больше не спрашивать".
-
-    Args:
-        window: Объект родительского окна.
-        title: Заголовок окна-предупреждения
-        text: Текст окна-предупреждения
-
-    Returns:
-        notify_with_checkbox: Кортеж с двумя элементами типа bool - нажал ли пользователь кнопку
-                              "Продолжить" и установлен ли флажок "Больше не спрашивать".
-    """
-    message_box = QMessageBox(window)
-    message_box.setWindowTitle(title)
-    message_box.setText(text)
-    message_box.setIcon(QMessageBox.Warning)
-    message_box.addButton('Отмена', QMessageBox.RejectRole)
-    message_box.addButton('Продолжить', QMessageBox.AcceptRole)
-
-    checkbox = QCheckBox('Больше не спрашивать')
-    message_box.setCheckBox(checkbox)
-
-    accepted = message_box.exec()
-    checkbox_checked = message_box.checkBox().isChecked()
-
-    return accepted, checkbox_checked
-
-
-def show_notification(window: QWidget,
-                      title: str,
-                      text: str) -> None:
-    """
-    Показывает окно-уведомление с кнопкой "ОК"
-
-    Args:
-        window: Объект родительского окна.
-        title: Заголовок окна.
-        text: Текст уведомления.
-    """
-    QMessageBox.information(window, title, text,
-                            defaultButton=QMessageBox.Ok)
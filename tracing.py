@@ -0,0 +1,299 @@
+import atexit
+import json
+import os
+import threading
+import time
+from logging import getLogger
+from typing import Any, Iterable, Optional
+
+import settings.settings as s
+
+__all__ = ('Tracer', 'get_tracer', 'configure_tracing')
+
+_logger = getLogger(__name__)
+
+
+class _NullSpan:
+    """Интервал отключенной записи: ничего не измеряет и не записывает"""
+
+    __slots__ = ()
+
+    def __enter__(self) -> '_NullSpan':
+        return self
+
+    def __exit__(self, *_) -> bool:
+        return False
+
+    def set(self, **attrs) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """
+    Интервал времени этапа загрузки. Используется как контекстный менеджер:
+    при выходе из блока ``with`` интервал записывается с результатом 'ok'
+    или 'error' (если блок завершился исключением, записывается имя его класса).
+    """
+
+    __slots__ = ('tracer', 'name', 'video_id', 'attrs', 'start', '_began')
+
+    def __init__(self, tracer: 'Tracer', name: str, video_id: Optional[int], attrs: dict):
+        self.tracer = tracer
+        self.name = name
+        self.video_id = video_id
+        self.attrs = attrs
+
+    def __enter__(self) -> 'Span':
+        self.start = time.time()
+        self._began = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        if exc_type is not None:
+            self.attrs.setdefault('outcome', 'error')
+            self.attrs.setdefault('error', exc_type.__name__)
+        self.tracer.record(self.name, self.video_id, self.start, time.perf_counter() - self._began, **self.attrs)
+        return False
+
+    def set(self, **attrs) -> None:
+        """Добавляет атрибуты интервала (например, ``bytes`` или ``outcome``)"""
+        self.attrs.update(attrs)
+
+
+class _Job:
+    """
+    Контекст загрузки одного видеоролика в текущем потоке (см. ``Tracer.job()``).
+    Ошибки профилирования записываются в лог и не прерывают загрузку.
+    """
+
+    __slots__ = ('tracer', 'video_id', 'previous', 'profiler', 'started_tracemalloc')
+
+    def __init__(self, tracer: 'Tracer', video_id: int):
+        self.tracer = tracer
+        self.video_id = video_id
+        self.profiler = None
+        self.started_tracemalloc = False
+
+    def __enter__(self) -> '_Job':
+        local = self.tracer._local
+        self.previous = getattr(local, 'video_id', None)
+        local.video_id = self.video_id
+
+        if self.video_id in self.tracer.profile_video_ids:
+            try:
+                self._start_profile()
+            except Exception as err:
+                _logger.error(f'Profiling of video {self.video_id} is not started: {err!r}')
+                self._stop_profile()
+        return self
+
+    def __exit__(self, *_) -> bool:
+        self.tracer._local.video_id = self.previous
+        if self.profiler is not None:
+            try:
+                self._save_profile()
+            except Exception as err:
+                _logger.error(f'Profile of video {self.video_id} is not saved: {err!r}')
+            finally:
+                self._stop_profile()
+        return False
+
+    def _start_profile(self) -> None:
+        import cProfile
+        import tracemalloc
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracemalloc = True
+        self.profiler = cProfile.Profile()
+        self.profiler.enable()
+
+    def _stop_profile(self) -> None:
+        """Отключает профилирование, если оно еще включено"""
+        import tracemalloc
+
+        if self.profiler is not None:
+            self.profiler.disable()
+            self.profiler = None
+        if self.started_tracemalloc:
+            tracemalloc.stop()
+            self.started_tracemalloc = False
+
+    def _save_profile(self) -> None:
+        import tracemalloc
+
+        self.profiler.disable()
+        snapshot = tracemalloc.take_snapshot()
+        if self.started_tracemalloc:
+            tracemalloc.stop()
+            self.started_tracemalloc = False
+
+        os.makedirs(self.tracer.profiles_path, exist_ok=True)
+        base_path = os.path.join(self.tracer.profiles_path, f'{self.video_id}-{time.strftime("%Y%m%d-%H%M%S")}')
+
+        self.profiler.dump_stats(f'{base_path}.prof')
+        with open(f'{base_path}.tracemalloc.txt', 'w', encoding='utf-8') as handle:
+            for stat in snapshot.statistics('lineno')[:s.TRACEMALLOC_TOP_LINES]:
+                handle.write(f'{stat}\n')
+
+        self.tracer.record('profile', self.video_id, time.time(), 0.0,
+                           cprofile_path=f'{base_path}.prof',
+                           tracemalloc_path=f'{base_path}.tracemalloc.txt')
+
+
+class Tracer:
+    """
+    Запись интервалов времени этапов загрузки видеороликов для анализа производительности.
+
+    Каждый интервал записывается отдельной строкой JSON в файл ``spans_path``:
+    ``name`` (этап: 'extract', 'thumbnail', 'wait', 'transfer', 'postprocess', ...),
+    ``video_id``, ``start`` (timestamp), ``duration`` (в секундах), ``outcome``
+    ('ok' или 'error'), ``thread`` и атрибуты этапа (например, ``bytes``).
+
+    Интервалы, начатые внутри ``job(video_id)``, относятся к этому видеоролику,
+    поэтому загрузчикам не нужно знать id видеоролика. Для видеороликов из
+    ``profile_video_ids`` рабочий поток загрузки профилируется cProfile, а память
+    отслеживается tracemalloc (во всех потоках процесса); результаты сохраняются
+    в папку ``profiles_path``. Формирование выходного файла выполняется в отдельном
+    процессе и не профилируется.
+
+    Если запись и профилирование отключены, ``span()`` и ``job()`` возвращают общий
+    пустой контекстный менеджер, не обращаясь к часам и файлу.
+
+    Args:
+        spans_path: Путь файла интервалов (JSON lines). None - запись отключена.
+        profile_video_ids: id видеороликов, загрузка которых профилируется.
+        profiles_path: Папка файлов профилирования.
+    """
+
+    def __init__(self,
+                 spans_path: Optional[str] = None,
+                 profile_video_ids: Iterable[int] = (),
+                 profiles_path: str = s.PROFILES_DIRECTORY_PATH):
+        self.spans_path = spans_path
+        self.profile_video_ids = frozenset(profile_video_ids)
+        self.profiles_path = profiles_path
+        self.enabled = spans_path is not None
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._file = None
+
+    def span(self, name: str, video_id: Optional[int] = None, **attrs) -> Any:
+        """
+        Возвращает контекстный менеджер интервала этапа.
+
+        Args:
+            name: Название этапа.
+            video_id: id видеоролика (по умолчанию - видеоролик текущего ``job()``).
+            **attrs: Атрибуты интервала.
+
+        Returns:
+            Объект ``Span`` (или пустой интервал, если запись отключена).
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        if video_id is None:
+            video_id = getattr(self._local, 'video_id', None)
+        return Span(self, name, video_id, attrs)
+
+    def job(self, video_id: int) -> Any:
+        """
+        Возвращает контекстный менеджер загрузки видеоролика в текущем потоке:
+        интервалы внутри него относятся к ``video_id``, а при необходимости
+        поток профилируется.
+
+        Args:
+            video_id: id видеоролика.
+        """
+        if not self.enabled and not self.profile_video_ids:
+            return _NULL_SPAN
+        return _Job(self, video_id)
+
+    def record(self,
+               name: str,
+               video_id: Optional[int],
+               start: float,
+               duration: float,
+               outcome: str = 'ok',
+               **attrs) -> None:
+        """
+        Записывает интервал, измеренный вызывающим кодом (например, этап,
+        выполнявшийся в другом процессе). Если файл интервалов недоступен,
+        ошибка записывается в лог, а запись интервалов отключается.
+
+        Args:
+            name: Название этапа.
+            video_id: id видеоролика.
+            start: Время начала этапа (timestamp).
+            duration: Длительность этапа в секундах.
+            outcome: Результат этапа.
+            **attrs: Атрибуты интервала.
+        """
+        if not self.enabled:
+            return
+
+        line = json.dumps({'name': name, 'video_id': video_id, 'start': round(start, 6),
+                           'duration': round(duration, 6), 'outcome': outcome,
+                           'thread': threading.current_thread().name, **attrs},
+                          ensure_ascii=False, default=str)
+        with self._lock:
+            if not self.enabled:  # отключена из-за ошибки записи в другом потоке
+                return
+            try:
+                if self._file is None:
+                    if directory := os.path.dirname(self.spans_path):
+                        os.makedirs(directory, exist_ok=True)
+                    self._file = open(self.spans_path, 'a', encoding='utf-8', buffering=1)
+                    atexit.register(self.close)
+                self._file.write(line + '\n')
+            except OSError as err:
+                _logger.error(f'Spans are not written to {self.spans_path}, tracing is disabled: {err!r}')
+                self.enabled = False
+
+    def close(self) -> None:
+        """Закрывает файл интервалов"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def configure_tracing(spans_path: Optional[str] = s.TRACE_SPANS_PATH,
+                      profile_video_ids: Iterable[int] = s.PROFILE_VIDEO_IDS,
+                      profiles_path: str = s.PROFILES_DIRECTORY_PATH) -> Tracer:
+    """
+    Заменяет общий объект записи интервалов (параметры - как у ``Tracer``).
+
+    Returns:
+        Новый объект записи интервалов.
+    """
+    global _tracer
+    with _tracer_lock:
+        if _tracer is not None:
+            _tracer.close()
+        _tracer = Tracer(spans_path, profile_video_ids, profiles_path)
+        return _tracer
+
+
+def get_tracer() -> Tracer:
+    """
+    Возвращает общий для всего процесса объект записи интервалов. По умолчанию
+    он настраивается параметрами ``settings.TRACE_SPANS_PATH`` и ``settings.PROFILE_VIDEO_IDS``.
+
+    Returns:
+        Объект записи интервалов.
+    """
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                _tracer = Tracer(s.TRACE_SPANS_PATH, s.PROFILE_VIDEO_IDS, s.PROFILES_DIRECTORY_PATH)
+    return _tracer
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+
+# Form implementation generated from reading ui file 'sources/bulk_add_dialog.ui'
+#
+# Created by: PyQt5 UI code generator 5.15.6
+#
+# WARNING: Any manual changes made to this file will be lost when pyuic5 is
+# run again.  Do not edit this file unless you know what you are doing.
+
+
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+
+class Ui_BulkAddDialog(object):
+    def setupUi(self, BulkAddDialog):
+        BulkAddDialog.setObjectName("BulkAddDialog")
+        BulkAddDialog.resize(646, 588)
+        BulkAddDialog.setStyleSheet("* {background: rgb(248, 248, 249);}\n"
+"\n"
+"QLabel {\n"
+"    color: #121212;\n"
+"    font-size: 16px;\n"
+"}\n"
+"\n"
+"QComboBox,\n"
+"QPushButton,\n"
+"QTableView,\n"
+"QPlainTextEdit,\n"
+"QProgressBar,\n"
+"QSpinBox,\n"
+"QLineEdit {\n"
+"    border-color: #d9dadb;\n"
+"    border-style: solid;\n"
+"    border-width: 1px;\n"
+"    border-radius: 5px;\n"
+"    color: #121212;\n"
+"}\n"
+"\n"
+"QPushButton,\n"
+"QTableView,\n"
+"QPlainTextEdit,\n"
+"QProgressBar,\n"
+"QSpinBox,\n"
+"QLineEdit,\n"
+"QComboBox:editable {\n"
+"    background: #fff;\n"
+"}\n"
+"\n"
+"QComboBox,\n"
+"QSpinBox,\n"
+"QLineEdit {\n"
+"    padding-left: 8px;\n"
+"}\n"
+"\n"
+"QProgressBar {text-align: center;}\n"
+"\n"
+"QComboBox:!editable {\n"
+"    background: #e8e8e9;\n"
+"}\n"
+"\n"
+"QComboBox::drop-down {\n"
+"    subcontrol-origin: padding;\n"
+"    subcontrol-position: top right;\n"
+"    width: 18px;\n"
+"    border-top-right-radius: 5px;\n"
+"    border-bottom-right-radius: 5px;\n"
+"    padding-right: 6px;\n"
+"}\n"
+"\n"
+"QComboBox::down-arrow {\n"
+"    image: url(resources/down_arrow.svg);\n"
+"}\n"
+"\n"
+"QPushButton {\n"
+"    padding: 3px 7px\n"
+"}\n"
+"\n"
+"QPushButton:disabled {\n"
+"    color: #2d2d2f;\n"
+"    background: #d9d9da;\n"
+"    border-color: #c3c5c6;\n"
+"}\n"
+"\n"
+"QPushButton:pressed {\n"
+"    background: #f4f4f5;\n"
+"}")
+        self.resource_box_label = QtWidgets.QLabel(BulkAddDialog)
+        self.resource_box_label.setGeometry(QtCore.QRect(30, 20, 191, 19))
+        self.resource_box_label.setObjectName("resource_box_label")
+        self.resource_box = QtWidgets.QComboBox(BulkAddDialog)
+        self.resource_box.setGeometry(QtCore.QRect(30, 46, 581, 33))
+        self.resource_box.setEditable(True)
+        self.resource_box.setObjectName("resource_box")
+        self.urls_label = QtWidgets.QLabel(BulkAddDialog)
+        self.urls_label.setGeometry(QtCore.QRect(30, 94, 581, 19))
+        self.urls_label.setObjectName("urls_label")
+        self.urls_edit = QtWidgets.QPlainTextEdit(BulkAddDialog)
+        self.urls_edit.setGeometry(QtCore.QRect(30, 119, 581, 181))
+        self.urls_edit.setObjectName("urls_edit")
+        self.quality_label = QtWidgets.QLabel(BulkAddDialog)
+        self.quality_label.setGeometry(QtCore.QRect(30, 315, 171, 19))
+        self.quality_label.setObjectName("quality_label")
+        self.quality_box = QtWidgets.QComboBox(BulkAddDialog)
+        self.quality_box.setGeometry(QtCore.QRect(30, 341, 281, 33))
+        self.quality_box.setEditable(False)
+        self.quality_box.setObjectName("quality_box")
+        self.codec_label = QtWidgets.QLabel(BulkAddDialog)
+        self.codec_label.setGeometry(QtCore.QRect(330, 315, 281, 19))
+        self.codec_label.setObjectName("codec_label")
+        self.codec_box = QtWidgets.QComboBox(BulkAddDialog)
+        self.codec_box.setGeometry(QtCore.QRect(330, 341, 281, 33))
+        self.codec_box.setEditable(False)
+        self.codec_box.setObjectName("codec_box")
+        self.bytes_per_minute_label = QtWidgets.QLabel(BulkAddDialog)
+        self.bytes_per_minute_label.setGeometry(QtCore.QRect(30, 389, 181, 19))
+        self.bytes_per_minute_label.setObjectName("bytes_per_minute_label")
+        self.bytes_per_minute_box = QtWidgets.QSpinBox(BulkAddDialog)
+        self.bytes_per_minute_box.setGeometry(QtCore.QRect(30, 415, 181, 33))
+        self.bytes_per_minute_box.setMaximum(100000)
+        self.bytes_per_minute_box.setObjectName("bytes_per_minute_box")
+        self.total_bytes_label = QtWidgets.QLabel(BulkAddDialog)
+        self.total_bytes_label.setGeometry(QtCore.QRect(230, 389, 181, 19))
+        self.total_bytes_label.setObjectName("total_bytes_label")
+        self.total_bytes_box = QtWidgets.QSpinBox(BulkAddDialog)
+        self.total_bytes_box.setGeometry(QtCore.QRect(230, 415, 181, 33))
+        self.total_bytes_box.setMaximum(100000)
+        self.total_bytes_box.setObjectName("total_bytes_box")
+        self.separate_audio_box = QtWidgets.QCheckBox(BulkAddDialog)
+        self.separate_audio_box.setGeometry(QtCore.QRect(430, 415, 181, 33))
+        self.separate_audio_box.setChecked(True)
+        self.separate_audio_box.setObjectName("separate_audio_box")
+        self.status_label = QtWidgets.QLabel(BulkAddDialog)
+        self.status_label.setGeometry(QtCore.QRect(30, 463, 581, 19))
+        self.status_label.setObjectName("status_label")
+        self.progress_bar = QtWidgets.QProgressBar(BulkAddDialog)
+        self.progress_bar.setGeometry(QtCore.QRect(30, 489, 581, 25))
+        self.progress_bar.setProperty("value", 0)
+        self.progress_bar.setObjectName("progress_bar")
+        self.cancel_button = QtWidgets.QPushButton(BulkAddDialog)
+        self.cancel_button.setGeometry(QtCore.QRect(370, 537, 111, 30))
+        self.cancel_button.setObjectName("cancel_button")
+        self.add_button = QtWidgets.QPushButton(BulkAddDialog)
+        self.add_button.setEnabled(False)
+        self.add_button.setGeometry(QtCore.QRect(500, 537, 111, 30))
+        self.add_button.setObjectName("add_button")
+
+        self.retranslateUi(BulkAddDialog)
+        QtCore.QMetaObject.connectSlotsByName(BulkAddDialog)
+
+    def retranslateUi(self, BulkAddDialog):
+        _translate = QtCore.QCoreApplication.translate
+        BulkAddDialog.setWindowTitle(_translate("BulkAddDialog", "Dialog"))
+        self.resource_box_label.setText(_translate("BulkAddDialog", "Источник:"))
+        self.urls_label.setText(_translate("BulkAddDialog", "Ссылки на видеоролики или плейлисты (по одной в строке):"))
+        self.quality_label.setText(_translate("BulkAddDialog", "Качество видеороликов:"))
+        self.codec_label.setText(_translate("BulkAddDialog", "Кодек видео:"))
+        self.bytes_per_minute_label.setText(_translate("BulkAddDialog", "Объем минуты:"))
+        self.bytes_per_minute_box.setSpecialValueText(_translate("BulkAddDialog", "Без ограничения"))
+        self.bytes_per_minute_box.setSuffix(_translate("BulkAddDialog", " МБ"))
+        self.total_bytes_label.setText(_translate("BulkAddDialog", "Общий объем:"))
+        self.total_bytes_box.setSpecialValueText(_translate("BulkAddDialog", "Без ограничения"))
+        self.total_bytes_box.setSuffix(_translate("BulkAddDialog", " ГБ"))
+        self.separate_audio_box.setToolTip(_translate("BulkAddDialog", "Разрешить форматы \"только видео\", которые скачиваются вместе с отдельной аудиодорожкой"))
+        self.separate_audio_box.setText(_translate("BulkAddDialog", "Отдельное аудио"))
+        self.status_label.setText(_translate("BulkAddDialog", "Вставьте ссылки и нажмите \"Добавить\""))
+        self.cancel_button.setText(_translate("BulkAddDialog", "Отменить"))
+        self.add_button.setText(_translate("BulkAddDialog", "Добавить"))
@@ -184,6 +184,28 @@ class Ui_MainWindow(object):
         self.edit_video_button.setEnabled(False)
         self.edit_video_button.setGeometry(QtCore.QRect(330, 411, 131, 31))
         self.edit_video_button.setObjectName("edit_video_button")
+        self.bulk_add_button = QtWidgets.QPushButton(self.centralwidget)
+        self.bulk_add_button.setGeometry(QtCore.QRect(470, 411, 161, 31))
+        self.bulk_add_button.setObjectName("bulk_add_button")
+        self.parallel_downloads_label = QtWidgets.QLabel(self.centralwidget)
+        self.parallel_downloads_label.setGeometry(QtCore.QRect(280, 562, 241, 21))
+        self.parallel_downloads_label.setObjectName("parallel_downloads_label")
+        self.parallel_downloads_box = QtWidgets.QSpinBox(self.centralwidget)
+        self.parallel_downloads_box.setGeometry(QtCore.QRect(520, 557, 61, 31))
+        self.parallel_downloads_box.setMinimum(1)
+        self.parallel_downloads_box.setObjectName("parallel_downloads_box")
+        self.output_mode_label = QtWidgets.QLabel(self.centralwidget)
+        self.output_mode_label.setGeometry(QtCore.QRect(600, 528, 211, 21))
+        self.output_mode_label.setObjectName("output_mode_label")
+        self.output_mode_box = QtWidgets.QComboBox(self.centralwidget)
+        self.output_mode_box.setGeometry(QtCore.QRect(600, 557, 211, 31))
+        self.output_mode_box.setObjectName("output_mode_box")
+        self.archive_mode_label = QtWidgets.QLabel(self.centralwidget)
+        self.archive_mode_label.setGeometry(QtCore.QRect(280, 522, 141, 31))
+        self.archive_mode_label.setObjectName("archive_mode_label")
+        self.archive_mode_box = QtWidgets.QComboBox(self.centralwidget)
+        self.archive_mode_box.setGeometry(QtCore.QRect(420, 522, 161, 31))
+        self.archive_mode_box.setObjectName("archive_mode_box")
         MainWindow.setCentralWidget(self.centralwidget)
 
         self.retranslateUi(MainWindow)
@@ -200,3 +222,7 @@ class Ui_MainWindow(object):
         self.save_dir_label.setText(_translate("MainWindow", "Выберите папку для сохранения файлов"))
         self.delete_video_button.setText(_translate("MainWindow", "Удалить"))
         self.edit_video_button.setText(_translate("MainWindow", "Редактировать"))
+        self.bulk_add_button.setText(_translate("MainWindow", "Добавить список"))
+        self.parallel_downloads_label.setText(_translate("MainWindow", "Одновременных загрузок:"))
+        self.output_mode_label.setText(_translate("MainWindow", "Формат файла:"))
+        self.archive_mode_label.setText(_translate("MainWindow", "Скачанные ранее:"))
@@ -2,4 +2,5 @@
 Set-Location C:\My\code\Working\pyqt_project\ui
 pyuic5 sources/main_window.ui -o main_window_ui.py
 pyuic5 sources/video_dialog_ui.ui -o video_dialog_ui.py
-pyuic5 sources/video_download_dialog.ui -o video_download_dialog_ui.py
\ No newline at end of file
+pyuic5 sources/video_download_dialog.ui -o video_download_dialog_ui.py
+pyuic5 sources/bulk_add_dialog.ui -o bulk_add_dialog_ui.py
\ No newline at end of file
@@ -125,6 +125,9 @@ class Ui_VideoDialog(object):
         self.resource_box_label = QtWidgets.QLabel(VideoDialog)
         self.resource_box_label.setGeometry(QtCore.QRect(30, 20, 191, 19))
         self.resource_box_label.setObjectName("resource_box_label")
+        self.output_mode_box = QtWidgets.QComboBox(VideoDialog)
+        self.output_mode_box.setGeometry(QtCore.QRect(30, 443, 321, 30))
+        self.output_mode_box.setObjectName("output_mode_box")
 
         self.retranslateUi(VideoDialog)
         QtCore.QMetaObject.connectSlotsByName(VideoDialog)
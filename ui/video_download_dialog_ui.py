@@ -14,7 +14,7 @@ from PyQt5 import QtCore, QtGui, QtWidgets
 class Ui_VideoDownloadDialog(object):
     def setupUi(self, VideoDownloadDialog):
         VideoDownloadDialog.setObjectName("VideoDownloadDialog")
-        VideoDownloadDialog.resize(662, 337)
+        VideoDownloadDialog.resize(662, 537)
         VideoDownloadDialog.setStyleSheet("* {background: rgb(248, 248, 249);}\n"
 "\n"
 "QLabel {\n"
@@ -23,7 +23,9 @@ class Ui_VideoDownloadDialog(object):
 "}\n"
 "\n"
 "QPushButton,\n"
-"QProgressBar {\n"
+"QProgressBar,\n"
+"QDoubleSpinBox,\n"
+"QTableWidget {\n"
 "    border-color: #d9dadb;\n"
 "    border-style: solid;\n"
 "    border-width: 1px;\n"
@@ -34,6 +36,10 @@ class Ui_VideoDownloadDialog(object):
 "\n"
 "QProgressBar {text-align: center;}\n"
 "\n"
+"QDoubleSpinBox {\n"
+"    padding-left: 8px;\n"
+"}\n"
+"\n"
 "QPushButton {\n"
 "    padding: 3px 7px\n"
 "}\n"
@@ -52,11 +58,11 @@ class Ui_VideoDownloadDialog(object):
         self.progress_bar.setProperty("value", 0)
         self.progress_bar.setObjectName("progress_bar")
         self.pause_button = QtWidgets.QPushButton(VideoDownloadDialog)
-        self.pause_button.setGeometry(QtCore.QRect(350, 280, 141, 30))
+        self.pause_button.setGeometry(QtCore.QRect(350, 480, 141, 30))
         self.pause_button.setObjectName("pause_button")
         self.stop_button = QtWidgets.QPushButton(VideoDownloadDialog)
         self.stop_button.setEnabled(True)
-        self.stop_button.setGeometry(QtCore.QRect(500, 280, 131, 30))
+        self.stop_button.setGeometry(QtCore.QRect(500, 480, 131, 30))
         self.stop_button.setStyleSheet("color: #fff;\n"
 "background: rgb(233, 81, 68);\n"
 "border-color: rgb(179, 59, 39);")
@@ -93,6 +99,29 @@ class Ui_VideoDownloadDialog(object):
         self.status_label = QtWidgets.QLabel(VideoDownloadDialog)
         self.status_label.setGeometry(QtCore.QRect(30, 208, 601, 19))
         self.status_label.setObjectName("status_label")
+        self.queue_table = QtWidgets.QTableWidget(VideoDownloadDialog)
+        self.queue_table.setGeometry(QtCore.QRect(30, 275, 601, 186))
+        self.queue_table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.queue_table.setSelectionMode(QtWidgets.QAbstractItemView.NoSelection)
+        self.queue_table.setColumnCount(3)
+        self.queue_table.setObjectName("queue_table")
+        self.queue_table.setRowCount(0)
+        item = QtWidgets.QTableWidgetItem()
+        self.queue_table.setHorizontalHeaderItem(0, item)
+        item = QtWidgets.QTableWidgetItem()
+        self.queue_table.setHorizontalHeaderItem(1, item)
+        item = QtWidgets.QTableWidgetItem()
+        self.queue_table.setHorizontalHeaderItem(2, item)
+        self.queue_table.verticalHeader().setVisible(False)
+        self.bandwidth_limit_label = QtWidgets.QLabel(VideoDownloadDialog)
+        self.bandwidth_limit_label.setGeometry(QtCore.QRect(30, 485, 86, 19))
+        self.bandwidth_limit_label.setObjectName("bandwidth_limit_label")
+        self.bandwidth_limit_box = QtWidgets.QDoubleSpinBox(VideoDownloadDialog)
+        self.bandwidth_limit_box.setGeometry(QtCore.QRect(120, 479, 201, 32))
+        self.bandwidth_limit_box.setDecimals(1)
+        self.bandwidth_limit_box.setMaximum(1000.0)
+        self.bandwidth_limit_box.setSingleStep(0.5)
+        self.bandwidth_limit_box.setObjectName("bandwidth_limit_box")
         self.decorative_label.raise_()
         self.progress_bar.raise_()
         self.pause_button.raise_()
@@ -101,6 +130,9 @@ class Ui_VideoDownloadDialog(object):
         self.thumbnail_label.raise_()
         self.video_title_label.raise_()
         self.status_label.raise_()
+        self.queue_table.raise_()
+        self.bandwidth_limit_label.raise_()
+        self.bandwidth_limit_box.raise_()
 
         self.retranslateUi(VideoDownloadDialog)
         QtCore.QMetaObject.connectSlotsByName(VideoDownloadDialog)
@@ -112,3 +144,12 @@ class Ui_VideoDownloadDialog(object):
         self.stop_button.setText(_translate("VideoDownloadDialog", "Завершить"))
         self.now_downloads_label.setText(_translate("VideoDownloadDialog", "Сейчас скачивается:"))
         self.status_label.setText(_translate("VideoDownloadDialog", "Подготовка к скачиванию..."))
+        item = self.queue_table.horizontalHeaderItem(0)
+        item.setText(_translate("VideoDownloadDialog", "Заголовок"))
+        item = self.queue_table.horizontalHeaderItem(1)
+        item.setText(_translate("VideoDownloadDialog", "Статус"))
+        item = self.queue_table.horizontalHeaderItem(2)
+        item.setText(_translate("VideoDownloadDialog", "Прогресс"))
+        self.bandwidth_limit_label.setText(_translate("VideoDownloadDialog", "Скорость:"))
+        self.bandwidth_limit_box.setSpecialValueText(_translate("VideoDownloadDialog", "Без ограничения"))
+        self.bandwidth_limit_box.setSuffix(_translate("VideoDownloadDialog", " МБ/с"))
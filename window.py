@@ -1,14 +1,21 @@
 # -*- coding: utf-8 -*-
 import logging
+import os
+import re
+from functools import partial
 
 from PyQt5 import QtWidgets, QtGui
 from PyQt5.QtCore import Qt, QModelIndex
 
 import settings.settings as s
-from tools import notify_with_checkbox
+from gui_tools import notify_with_checkbox
+from tools import human_size
 from downloaders.base import Downloader
+from downloaders.thumbnails import get_thumbnail_cache
 from db.manager import DbManager
-from dialogs import EditVideoDialog, VideoDownloadDialog
+from models import VideosTableModel
+from dialogs import EditVideoDialog, BulkAddDialog, VideoDownloadDialog
+from threads import DiskSpaceCheckTask
 from ui.main_window_ui import Ui_MainWindow
 
 __all__ = ('MainAppWindow',)
@@ -26,28 +33,21 @@ class MainAppWindow(QtWidgets.QMainWindow, Ui_MainWindow):
         self._logger = logging.getLogger(self.__class__.__name__)
         self.db = DbManager()
         self.save_dir = None
+        self.disk_space_task = None
+
+        # Превью видеороликов таблицы не вытесняются из кэша превью
+        get_thumbnail_cache().set_referenced_files_getter(self.db.get_thumbnail_filenames)
 
         # Настройка окна
         self.setWindowTitle(s.MAIN_WINDOW_TITLE)
         self.setWindowIcon(QtGui.QIcon(s.APP_ICON_PATH))
         self.setFixedSize(self.width(), self.height())
 
-        # Создание модели для таблицы videos_table
-        self.table_model = QtGui.QStandardItemModel(0, 3, parent=self)
-
-        for row_index, video in enumerate(self.db.get_all_table_videos()):
-            row_items = [
-                QtGui.QStandardItem(video['resource']),
-                QtGui.QStandardItem(video['title']),
-                QtGui.QStandardItem(video['format_name']),
-            ]
-            self.table_model.appendRow(row_items)
-            index = self.table_model.index(row_index, 0)
-            self.table_model.setData(index, video['id'], role=Qt.UserRole)
+        # Создание модели для таблицы videos_table (строки читаются из базы данных по мере прокрутки)
+        self.table_model = VideosTableModel(self.db, parent=self)
 
         # Настройка таблицы videos_table
         self.videos_table.setModel(self.table_model)
-        self.table_model.setHorizontalHeaderLabels(['Источник', 'Заголовок', 'Формат'])
 
         self.videos_table.setColumnWidth(0, 110)
         self.videos_table.setColumnWidth(1, 500)
@@ -68,10 +68,27 @@ class MainAppWindow(QtWidgets.QMainWindow, Ui_MainWindow):
 
         self.start_button.clicked.connect(self.start_button_clicked)
         self.add_video_button.clicked.connect(self.add_video_button_clicked)
+        self.bulk_add_button.clicked.connect(self.bulk_add_button_clicked)
         self.delete_video_button.clicked.connect(self.delete_video_button_clicked)
         self.edit_video_button.clicked.connect(self.edit_video_button_clicked)
         self.select_dir_button.clicked.connect(self.select_dir_button_clicked)
 
+        self.parallel_downloads_box.setMaximum(s.MAX_PARALLEL_DOWNLOADS_LIMIT)
+        self.parallel_downloads_box.setValue(int(self.db.get_setting('max_parallel_downloads')))
+        self.parallel_downloads_box.valueChanged.connect(self.parallel_downloads_changed)
+
+        for mode, mode_name in s.OUTPUT_MODES.items():
+            self.output_mode_box.addItem(mode_name, mode)
+        output_mode_index = self.output_mode_box.findData(self.db.get_setting('output_mode'))
+        self.output_mode_box.setCurrentIndex(max(0, output_mode_index))
+        self.output_mode_box.currentIndexChanged.connect(self.output_mode_changed)
+
+        for mode, mode_name in s.ARCHIVE_MODES.items():
+            self.archive_mode_box.addItem(mode_name, mode)
+        archive_mode_index = self.archive_mode_box.findData(self.db.get_setting('archive_mode'))
+        self.archive_mode_box.setCurrentIndex(max(0, archive_mode_index))
+        self.archive_mode_box.currentIndexChanged.connect(self.archive_mode_changed)
+
     def table_row_selected(self, *_):
         if self.videos_table.selectionModel().selectedRows():
             self.delete_video_button.setEnabled(True)
@@ -93,23 +110,25 @@ class MainAppWindow(QtWidgets.QMainWindow, Ui_MainWindow):
 
     def delete_video_button_clicked(self):
         row = self.videos_table.selectedIndexes()[0].row()
-        id = self.table_model.data(self.table_model.index(row, 0),
-                                   Qt.UserRole)
+        id = self.table_model.get_video_id(row)
         print('delete: id', id)
+        self.remove_partial_file(self.db.get_table_video_by_id(id))
         self.db.delete_table_video_by_id(id)
-        self.table_model.removeRow(row)
+        self.table_model.remove_videos([id])
 
     def edit_table_video(self, row_index: int):
         print('edit video:', row_index)
 
-        video_id = self.table_model.data(self.table_model.index(row_index, 0),
-                                         Qt.UserRole)
+        video_id = self.table_model.get_video_id(row_index)
         video_info = self.db.get_table_video_by_id(video_id)
 
         dialog = EditVideoDialog(title='Редактировать параметры',
                                  url=video_info['url'],
                                  resource_name=video_info['resource'],
                                  selected_format_name=video_info['format_name'],
+                                 video_info=video_info['video_info'],
+                                 video_info_time=video_info['video_info_time'],
+                                 output_mode=video_info['output_mode'],
                                  parent=self)
         if dialog.exec():
             info = dialog.get_inputs()
@@ -127,10 +146,14 @@ class MainAppWindow(QtWidgets.QMainWindow, Ui_MainWindow):
                                        format_name=info['format_name'],
                                        format_string=dl.get_formats_dict()[info['format_name']],
                                        thumbnail_filename=info['tn_filename'],
+                                       video_info=dl.get_video_info_json(),
+                                       video_info_time=dl.video_info_time,
                                        id=video_id)
-            self.table_model.item(row_index, 0).setText(info['resource_name'])
-            self.table_model.item(row_index, 1).setText(dl.title)
-            self.table_model.item(row_index, 2).setText(info['format_name'])
+            self.remove_partial_file(video_info)
+            self.table_model.update_video(video_id)
+
+        # Режим выходного файла можно изменить, не меняя ссылку и формат
+        self.db.set_table_video_output_mode(video_id, info['output_mode'])
 
     def add_video_button_clicked(self):
         self._logger.debug('add_video_button is clicked')
@@ -145,33 +168,63 @@ class MainAppWindow(QtWidgets.QMainWindow, Ui_MainWindow):
 
         dl: Downloader = info['dl']
 
-        if not self.db.has_table_video(url=dl.url, format_name=info['format_name']):
-
-            video_id = self.db.add_table_video(url=dl.url,
-                                               resource_name=info['resource_name'],
-                                               title=dl.title,
-                                               format_name=info['format_name'],
-                                               format_string=dl.get_formats_dict()[info['format_name']],
-                                               thumbnail_filename=info['tn_filename'])
+        # Видеоролик с тем же URL адресом и форматом не добавляется (id равен None)
+        video_id = self.db.add_table_video(url=dl.url,
+                                           resource_name=info['resource_name'],
+                                           title=dl.title,
+                                           format_name=info['format_name'],
+                                           format_string=dl.get_formats_dict()[info['format_name']],
+                                           thumbnail_filename=info['tn_filename'],
+                                           video_info=dl.get_video_info_json(),
+                                           video_info_time=dl.video_info_time,
+                                           output_mode=info['output_mode'])
+
+        if video_id is not None:
+            self.table_model.add_videos([video_id])
+        else:
+            self.report_error('Такой видеоролик уже добавлен.')
 
-            self.table_model.appendRow([
-                QtGui.QStandardItem(info['resource_name']),
-                QtGui.QStandardItem(dl.title),
-                QtGui.QStandardItem(info['format_name'])
-            ])
+    def bulk_add_button_clicked(self):
+        self._logger.debug('bulk_add_button is clicked')
 
-            # В "скрытых" данных первой ячейки каждой строки таблицы будет храниться
-            # id видеоролика в базе данных.
-            added_index = self.table_model.index(self.table_model.rowCount() - 1, 0)
-            self.table_model.setData(added_index, video_id, Qt.UserRole)
+        dialog = BulkAddDialog(parent=self)
 
+        if dialog.exec():
+            videos_inputs = dialog.get_inputs()
         else:
-            self.report_error('Такой видеоролик уже добавлен.')
+            self._logger.debug('bulk dialog is rejected')
+            return
+
+        videos = []
+        for info in videos_inputs:
+            dl: Downloader = info['dl']
+            videos.append({'url': dl.url,
+                           'resource_name': info['resource_name'],
+                           'title': dl.title,
+                           'format_name': info['format_name'],
+                           'format_string': dl.get_formats_dict()[info['format_name']],
+                           'thumbnail_filename': info['tn_filename'],
+                           'video_info': dl.get_video_info_json(),
+                           'video_info_time': dl.video_info_time})
+
+        ids = self.db.add_table_videos(videos)
+
+        # Видеоролики, которые уже есть в таблице, пропускаются (id равен None)
+        self.table_model.add_videos([video_id for video_id in ids if video_id is not None])
 
     def select_dir_button_clicked(self):
         self.save_dir = str(QtWidgets.QFileDialog.getExistingDirectory(self, 'Выберите папку'))
         self.save_dir_label.setText(self.save_dir)
 
+    def parallel_downloads_changed(self, value: int):
+        self.db.set_setting('max_parallel_downloads', str(value))
+
+    def output_mode_changed(self, *_):
+        self.db.set_setting('output_mode', self.output_mode_box.currentData())
+
+    def archive_mode_changed(self, *_):
+        self.db.set_setting('archive_mode', self.archive_mode_box.currentData())
+
     def start_button_clicked(self):
         self._logger.debug('start_button is clicked')
 
@@ -194,12 +247,90 @@ class MainAppWindow(QtWidgets.QMainWindow, Ui_MainWindow):
             if not accepted:
                 return
 
-        dialog = VideoDownloadDialog(videos_dicts, self.save_dir)
+        # Проверка свободного места в папке сохранения до начала скачивания выполняется
+        # в рабочем потоке, окно загрузки открывается по ее результату
+        self.start_button.setEnabled(False)
+        self.disk_space_task = DiskSpaceCheckTask(videos_dicts, self.save_dir,
+                                                  self.parallel_downloads_box.value(), parent=self)
+        self.disk_space_task.checked.connect(partial(self.disk_space_checked, videos_dicts))
+        self.disk_space_task.error_raised.connect(partial(self.disk_space_check_failed, videos_dicts))
+        self.disk_space_task.start()
+
+    def disk_space_checked(self, videos_dicts: list[dict], disk_space: dict) -> None:
+        """
+        Предупреждает о нехватке свободного места и начинает скачивание очереди.
+
+        Args:
+            videos_dicts: Список словарей видеороликов очереди.
+            disk_space: Результат ``diskspace.check_disk_space()``.
+        """
+        if not disk_space['enough']:
+            unknown = (f' Объем видеороликов ({disk_space["unknown_videos"]}) неизвестен и не учтен.'
+                       if disk_space['unknown_videos'] else '')
+            answer = QtWidgets.QMessageBox.warning(
+                self, 'Недостаточно места',
+                f'Для скачивания очереди нужно около {human_size(disk_space["required_bytes"])}, '
+                f'свободно {human_size(disk_space["free_bytes"])}.{unknown} Все равно начать скачивание?',
+                QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No,
+                defaultButton=QtWidgets.QMessageBox.No)
+            if answer != QtWidgets.QMessageBox.Yes:
+                self.start_button.setEnabled(True)
+                return
+
+        self.start_download(videos_dicts)
+
+    def disk_space_check_failed(self, videos_dicts: list[dict], err: str) -> None:
+        # Проверка свободного места не должна мешать скачиванию
+        self._logger.warning(f'Disk space is not checked: {err}')
+        self.start_download(videos_dicts)
+
+    def start_download(self, videos_dicts: list[dict]) -> None:
+        """
+        Открывает окно загрузки очереди видеороликов.
+
+        Args:
+            videos_dicts: Список словарей видеороликов очереди.
+        """
+        self.start_button.setEnabled(True)
+        dialog = VideoDownloadDialog(videos_dicts, self.save_dir, self.db,
+                                     max_parallel=self.parallel_downloads_box.value(),
+                                     output_mode=self.output_mode_box.currentData(),
+                                     archive_mode=self.archive_mode_box.currentData())
 
         dialog.exec()
-        # remaining_videos = dialog.get_remaining_videos()
-        self.table_model.removeRows(0, self.table_model.rowCount())
-        self.db.delete_all_table_videos()
+
+        # Нескачанные видеороликы остаются в таблице, их загрузка продолжится при следующем запуске
+        finished_ids = dialog.get_finished_videos()
+        self.db.delete_table_videos_by_ids(finished_ids)
+        self.table_model.remove_videos(finished_ids)
+
+    def remove_partial_file(self, video: dict) -> None:
+        """
+        Удаляет незавершенные файлы (.part) прерванной загрузки видеоролика,
+        в том числе файлы отдельных видео и аудио потоков (.f{format_id}.{ext}.part)
+        и файлы состояния многопоточной загрузки (.part.segments).
+
+        Args:
+            video: Словарь данных видеоролика из базы данных.
+        """
+        if video.get('state') == 'finished':
+            return
+
+        files_paths = set()
+        if part_path := video.get('part_path'):
+            files_paths.update((part_path, f'{part_path}.segments'))
+
+        if output_path := video.get('output_path'):
+            directory, name = os.path.split(output_path)
+            pattern = re.compile(re.escape(name) + r'(\.f[\w-]+)?\.\w+\.part(\.segments)?')
+            if os.path.isdir(directory or '.'):
+                files_paths.update(os.path.join(directory, file_name)
+                                   for file_name in os.listdir(directory or '.')
+                                   if pattern.fullmatch(file_name))
+
+        for file_path in files_paths:
+            if os.path.isfile(file_path):
+                os.remove(file_path)
 
     def report_error(self, msg: str):
         """